@@ -0,0 +1,23 @@
+import pytest
+import dataset_builder   # 把 elmore_py 加入 sys.path
+from benchmark import make_dnets, write_spef
+
+# 合成设计：12 个多 driver 的随机树，第 3 个 net 额外加一个电阻成环
+N_NETS = 12
+LOOPED_NET = 2
+
+
+@pytest.fixture
+def design():
+    nets, name_map = make_dnets('multi_driver', 40, N_NETS, seed=7)
+    looped = nets[LOOPED_NET]
+    a, b = looped.ress[0][0], looped.ress[-1][1]
+    nets[LOOPED_NET] = looped._replace(ress=looped.ress + [(a, b, 3.0)])
+    return nets, name_map
+
+
+@pytest.fixture
+def spef_path(tmp_path, design):
+    path = str(tmp_path / 'design.spef')
+    write_spef(path, *design)
+    return path
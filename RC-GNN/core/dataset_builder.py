@@ -0,0 +1,234 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from multiprocessing import Pool
+import numpy as np
+
+# 解析与 Elmore 标签复用 elmore_py 的实现
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'elmore_py'))
+from spefReader import SpefReader, iter_dnets, net_caps, split_pins, fill_tree  # noqa: E402
+from parallelSpef import split_dnet_chunks, iter_chunk_lines  # noqa: E402
+from RCTree import RCTree  # noqa: E402
+from meshSolver import has_loop, mesh_delays  # noqa: E402
+
+MANIFEST_VERSION = 2
+NODE_FEATURES = ('capacitance', 'degree')
+
+# 每个分片目录中的数组，第 g 个图的节点/边/标签为 *_offsets[g]:*_offsets[g+1]
+#   node_feat   (N, F) float32    NODE_FEATURES 各列
+#   driver_mask (N,)   bool       *CONN 中方向为 I 的引脚
+#   load_mask   (N,)   bool       *CONN 中方向为 O 的引脚
+#   edge_index  (2, E) int32      图内局部节点编号
+#   edge_res    (E,)   float32
+#   label_driver/label_load (P,) int32, label_delay (P,) float32
+#                                 RCTree 求出的 driver→load Elmore 时延（不连通为 NaN），
+#                                 有电阻环的 net 与 main.py 相同改用 meshSolver 求解
+#   net_names   (G,)   str
+SHARD_ARRAYS = ('node_feat', 'driver_mask', 'load_mask', 'edge_index', 'edge_res',
+                'label_driver', 'label_load', 'label_delay',
+                'node_offsets', 'edge_offsets', 'label_offsets', 'net_names')
+
+_worker_name_map = None
+
+
+def net_to_graph(net):
+    """把一个 DNet 转成图数组，返回 dict：cap/degree/driver/load/edge_u/edge_v/edge_res/标签"""
+    index = {}
+    intern = lambda node: index.setdefault(node, len(index))
+    caps = net_caps(net)
+    for node, _ in caps:
+        intern(node)
+    edge_u = [intern(node1) for node1, _, _ in net.ress]
+    edge_v = [intern(node2) for _, node2, _ in net.ress]
+    drivers, loads = split_pins(net)
+    driver_idx = [intern(node) for node in drivers]
+    load_idx = [intern(node) for node in loads]
+
+    n = len(index)
+    cap = np.zeros(n, dtype=np.float32)
+    for node, value in caps:
+        cap[index[node]] = value
+    degree = np.bincount(np.array(edge_u + edge_v, dtype=np.int64), minlength=n).astype(np.float32)
+    driver_mask = np.zeros(n, dtype=bool)
+    driver_mask[driver_idx] = True
+    load_mask = np.zeros(n, dtype=bool)
+    load_mask[load_idx] = True
+
+    all_delays = {}
+    if drivers:
+        rctree = fill_tree(net, RCTree())
+        all_delays = rctree.compute_delays_all_drivers(drivers, loads)
+        looped = rctree.loop_detected
+        if looped or (looped is None and has_loop(net)):
+            # 树上的结果对电阻环不成立，标签改用电导矩阵求解（判定与 delayWriter 相同）
+            all_delays = mesh_delays(net, drivers, loads)
+    label_driver, label_load, label_delay = [], [], []
+    for driver, d_idx in zip(drivers, driver_idx):
+        delays = all_delays[driver]
+        for load, l_idx in zip(loads, load_idx):
+            label_driver.append(d_idx)
+            label_load.append(l_idx)
+            delay = delays.get(load)
+            label_delay.append(math.nan if delay is None else delay)
+
+    return {
+        'node_feat': np.stack([cap, degree], axis=1),
+        'driver_mask': driver_mask,
+        'load_mask': load_mask,
+        'edge_index': np.array([edge_u, edge_v], dtype=np.int32).reshape(2, -1),
+        'edge_res': np.array([res for _, _, res in net.ress], dtype=np.float32),
+        'label_driver': np.array(label_driver, dtype=np.int32),
+        'label_load': np.array(label_load, dtype=np.int32),
+        'label_delay': np.array(label_delay, dtype=np.float32),
+    }
+
+
+def write_shard(shard_dir, graphs, net_names):
+    """把一批图拼接后写成一个分片目录（先写临时目录再改名，中断时不会留下半个分片）"""
+    tmp_dir = shard_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    arrays = {}
+    for name in ('node_feat', 'driver_mask', 'load_mask', 'edge_res',
+                 'label_driver', 'label_load', 'label_delay'):
+        parts = [g[name] for g in graphs]
+        arrays[name] = np.concatenate(parts) if parts else np.zeros((0, len(NODE_FEATURES)) if name == 'node_feat' else 0)
+    arrays['edge_index'] = (np.concatenate([g['edge_index'] for g in graphs], axis=1)
+                            if graphs else np.zeros((2, 0), dtype=np.int32))
+    for prefix, key, axis in (('node', 'driver_mask', 0), ('edge', 'edge_res', 0), ('label', 'label_delay', 0)):
+        offsets = np.zeros(len(graphs) + 1, dtype=np.int64)
+        np.cumsum([g[key].shape[axis] for g in graphs], out=offsets[1:])
+        arrays[f'{prefix}_offsets'] = offsets
+    arrays['net_names'] = np.array(net_names, dtype=str)
+
+    for name in SHARD_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), arrays[name])
+    stats = {
+        'graphs': len(graphs),
+        'nodes': int(arrays['node_offsets'][-1]),
+        'edges': int(arrays['edge_offsets'][-1]),
+        'labels': int(arrays['label_offsets'][-1]),
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(stats, f)
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    os.replace(tmp_dir, shard_dir)
+    return stats
+
+
+def _init_worker(name_map):
+    global _worker_name_map
+    _worker_name_map = name_map
+
+
+def _build_shard(task):
+    spef_path, start, end, shard_dir = task
+    graphs, net_names = [], []
+    for net in iter_dnets(iter_chunk_lines(spef_path, start, end), _worker_name_map):
+        graphs.append(net_to_graph(net))
+        net_names.append(net.name)
+    return os.path.basename(shard_dir), write_shard(shard_dir, graphs, net_names)
+
+
+def _spef_identity(spef_path):
+    stat = os.stat(spef_path)
+    return {'spef': os.path.abspath(spef_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _save_manifest(manifest, output_dir):
+    path = os.path.join(output_dir, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_dataset(spef_path, output_dir, jobs=1, shard_mb=64, overwrite=False):
+    """
+    流式处理整个 SPEF：按字节范围（对齐到 *D_NET）切成若干块，每块由一个工作进程
+    解析、建图、用 RCTree 计算 Elmore 标签并写成一个分片。manifest.json 记录切分方式和
+    已完成的分片，中断后重新运行只处理尚未完成的分片。返回 manifest
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    identity = _spef_identity(spef_path)
+    manifest = None if overwrite else load_manifest(output_dir)
+    if manifest is not None and (manifest.get('version') != MANIFEST_VERSION
+                                 or manifest.get('source') != identity
+                                 or manifest.get('shard_mb') != shard_mb):
+        print("⚠️ SPEF 或分片参数已变化，重新生成数据集")
+        manifest = None
+
+    if manifest is None:
+        for name in os.listdir(output_dir):
+            if name.startswith('shard_'):
+                shutil.rmtree(os.path.join(output_dir, name), ignore_errors=True)
+        n_chunks = max(1, math.ceil(identity['size'] / (shard_mb * 1024 * 1024)))
+        chunks = split_dnet_chunks(spef_path, n_chunks)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'source': identity,
+            'shard_mb': shard_mb,
+            'node_features': list(NODE_FEATURES),
+            'chunks': [[start, end] for start, end in chunks],
+            'shards': {},
+            'complete': False,
+        }
+        _save_manifest(manifest, output_dir)
+
+    tasks = []
+    for k, (start, end) in enumerate(manifest['chunks']):
+        name = f"shard_{k:05d}"
+        if name not in manifest['shards'] or not os.path.exists(os.path.join(output_dir, name, 'meta.json')):
+            manifest['shards'].pop(name, None)
+            tasks.append((spef_path, start, end, os.path.join(output_dir, name)))
+    if len(tasks) < len(manifest['chunks']):
+        print(f"继续上次的构建：{len(manifest['chunks']) - len(tasks)} 个分片已完成，剩余 {len(tasks)} 个")
+
+    with SpefReader(spef_path) as reader:
+        name_map = reader.name_map
+
+    if tasks:
+        with Pool(max(1, jobs), initializer=_init_worker, initargs=(name_map,)) as pool:
+            for name, stats in pool.imap_unordered(_build_shard, tasks):
+                manifest['shards'][name] = stats
+                _save_manifest(manifest, output_dir)
+                print(f"分片 {name}: {stats['graphs']} 个 net，{stats['nodes']} 个节点")
+
+    manifest['shards'] = dict(sorted(manifest['shards'].items()))
+    manifest['complete'] = True
+    manifest['totals'] = {key: sum(s[key] for s in manifest['shards'].values())
+                          for key in ('graphs', 'nodes', 'edges', 'labels')}
+    _save_manifest(manifest, output_dir)
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="把整个 SPEF 转成分片的 RC-GNN 训练数据集")
+    parser.add_argument('--spef', type=str, required=True, help="SPEF 文件路径")
+    parser.add_argument('--output', type=str, required=True, help="数据集输出目录")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="工作进程数")
+    parser.add_argument('--shard-mb', type=float, default=64,
+                        help="每个分片对应的 SPEF 字节数（MB），决定分片个数")
+    parser.add_argument('--overwrite', action='store_true', help="忽略已有的 manifest，重新生成")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start_time = time.time()
+    manifest = build_dataset(args.spef, args.output, args.jobs, args.shard_mb, args.overwrite)
+    totals = manifest['totals']
+    print(f"✅ 数据集已保存到 {args.output}：{len(manifest['shards'])} 个分片，{totals['graphs']} 个 net，"
+          f"{totals['nodes']} 个节点，{totals['labels']} 个标签，耗时 {time.time() - start_time:.2f} 秒")
@@ -157,8 +157,9 @@ def spef_to_dgl_json(spef_path, output_dir):
     else:
         print("未能解析到任何 *D_NET 内容")
 
-# 使用示例
-spef_path = 'timing/RC-GNN/Data/SPEF/Group0.spef'
-netlist_path = 'timing/RC-GNN/Data/netlist_info.txt'
-output_dir = 'timing/RC-GNN/datasets'
-spef_to_dgl_json(spef_path, output_dir)
\ No newline at end of file
+# 使用示例（整个 SPEF 的分片数据集见 dataset_builder.py）
+if __name__ == "__main__":
+    spef_path = 'timing/RC-GNN/Data/SPEF/Group0.spef'
+    netlist_path = 'timing/RC-GNN/Data/netlist_info.txt'
+    output_dir = 'timing/RC-GNN/datasets'
+    spef_to_dgl_json(spef_path, output_dir)
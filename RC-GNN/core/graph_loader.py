@@ -0,0 +1,232 @@
+import json
+import os
+import queue
+import threading
+from collections import namedtuple
+import numpy as np
+
+# 单个图：edge_index 与 label_driver/label_load 为图内局部节点编号
+GraphSample = namedtuple('GraphSample', ['name', 'node_feat', 'driver_mask', 'load_mask', 'edge_index',
+                                         'edge_res', 'label_driver', 'label_load', 'label_delay'])
+
+# 一批图拼成的块对角大图：节点/边/标签按图依次排列，编号已加上各图的节点偏移；
+# graph_ids 为每个节点所属的图，node_offsets/label_offsets 为各图的起止位置
+GraphBatch = namedtuple('GraphBatch', ['names', 'node_feat', 'driver_mask', 'load_mask', 'edge_index',
+                                       'edge_res', 'label_driver', 'label_load', 'label_delay',
+                                       'graph_ids', 'node_offsets', 'label_offsets'])
+
+_SLICED = {
+    'node_feat': 'node', 'driver_mask': 'node', 'load_mask': 'node', 'edge_res': 'edge',
+    'label_driver': 'label', 'label_load': 'label', 'label_delay': 'label',
+}
+
+
+class ShardedGraphDataset:
+    """
+    读取 dataset_builder.py 生成的分片数据集。分片数组用 mmap 打开（首次访问时），
+    只有 offsets 和 net 名常驻内存；按下标取图时才切出对应的片段
+    """
+    def __init__(self, root):
+        with open(os.path.join(root, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        if not self.manifest.get('complete'):
+            print(f"⚠️ {root} 的数据集尚未构建完成，只加载已完成的分片")
+        self.root = root
+        self.shard_names = sorted(self.manifest['shards'])
+        self._shards = [None] * len(self.shard_names)
+
+        node_offsets = []
+        self.names = []
+        for name in self.shard_names:
+            shard_dir = os.path.join(root, name)
+            node_offsets.append(np.load(os.path.join(shard_dir, 'node_offsets.npy')))
+            self.names.extend(np.load(os.path.join(shard_dir, 'net_names.npy')).tolist())
+        counts = [len(offsets) - 1 for offsets in node_offsets]
+        self.graph_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.graph_offsets[1:])
+        self.num_nodes = (np.concatenate([np.diff(offsets) for offsets in node_offsets])
+                          if node_offsets else np.zeros(0, dtype=np.int64))
+        self.node_features = self.manifest['node_features']
+
+    def __len__(self):
+        return len(self.num_nodes)
+
+    def _shard(self, k):
+        shard = self._shards[k]
+        if shard is None:
+            shard_dir = os.path.join(self.root, self.shard_names[k])
+            shard = {name: np.load(os.path.join(shard_dir, f"{name}.npy"), mmap_mode='r')
+                     for name in ('node_feat', 'driver_mask', 'load_mask', 'edge_index', 'edge_res',
+                                  'label_driver', 'label_load', 'label_delay',
+                                  'node_offsets', 'edge_offsets', 'label_offsets')}
+            self._shards[k] = shard
+        return shard
+
+    def locate(self, index):
+        """全局下标 -> (分片序号, 分片内下标)"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        k = int(np.searchsorted(self.graph_offsets, index, side='right')) - 1
+        return k, index - int(self.graph_offsets[k])
+
+    def __getitem__(self, index):
+        k, g = self.locate(index)
+        shard = self._shard(k)
+        parts = {}
+        for name, prefix in _SLICED.items():
+            offsets = shard[f'{prefix}_offsets']
+            parts[name] = shard[name][offsets[g]:offsets[g + 1]]
+        edge_offsets = shard['edge_offsets']
+        parts['edge_index'] = shard['edge_index'][:, edge_offsets[g]:edge_offsets[g + 1]]
+        return GraphSample(self.names[self.graph_offsets[k] + g], **parts)
+
+
+def collate_graphs(samples):
+    """把若干个 GraphSample 拼成一个块对角的 GraphBatch"""
+    num_nodes = np.array([len(s.node_feat) for s in samples], dtype=np.int64)
+    num_labels = np.array([len(s.label_delay) for s in samples], dtype=np.int64)
+    node_offsets = np.zeros(len(samples) + 1, dtype=np.int64)
+    np.cumsum(num_nodes, out=node_offsets[1:])
+    label_offsets = np.zeros(len(samples) + 1, dtype=np.int64)
+    np.cumsum(num_labels, out=label_offsets[1:])
+
+    num_edges = np.array([s.edge_index.shape[1] for s in samples], dtype=np.int64)
+    edge_shift = np.repeat(node_offsets[:-1], num_edges)
+    label_shift = np.repeat(node_offsets[:-1], num_labels)
+    cat = lambda field: np.concatenate([getattr(s, field) for s in samples])
+    return GraphBatch(
+        names=[s.name for s in samples],
+        node_feat=cat('node_feat'),
+        driver_mask=cat('driver_mask'),
+        load_mask=cat('load_mask'),
+        edge_index=np.concatenate([s.edge_index for s in samples], axis=1).astype(np.int64) + edge_shift,
+        edge_res=cat('edge_res'),
+        label_driver=cat('label_driver').astype(np.int64) + label_shift,
+        label_load=cat('label_load').astype(np.int64) + label_shift,
+        label_delay=cat('label_delay'),
+        graph_ids=np.repeat(np.arange(len(samples), dtype=np.int64), num_nodes),
+        node_offsets=node_offsets,
+        label_offsets=label_offsets,
+    )
+
+
+class BucketBatchSampler:
+    """
+    按节点数分桶的批采样器：先按节点数排序（同规模内随机打乱），
+    再按顺序装批，每批节点数不超过 max_nodes、图数不超过 batch_size，
+    这样同一批内的图规模相近，最后打乱批的顺序
+    """
+    def __init__(self, num_nodes, max_nodes=65536, batch_size=None, shuffle=True, seed=0):
+        self.num_nodes = np.asarray(num_nodes, dtype=np.int64)
+        self.max_nodes = max_nodes
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+    def _pack(self, order):
+        batches, current, total = [], [], 0
+        for i, size in zip(order.tolist(), self.num_nodes[order].tolist()):
+            full = (self.batch_size is not None and len(current) >= self.batch_size) or \
+                   total + size > self.max_nodes
+            if current and full:
+                batches.append(current)
+                current, total = [], 0
+            current.append(i)
+            total += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def batches(self):
+        n = len(self.num_nodes)
+        tie = self.rng.random(n) if self.shuffle else np.arange(n)
+        batches = self._pack(np.lexsort((tie, self.num_nodes)))
+        if self.shuffle:
+            self.rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        return iter(self.batches())
+
+    def __len__(self):
+        # 批的划分只取决于排序后的规模序列，不消耗随机数
+        return len(self._pack(np.argsort(self.num_nodes, kind='stable')))
+
+
+class GraphLoader:
+    """
+    按 sampler 给出的下标批读取并拼接图。prefetch > 0 时在后台线程中提前准备
+    prefetch 个批（mmap 读取与拼接都在 numpy 中完成，可与训练计算重叠）
+    """
+    def __init__(self, dataset, sampler=None, prefetch=2, **sampler_args):
+        self.dataset = dataset
+        self.sampler = sampler if sampler is not None else BucketBatchSampler(dataset.num_nodes, **sampler_args)
+        self.prefetch = prefetch
+
+    def _load(self, indices):
+        return collate_graphs([self.dataset[i] for i in indices])
+
+    def __len__(self):
+        return len(self.sampler)
+
+    def __iter__(self):
+        batches = list(self.sampler)
+        if self.prefetch <= 0:
+            for indices in batches:
+                yield self._load(indices)
+            return
+
+        q = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def worker():
+            try:
+                for indices in batches:
+                    if stop.is_set():
+                        return
+                    q.put(self._load(indices))
+            except BaseException as exc:
+                q.put(exc)
+                return
+            q.put(done)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = q.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # 放出队列空位，让后台线程能结束
+            while thread.is_alive():
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    thread.join(0.01)
+
+
+def to_dgl(batch):
+    """把 GraphBatch 转成 DGL 图（双向边），需要安装 dgl 和 torch"""
+    import dgl
+    import torch
+
+    # 正反两个方向的边按所属图稳定排序，保证每个图的边连续存放
+    u, v = batch.edge_index
+    src, dst = np.concatenate([u, v]), np.concatenate([v, u])
+    order = np.argsort(batch.graph_ids[src], kind='stable')
+    g = dgl.graph((torch.from_numpy(src[order]), torch.from_numpy(dst[order])), num_nodes=len(batch.node_feat))
+    g.ndata['feat'] = torch.from_numpy(np.ascontiguousarray(batch.node_feat))
+    g.ndata['driver'] = torch.from_numpy(batch.driver_mask)
+    g.ndata['load'] = torch.from_numpy(batch.load_mask)
+    g.edata['resistance'] = torch.from_numpy(np.tile(batch.edge_res, 2)[order])
+    g.set_batch_num_nodes(torch.from_numpy(np.diff(batch.node_offsets)))
+    g.set_batch_num_edges(torch.from_numpy(np.bincount(batch.graph_ids[src], minlength=len(batch.names))))
+    return g
@@ -0,0 +1,60 @@
+import os
+import numpy as np
+from dataset_builder import *
+from conftest import LOOPED_NET, N_NETS
+
+
+def test_labels_match_rctree(design):
+    nets, _ = design
+    for i, net in enumerate(nets):
+        graph = net_to_graph(net)
+        drivers, loads = split_pins(net)
+        if i == LOOPED_NET:
+            expected = mesh_delays(net, drivers, loads)
+        else:
+            expected = {driver: fill_tree(net, RCTree()).compute_delays_to_loads(driver, loads)
+                        for driver in drivers}
+        expected = [expected[driver][load] for driver in drivers for load in loads]
+        np.testing.assert_allclose(graph['label_delay'], np.array(expected, dtype=np.float32), rtol=1e-6)
+        assert graph['driver_mask'].sum() == len(drivers) and graph['load_mask'].sum() == len(loads)
+        assert graph['edge_index'].shape == (2, len(net.ress))
+        np.testing.assert_array_equal(graph['node_feat'][:, 1],
+                                      np.bincount(graph['edge_index'].ravel(), minlength=len(graph['node_feat'])))
+
+
+def test_unreachable_loads_are_nan(design):
+    net = design[0][0]
+    # 把第一个 load 换成不在 *RES 中的孤立节点
+    load = next(node for node, direction in net.conns if direction == 'O')
+    isolated = net._replace(ress=[res for res in net.ress if load not in res[:2]])
+    graph = net_to_graph(isolated)
+    assert np.isnan(graph['label_delay'][graph['label_load'] == graph['label_load'][0]]).all()
+
+
+def _shard_mb(spef_path, n_shards):
+    return os.path.getsize(spef_path) / n_shards / (1024 * 1024)
+
+
+def test_build_shards_and_resume(tmp_path, spef_path, design, capsys):
+    output_dir = str(tmp_path / 'dataset')
+    shard_mb = _shard_mb(spef_path, 3)
+    manifest = build_dataset(spef_path, output_dir, jobs=2, shard_mb=shard_mb)
+    assert manifest['complete'] and len(manifest['shards']) == 3
+    assert manifest['totals']['graphs'] == N_NETS
+    names = np.concatenate([np.load(os.path.join(output_dir, name, 'net_names.npy'))
+                            for name in manifest['shards']])
+    assert names.tolist() == [net.name for net in design[0]]
+
+    # 删除一个分片后重新运行：只重建这个分片
+    os.remove(os.path.join(output_dir, 'shard_00001', 'meta.json'))
+    kept = os.path.getmtime(os.path.join(output_dir, 'shard_00000', 'meta.json'))
+    capsys.readouterr()
+    assert build_dataset(spef_path, output_dir, jobs=1, shard_mb=shard_mb)['totals'] == manifest['totals']
+    out = capsys.readouterr().out
+    assert '2 个分片已完成，剩余 1 个' in out
+    assert os.path.getmtime(os.path.join(output_dir, 'shard_00000', 'meta.json')) == kept
+
+    # 分片参数变化时整体重建
+    manifest = build_dataset(spef_path, output_dir, jobs=1, shard_mb=_shard_mb(spef_path, 2))
+    assert sorted(name for name in os.listdir(output_dir) if name.startswith('shard_')) == \
+        ['shard_00000', 'shard_00001']
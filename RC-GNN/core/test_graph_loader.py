@@ -0,0 +1,78 @@
+import os
+import numpy as np
+import pytest
+from dataset_builder import build_dataset, net_to_graph
+from graph_loader import *
+
+
+@pytest.fixture
+def dataset(tmp_path, spef_path):
+    root = str(tmp_path / 'dataset')
+    shard_mb = os.path.getsize(spef_path) / 3 / (1024 * 1024)
+    build_dataset(spef_path, root, jobs=1, shard_mb=shard_mb)
+    return ShardedGraphDataset(root)
+
+
+def test_samples_match_net_to_graph(dataset, design):
+    nets, _ = design
+    assert len(dataset) == len(nets) and len(dataset.shard_names) == 3
+    for i, net in enumerate(nets):
+        sample, graph = dataset[i], net_to_graph(net)
+        assert sample.name == net.name
+        for field in graph:
+            np.testing.assert_array_equal(getattr(sample, field), graph[field], err_msg=field)
+    assert dataset[-1].name == nets[-1].name
+    with pytest.raises(IndexError):
+        dataset[len(nets)]
+
+
+def test_collate_shifts_by_node_offsets(dataset):
+    samples = [dataset[i] for i in (4, 0, 7)]
+    batch = collate_graphs(samples)
+    assert batch.names == [s.name for s in samples]
+    for k, s in enumerate(samples):
+        n0, n1 = batch.node_offsets[k], batch.node_offsets[k + 1]
+        l0, l1 = batch.label_offsets[k], batch.label_offsets[k + 1]
+        np.testing.assert_array_equal(batch.node_feat[n0:n1], s.node_feat)
+        assert (batch.graph_ids[n0:n1] == k).all()
+        np.testing.assert_array_equal(batch.label_driver[l0:l1] - n0, s.label_driver)
+        np.testing.assert_array_equal(batch.label_delay[l0:l1], s.label_delay)
+    # 每条边的两个端点都落在同一个图内
+    assert (batch.graph_ids[batch.edge_index[0]] == batch.graph_ids[batch.edge_index[1]]).all()
+    assert batch.edge_index.shape[1] == sum(s.edge_index.shape[1] for s in samples)
+
+
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_bucket_sampler_limits(shuffle):
+    num_nodes = np.random.default_rng(0).integers(1, 50, size=200)
+    sampler = BucketBatchSampler(num_nodes, max_nodes=120, batch_size=6, shuffle=shuffle, seed=1)
+    batches = sampler.batches()
+    assert sorted(i for b in batches for i in b) == list(range(200))
+    assert all(len(b) <= 6 and num_nodes[b].sum() <= 120 for b in batches)
+    assert len(batches) == len(sampler)
+    # 单个图超过 max_nodes 时单独成批
+    assert BucketBatchSampler([300, 2, 2], max_nodes=100, shuffle=False).batches() == [[1, 2], [0]]
+
+
+def test_prefetch_matches_synchronous(dataset):
+    def load(prefetch):
+        sampler = BucketBatchSampler(dataset.num_nodes, max_nodes=150, shuffle=True, seed=3)
+        return list(GraphLoader(dataset, sampler, prefetch=prefetch))
+    eager, prefetched = load(0), load(2)
+    assert len(eager) == len(prefetched) > 1
+    for a, b in zip(eager, prefetched):
+        assert a.names == b.names
+        for field in GraphBatch._fields[1:]:
+            np.testing.assert_array_equal(getattr(a, field), getattr(b, field))
+    # 提前退出时后台线程能结束
+    loader = GraphLoader(dataset, BucketBatchSampler(dataset.num_nodes, max_nodes=1), prefetch=1)
+    next(iter(loader))
+
+
+def test_to_dgl(dataset):
+    pytest.importorskip('torch')
+    pytest.importorskip('dgl')
+    batch = collate_graphs([dataset[i] for i in range(3)])
+    g = to_dgl(batch)
+    assert g.batch_size == 3 and g.num_nodes() == len(batch.node_feat)
+    assert g.num_edges() == 2 * batch.edge_index.shape[1]
@@ -0,0 +1,129 @@
+// RCTree 基准：对比旧版字符串键实现与整数化实现的 nets/s
+// 用法: elmore_bench <spef> [repeat]
+// 以 SPEF 中 *CONN 方向为 I 的引脚为 driver、O 的引脚为 load（与 elmore_py 相同）
+#include <chrono>
+#include <cmath>
+#include <fstream>
+#include <iomanip>
+#include <iostream>
+#include <string>
+#include <vector>
+#include "LegacyRCTree.hpp"
+#include "Parser.hpp"
+#include "RCTree.hpp"
+
+struct NetData {
+    std::vector<std::pair<std::string, double>> caps;
+    std::vector<std::tuple<std::string, std::string, double>> ress;
+    std::vector<std::string> drivers, loads;
+};
+
+static std::string strip_star(const std::string& s) {
+    return (!s.empty() && s[0] == '*') ? s.substr(1) : s;
+}
+
+static std::vector<NetData> load_nets(const std::string& spef_path) {
+    std::vector<NetData> nets;
+    std::ifstream file(spef_path);
+    std::string line;
+    bool in_dnet = false, in_conn = false, in_cap = false, in_res = false;
+    while (std::getline(file, line)) {
+        line.erase(0, line.find_first_not_of(" \t"));
+        if (line.rfind("*D_NET", 0) == 0 && !in_dnet) {
+            in_dnet = true;
+            in_conn = in_cap = in_res = false;
+            nets.emplace_back();
+            continue;
+        }
+        if (!in_dnet) continue;
+        if (line.rfind("*END", 0) == 0) { in_dnet = false; continue; }
+        if (line.rfind("*CONN", 0) == 0) { in_conn = true; in_cap = false; in_res = false; continue; }
+        if (line.rfind("*CAP", 0) == 0)  { in_conn = false; in_cap = true; in_res = false; continue; }
+        if (line.rfind("*RES", 0) == 0)  { in_conn = false; in_cap = false; in_res = true; continue; }
+
+        auto parts = Parser::split(line, ' ');
+        auto& net = nets.back();
+        if (in_conn && line.rfind("*I", 0) == 0 && parts.size() >= 3) {
+            if (parts[2] == "I") net.drivers.push_back(strip_star(parts[1]));
+            else if (parts[2] == "O") net.loads.push_back(strip_star(parts[1]));
+        } else if (in_cap && parts.size() == 3) {
+            net.caps.emplace_back(strip_star(parts[1]), std::stod(parts[2]));
+        } else if (in_res && parts.size() >= 4) {
+            net.ress.emplace_back(strip_star(parts[1]), strip_star(parts[2]), std::stod(parts[3]));
+        }
+    }
+    return nets;
+}
+
+int main(int argc, char* argv[]) {
+    if (argc < 2) {
+        std::cerr << "Usage: " << argv[0] << " <spef> [repeat]\n";
+        return 1;
+    }
+    int repeat = argc >= 3 ? std::stoi(argv[2]) : 3;
+    auto nets = load_nets(argv[1]);
+    std::cout << "D_NET总数: " << nets.size() << "，重复 " << repeat << " 次\n";
+
+    using clock = std::chrono::steady_clock;
+    double checksum_legacy = 0.0, checksum_new = 0.0, max_diff = 0.0;
+
+    // 旧版：每个 net 新建对象，字符串键
+    auto t0 = clock::now();
+    std::vector<double> legacy_out;
+    for (int rep = 0; rep < repeat; ++rep) {
+        legacy_out.clear();
+        for (const auto& net : nets) {
+            LegacyRCTree tree;
+            for (const auto& [node, cap] : net.caps) tree.set_node_cap(node, cap);
+            for (const auto& [u, v, r] : net.ress) tree.add_edge(u, v, r);
+            for (const auto& driver : net.drivers) {
+                if (net.ress.empty()) continue;
+                auto delays = tree.compute_delays_to_loads(driver, net.loads);
+                for (const auto& load : net.loads) legacy_out.push_back(delays[load]);
+            }
+        }
+    }
+    double legacy_s = std::chrono::duration<double>(clock::now() - t0).count();
+
+    // 新版：对象和缓冲区跨 net 复用，整数编号
+    t0 = clock::now();
+    RCTree tree;
+    std::vector<int> load_ids;
+    std::vector<double> out;
+    size_t k = 0;
+    for (int rep = 0; rep < repeat; ++rep) {
+        k = 0;
+        for (const auto& net : nets) {
+            tree.clear();
+            for (const auto& [node, cap] : net.caps) tree.set_node_cap(node, cap);
+            for (const auto& [u, v, r] : net.ress) tree.add_edge(u, v, r);
+            load_ids.clear();
+            for (const auto& load : net.loads) load_ids.push_back(tree.find_node(load));
+            out.resize(load_ids.size());
+            for (const auto& driver : net.drivers) {
+                if (net.ress.empty()) continue;
+                tree.compute_delays(tree.find_node(driver), load_ids.data(),
+                                    static_cast<int>(load_ids.size()), out.data());
+                for (double d : out) {
+                    if (rep == repeat - 1) {
+                        max_diff = std::max(max_diff, std::fabs(d - legacy_out[k]));
+                        checksum_new += d;
+                        checksum_legacy += legacy_out[k];
+                    }
+                    ++k;
+                }
+            }
+        }
+    }
+    double new_s = std::chrono::duration<double>(clock::now() - t0).count();
+
+    double total = static_cast<double>(nets.size()) * repeat;
+    std::cout << std::fixed << std::setprecision(1);
+    std::cout << "legacy : " << total / legacy_s << " nets/s (" << std::setprecision(6) << legacy_s << " s)\n";
+    std::cout << std::setprecision(1);
+    std::cout << "integer: " << total / new_s << " nets/s (" << std::setprecision(6) << new_s << " s)\n";
+    std::cout << std::setprecision(2) << "speedup: " << legacy_s / new_s << "x\n";
+    std::cout << std::scientific << "max |diff|: " << max_diff
+              << "  checksum " << checksum_legacy << " / " << checksum_new << "\n";
+    return max_diff > 1e-12 ? 2 : 0;
+}
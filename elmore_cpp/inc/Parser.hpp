@@ -19,6 +19,11 @@ public:
     // 解析 SPEF 文件中的 *NAME_MAP
     static std::unordered_map<std::string, std::string> parse_name_map(const std::string& spef_path);
 
+    // 不用正则，直接在内存缓冲区（如 mmap 的 SPEF）上解析 *NAME_MAP，
+    // 返回 name map 结束处的偏移，便于从那里继续解析 D_NET
+    static size_t parse_name_map_buffer(const char* data, size_t size,
+                                        std::unordered_map<std::string, std::string>& name_map);
+
     static std::vector<std::string> split(const std::string& str, char delimiter);
 
 };
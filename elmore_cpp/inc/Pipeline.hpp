@@ -0,0 +1,22 @@
+#ifndef PIPELINE_HPP
+#define PIPELINE_HPP
+
+#include <string>
+
+// 读取 netlist 与 SPEF，计算每个 net 输入到输出的时延，结果写入 output_dir/<spef名>.txt
+void compute_and_save_delays(
+    const std::string& spef_path,
+    const std::string& netlist_path,
+    const std::string& output_dir
+);
+
+// 多线程版本：mmap 读取 SPEF，按 *D_NET 切块交给 threads 个工作线程，
+// 各块结果按 net 顺序写出，输出与单线程版本一致
+void compute_and_save_delays_mt(
+    const std::string& spef_path,
+    const std::string& netlist_path,
+    const std::string& output_dir,
+    int threads
+);
+
+#endif // PIPELINE_HPP
@@ -2,30 +2,65 @@
 #define RCTREE_HPP
 
 #include <unordered_map>
-#include <unordered_set>
 #include <vector>
 #include <string>
+#include <string_view>
 #include <cmath>
 
+// 整数节点上的 Elmore 计算工作区：CSR、parent、先序等缓冲区跨 net 复用，
+// 稳定运行后计算过程中不再有堆分配
+struct ElmoreWorkspace {
+    std::vector<int> offsets, fill, adj, adj_edge;
+    std::vector<int> parent, order, stack;
+    std::vector<double> parent_r, subtree_cap, delay;
+    std::vector<char> visited;
+
+    // 以 driver 为根：一次 DFS 得到先序，逆先序（后序）累加子树电容，先序累加延迟
+    void run(int n, int m, const int* edge_u, const int* edge_v, const double* edge_r,
+             const double* cap, int driver);
+};
+
 class RCTree {
 public:
     RCTree(double r_unit = 1.0, double c_unit = 1.0);
+    // 清空内容以便下一个 net 复用，保留已分配的缓冲区
+    void clear();
     void set_name(const std::string& name);
-    void add_edge(const std::string& node1, const std::string& node2, double res);
-    void set_node_cap(const std::string& node, double cap);
+    void add_edge(std::string_view node1, std::string_view node2, double res);
+    void set_node_cap(std::string_view node, double cap);
+    // 在已有电容上累加（耦合电容接地用）
+    void add_node_cap(std::string_view node, double cap);
+    // 登记一个节点（例如 *CONN 中的引脚），返回其编号
+    int add_node(std::string_view node) { return intern(node); }
+    // 节点名 -> 整数编号，不存在时返回 -1
+    int find_node(std::string_view node) const;
+    int num_nodes() const { return static_cast<int>(cap.size()); }
     std::unordered_map<std::string, double> compute_delays_to_loads(const std::string& driver,
-        const std::vector<std::string>& loads, bool apply_ln2 = false) const;
+        const std::vector<std::string>& loads, bool apply_ln2 = false);
+    // 整数接口：结果写入 out[n_loads]，不连通或不存在的 load 写 -1.0
+    void compute_delays(int driver, const int* loads, int n_loads, double* out, bool apply_ln2 = false);
     std::string name;
 private:
 
     double r_unit;
     double c_unit;
 
-    std::unordered_map<std::string, std::vector<std::string>> graph;
-    std::unordered_map<std::string, double> node_self_cap;
-    std::unordered_map<std::string, double> resistance; // key: node1 + "," + node2
+    std::unordered_map<std::string, int> node_ids;  // 每个 net 内的节点编号
+    std::vector<double> cap;
+    std::vector<int> edge_u, edge_v;
+    std::vector<double> edge_r;
+    ElmoreWorkspace ws;
+    mutable std::string key_buf;  // 查表用的复用字符串，避免每次查找构造新 string
 
-    std::string edge_key(const std::string& u, const std::string& v) const;
+    int intern(std::string_view node);
 };
 
+// 基于扁平数组的 Elmore 计算，节点已整数化为 [0, n)：
+//   edge_u/edge_v/edge_r 为 m 条边，cap 为 n 个节点电容，
+//   结果写入 out[n_loads]，与 driver 不连通的 load 写 -1.0
+void elmore_delays_flat(int n, int m,
+    const int* edge_u, const int* edge_v, const double* edge_r,
+    const double* cap, int driver, const int* loads, int n_loads,
+    double* out, bool apply_ln2 = false);
+
 #endif // RCTREE_HPP
@@ -3,6 +3,7 @@
 #include <sstream>
 #include <regex>
 #include <iostream>
+#include <cstring>
 
 std::unordered_map<std::string, Parser::NetIO> Parser::parse_netlist_info(const std::string& filepath) {
     std::unordered_map<std::string, NetIO> net_to_io;
@@ -97,6 +98,42 @@ std::unordered_map<std::string, std::string> Parser::parse_name_map(const std::s
     return name_map;
 }
 
+size_t Parser::parse_name_map_buffer(const char* data, size_t size,
+                                     std::unordered_map<std::string, std::string>& name_map) {
+    bool in_name_map = false;
+    size_t pos = 0;
+
+    while (pos < size) {
+        size_t line_start = pos;
+        const char* nl = static_cast<const char*>(std::memchr(data + pos, '\n', size - pos));
+        size_t line_end = nl ? static_cast<size_t>(nl - data) : size;
+        pos = nl ? line_end + 1 : size;
+
+        size_t i = line_start;
+        while (i < line_end && (data[i] == ' ' || data[i] == '\t')) ++i; // trim left
+
+        if (!in_name_map) {
+            if (line_end - i >= 9 && std::memcmp(data + i, "*NAME_MAP", 9) == 0) in_name_map = true;
+            else if (line_end - i >= 6 && std::memcmp(data + i, "*D_NET", 6) == 0) return line_start;
+            continue;
+        }
+
+        // 期望格式: *数字 空白 名字
+        if (i >= line_end || data[i] != '*') return line_start;
+        size_t id_begin = ++i;
+        while (i < line_end && data[i] >= '0' && data[i] <= '9') ++i;
+        size_t id_end = i;
+        while (i < line_end && (data[i] == ' ' || data[i] == '\t')) ++i;
+        size_t name_begin = i;
+        while (i < line_end && data[i] != ' ' && data[i] != '\t' && data[i] != '\r') ++i;
+        if (id_end == id_begin || name_begin == id_end || i == name_begin) return line_start;
+
+        name_map.emplace(std::string(data + id_begin, id_end - id_begin),
+                         std::string(data + name_begin, i - name_begin));
+    }
+    return size;
+}
+
 std::vector<std::string> Parser::split(const std::string& str, char delimiter) {
     std::vector<std::string> tokens;
     std::stringstream ss(str);
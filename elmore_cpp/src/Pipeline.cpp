@@ -0,0 +1,462 @@
+#include "Pipeline.hpp"
+#include <iostream>
+#include <fstream>
+#include <string>
+#include <unordered_map>
+#include <vector>
+#include <filesystem>
+#include <iomanip>
+#include <algorithm>
+#include <atomic>
+#include <charconv>
+#include <condition_variable>
+#include <cstdio>
+#include <cstring>
+#include <mutex>
+#include <string_view>
+#include <thread>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include "Parser.hpp"
+#include "RCTree.hpp"
+
+namespace fs = std::filesystem;
+
+namespace {
+
+// 一个 net 的耦合电容（*CAP 中 4 个字段的行）。整个 net 读完后才能知道哪一端属于本 net，
+// 先暂存，到 *END 时再接地到属于本 net 的那一端（与 spefReader.net_caps 相同）
+struct Couplings {
+    std::vector<std::string> node_a, node_b;
+    std::vector<double> cap;
+    std::vector<char> keep_a;
+
+    void clear() {
+        node_a.clear();
+        node_b.clear();
+        cap.clear();
+    }
+
+    void add(std::string_view a, std::string_view b, double value) {
+        node_a.emplace_back(a);
+        node_b.emplace_back(b);
+        cap.push_back(value);
+    }
+
+    // 成员关系以接地前的节点集合为准：两端都不在本 net 时取第一个节点
+    void ground(RCTree& rctree) {
+        keep_a.resize(cap.size());
+        for (size_t k = 0; k < cap.size(); ++k)
+            keep_a[k] = rctree.find_node(node_a[k]) >= 0 || rctree.find_node(node_b[k]) < 0;
+        for (size_t k = 0; k < cap.size(); ++k)
+            rctree.add_node_cap(keep_a[k] ? node_a[k] : node_b[k], cap[k]);
+    }
+};
+
+}  // namespace
+
+void compute_and_save_delays(
+    const std::string& spef_path,
+    const std::string& netlist_path,
+    const std::string& output_dir
+) {
+    auto net_info = Parser::parse_netlist_info(netlist_path);
+    auto name_map = Parser::parse_name_map(spef_path);
+    std::ifstream spef_file(spef_path);
+    std::string line;
+
+    if (!spef_file.is_open()) {
+        std::cerr << "Failed to open SPEF file: " << spef_path << std::endl;
+        return;
+    }
+
+    int dnet_count = 0;
+    std::unordered_map<std::string, std::string> raw_to_real_name;
+    RCTree rctree;
+    // 跨 net 复用的缓冲区
+    std::vector<int> load_ids;
+    std::vector<const std::string*> load_names;
+    std::vector<double> delays;
+    Couplings couplings;
+    bool in_dnet = false, in_conn = false, in_cap = false, in_res = false;
+
+    if (!fs::exists(output_dir)) {
+        fs::create_directories(output_dir);
+    }
+
+    std::string base_filename = fs::path(spef_path).stem().string();
+    std::string output_file = (fs::path(output_dir) / (base_filename + ".txt")).string();
+    std::ofstream output_txt(output_file);
+
+    while (std::getline(spef_file, line)) {
+        line.erase(0, line.find_first_not_of(" \t"));
+        if (line.rfind("*D_NET", 0) == 0 && !in_dnet) {
+            dnet_count++;
+            in_dnet = true;
+            raw_to_real_name.clear();
+            rctree.clear();  // 清空内容，复用已分配的缓冲区
+            couplings.clear();
+            auto parts = Parser::split(line, ' ');
+            std::string net_id = parts[1];
+            if (net_id[0] == '*') net_id = net_id.substr(1);
+            std::string net_name = name_map.count(net_id) ? name_map[net_id] : net_id;
+            rctree.set_name(net_name);
+            continue;
+        }
+
+        if (in_dnet && line.rfind("*END", 0) == 0) {
+            in_dnet = false;
+            couplings.ground(rctree);
+
+            if (net_info.count(rctree.name)) {
+                const auto& info = net_info[rctree.name];
+                std::unordered_map<std::string, std::string> reverse_map;
+                for (const auto& [k, v] : raw_to_real_name) reverse_map[v] = k;
+
+                for (const auto& input_name : info.inputs) {
+                    auto it = reverse_map.find(input_name);
+                    if (it == reverse_map.end()) {
+                        std::cerr << "⚠️ 未找到输入节点 " << input_name << " 的编号\n";
+                        continue;
+                    }
+                    std::string input_node = it->second;
+
+                    load_ids.clear();
+                    load_names.clear();
+                    for (const auto& output_name : info.output) {
+                        auto oit = reverse_map.find(output_name);
+                        if (oit != reverse_map.end()) {
+                            load_ids.push_back(rctree.find_node(oit->second));
+                            load_names.push_back(&output_name);
+                        } else {
+                            std::cerr << "⚠️ 未找到输出节点 " << output_name << " 的编号\n";
+                        }
+                    }
+
+                    if (!load_ids.empty()) {
+                        delays.resize(load_ids.size());
+                        rctree.compute_delays(rctree.find_node(input_node), load_ids.data(),
+                                              static_cast<int>(load_ids.size()), delays.data());
+                        for (size_t i = 0; i < load_ids.size(); ++i) {
+                            output_txt << *load_names[i] << " " << input_name << " "
+                                       << std::fixed << std::setprecision(6)
+                                       << delays[i] << "\n";
+                        }
+                    }
+                }
+            } else {
+                std::cerr << "⚠️ net_info 中未找到 RC 树名称 " << rctree.name << "\n";
+            }
+            continue;
+        }
+
+        if (in_dnet) {
+            if (line.rfind("*CONN", 0) == 0) { in_conn = true; in_cap = false; in_res = false; continue; }
+            if (line.rfind("*CAP", 0) == 0)  { in_conn = false; in_cap = true; in_res = false; continue; }
+            if (line.rfind("*RES", 0) == 0)  { in_conn = false; in_cap = false; in_res = true; continue; }
+
+            if (in_conn && line.rfind("*I", 0) == 0) {
+                auto parts = Parser::split(line, ' ');
+                if (parts.size() >= 3) {
+                    std::string raw_node = parts[1];
+                    if (raw_node[0] == '*') raw_node = raw_node.substr(1);
+                    rctree.add_node(raw_node);
+                    auto pos = raw_node.find(':');
+                    if (pos != std::string::npos) {
+                        std::string name_id = raw_node.substr(0, pos);
+                        std::string port = raw_node.substr(pos + 1);
+                        if (name_map.count(name_id)) {
+                            raw_to_real_name[raw_node] = name_map[name_id] + "/" + port;
+                        }
+                    }
+                }
+            } else if (in_cap) {
+                auto parts = Parser::split(line, ' ');
+                if (parts.size() >= 4) {
+                    std::string node1 = parts[1];
+                    std::string node2 = parts[2];
+                    if (node1[0] == '*') node1 = node1.substr(1);
+                    if (node2[0] == '*') node2 = node2.substr(1);
+                    couplings.add(node1, node2, std::stod(parts[3]));
+                } else if (parts.size() >= 3) {
+                    std::string node = parts[1];
+                    if (node[0] == '*') node = node.substr(1);
+                    rctree.set_node_cap(node, std::stod(parts[2]));
+                }
+            } else if (in_res) {
+                auto parts = Parser::split(line, ' ');
+                if (parts.size() >= 4) {
+                    std::string node1 = parts[1];
+                    std::string node2 = parts[2];
+                    if (node1[0] == '*') node1 = node1.substr(1);
+                    if (node2[0] == '*') node2 = node2.substr(1);
+                    rctree.add_edge(node1, node2, std::stod(parts[3]));
+                }
+            }
+        }
+    }
+
+    std::cout << "D_NET总数: " << dnet_count << "\n";
+    
+    std::cout << "✅ 时延计算结果已保存到 " << output_file << "\n";
+}
+
+namespace {
+
+using NameMap = std::unordered_map<std::string, std::string>;
+using NetInfo = std::unordered_map<std::string, Parser::NetIO>;
+
+// 只读内存映射的 SPEF 文件
+struct MappedFile {
+    const char* data = nullptr;
+    size_t size = 0;
+    int fd = -1;
+
+    explicit MappedFile(const std::string& path) {
+        fd = ::open(path.c_str(), O_RDONLY);
+        if (fd < 0) return;
+        struct stat st {};
+        if (::fstat(fd, &st) == 0 && st.st_size > 0) {
+            void* p = ::mmap(nullptr, static_cast<size_t>(st.st_size), PROT_READ, MAP_PRIVATE, fd, 0);
+            if (p != MAP_FAILED) {
+                data = static_cast<const char*>(p);
+                size = static_cast<size_t>(st.st_size);
+                ::madvise(p, size, MADV_SEQUENTIAL);
+            }
+        }
+    }
+    ~MappedFile() {
+        if (data) ::munmap(const_cast<char*>(data), size);
+        if (fd >= 0) ::close(fd);
+    }
+    bool ok() const { return fd >= 0 && (data != nullptr || size == 0); }
+};
+
+bool starts_with(std::string_view s, const char* prefix) {
+    size_t n = std::strlen(prefix);
+    return s.size() >= n && std::memcmp(s.data(), prefix, n) == 0;
+}
+
+// 按空白切分一行，最多取 max 个字段，返回字段数
+int split_ws(std::string_view line, std::string_view* out, int max) {
+    int n = 0;
+    size_t i = 0;
+    while (i < line.size() && n < max) {
+        while (i < line.size() && (line[i] == ' ' || line[i] == '\t' || line[i] == '\r')) ++i;
+        size_t start = i;
+        while (i < line.size() && line[i] != ' ' && line[i] != '\t' && line[i] != '\r') ++i;
+        if (i > start) out[n++] = line.substr(start, i - start);
+    }
+    return n;
+}
+
+std::string_view strip_star(std::string_view s) {
+    return (!s.empty() && s[0] == '*') ? s.substr(1) : s;
+}
+
+double to_double(std::string_view s) {
+    double value = 0.0;
+    std::from_chars(s.data(), s.data() + s.size(), value);
+    return value;
+}
+
+// 每个工作线程私有、跨 net 复用的状态
+struct WorkerState {
+    RCTree rctree;
+    std::unordered_map<std::string, std::string> reverse_map;  // 实例名/端口 -> 原始节点
+    std::vector<int> load_ids;
+    std::vector<const std::string*> load_names;
+    std::vector<double> delays;
+    Couplings couplings;
+    char number[64];
+};
+
+// 处理一个 *D_NET 文本段，结果追加到 out，警告追加到 err
+void process_dnet(std::string_view text, const NameMap& name_map, const NetInfo& net_info,
+                  WorkerState& st, std::string& out, std::string& err) {
+    RCTree& rctree = st.rctree;
+    rctree.clear();
+    st.reverse_map.clear();
+    st.couplings.clear();
+    bool in_conn = false, in_cap = false, in_res = false;
+    std::string_view parts[4];
+
+    size_t pos = 0;
+    while (pos < text.size()) {
+        size_t nl = text.find('\n', pos);
+        if (nl == std::string_view::npos) nl = text.size();
+        std::string_view line = text.substr(pos, nl - pos);
+        pos = nl + 1;
+        size_t first = line.find_first_not_of(" \t");
+        if (first == std::string_view::npos) continue;
+        line.remove_prefix(first);
+
+        if (starts_with(line, "*D_NET")) {
+            if (split_ws(line, parts, 2) < 2) continue;
+            std::string net_id(strip_star(parts[1]));
+            auto it = name_map.find(net_id);
+            rctree.set_name(it != name_map.end() ? it->second : net_id);
+            continue;
+        }
+        if (starts_with(line, "*END")) break;
+        if (starts_with(line, "*CONN")) { in_conn = true; in_cap = false; in_res = false; continue; }
+        if (starts_with(line, "*CAP"))  { in_conn = false; in_cap = true; in_res = false; continue; }
+        if (starts_with(line, "*RES"))  { in_conn = false; in_cap = false; in_res = true; continue; }
+
+        if (in_conn && starts_with(line, "*I")) {
+            if (split_ws(line, parts, 3) >= 3) {
+                std::string_view raw_node = strip_star(parts[1]);
+                rctree.add_node(raw_node);
+                size_t colon = raw_node.find(':');
+                if (colon != std::string_view::npos) {
+                    auto it = name_map.find(std::string(raw_node.substr(0, colon)));
+                    if (it != name_map.end()) {
+                        std::string real_name = it->second;
+                        real_name += '/';
+                        real_name.append(raw_node.substr(colon + 1));
+                        st.reverse_map[std::move(real_name)] = std::string(raw_node);
+                    }
+                }
+            }
+        } else if (in_cap) {
+            int count = split_ws(line, parts, 4);
+            if (count >= 4)
+                st.couplings.add(strip_star(parts[1]), strip_star(parts[2]), to_double(parts[3]));
+            else if (count >= 3)
+                rctree.set_node_cap(strip_star(parts[1]), to_double(parts[2]));
+        } else if (in_res) {
+            if (split_ws(line, parts, 4) >= 4)
+                rctree.add_edge(strip_star(parts[1]), strip_star(parts[2]), to_double(parts[3]));
+        }
+    }
+    st.couplings.ground(rctree);
+
+    auto info_it = net_info.find(rctree.name);
+    if (info_it == net_info.end()) {
+        err += "⚠️ net_info 中未找到 RC 树名称 " + rctree.name + "\n";
+        return;
+    }
+    const auto& info = info_it->second;
+    for (const auto& input_name : info.inputs) {
+        auto it = st.reverse_map.find(input_name);
+        if (it == st.reverse_map.end()) {
+            err += "⚠️ 未找到输入节点 " + input_name + " 的编号\n";
+            continue;
+        }
+        int driver = rctree.find_node(it->second);
+
+        st.load_ids.clear();
+        st.load_names.clear();
+        for (const auto& output_name : info.output) {
+            auto oit = st.reverse_map.find(output_name);
+            if (oit != st.reverse_map.end()) {
+                st.load_ids.push_back(rctree.find_node(oit->second));
+                st.load_names.push_back(&output_name);
+            } else {
+                err += "⚠️ 未找到输出节点 " + output_name + " 的编号\n";
+            }
+        }
+        if (st.load_ids.empty()) continue;
+
+        st.delays.resize(st.load_ids.size());
+        rctree.compute_delays(driver, st.load_ids.data(), static_cast<int>(st.load_ids.size()),
+                              st.delays.data());
+        for (size_t i = 0; i < st.load_ids.size(); ++i) {
+            int len = std::snprintf(st.number, sizeof(st.number), "%.6f", st.delays[i]);
+            out += *st.load_names[i];
+            out += ' ';
+            out += input_name;
+            out += ' ';
+            out.append(st.number, len);
+            out += '\n';
+        }
+    }
+}
+
+}  // namespace
+
+void compute_and_save_delays_mt(
+    const std::string& spef_path,
+    const std::string& netlist_path,
+    const std::string& output_dir,
+    int threads
+) {
+    auto net_info = Parser::parse_netlist_info(netlist_path);
+    MappedFile spef(spef_path);
+    if (!spef.ok()) {
+        std::cerr << "Failed to open SPEF file: " << spef_path << std::endl;
+        return;
+    }
+
+    NameMap name_map;
+    size_t body = Parser::parse_name_map_buffer(spef.data, spef.size, name_map);
+    std::string_view text(spef.data, spef.size);
+
+    // 找出所有 *D_NET 行的行首（行首可以有缩进，与单线程模式和 Python 的切分相同）
+    std::vector<size_t> starts;
+    for (size_t pos = text.find("*D_NET", body); pos != std::string_view::npos;
+         pos = text.find("*D_NET", pos + 1)) {
+        size_t line = text.rfind('\n', pos);
+        line = (line == std::string_view::npos) ? 0 : line + 1;
+        if (text.find_first_not_of(" \t", line) == pos) starts.push_back(line);
+    }
+    starts.push_back(text.size());
+    size_t dnet_count = starts.size() - 1;
+
+    if (!fs::exists(output_dir)) {
+        fs::create_directories(output_dir);
+    }
+    std::string base_filename = fs::path(spef_path).stem().string();
+    std::string output_file = (fs::path(output_dir) / (base_filename + ".txt")).string();
+    std::ofstream output_txt(output_file, std::ios::binary);
+
+    // 每块若干个 net，工作线程按块号原子地领取，主线程按块号顺序写出
+    const size_t nets_per_chunk = 256;
+    size_t n_chunks = (dnet_count + nets_per_chunk - 1) / nets_per_chunk;
+    std::vector<std::string> outputs(n_chunks), errors(n_chunks);
+    std::vector<char> done(n_chunks, 0);
+    std::mutex mutex;
+    std::condition_variable cv;
+    std::atomic<size_t> next_chunk{0};
+
+    auto worker = [&]() {
+        WorkerState st;
+        for (size_t c = next_chunk++; c < n_chunks; c = next_chunk++) {
+            std::string out, err;
+            size_t first = c * nets_per_chunk;
+            size_t last = std::min(dnet_count, first + nets_per_chunk);
+            for (size_t k = first; k < last; ++k)
+                process_dnet(text.substr(starts[k], starts[k + 1] - starts[k]), name_map, net_info, st, out, err);
+            {
+                std::lock_guard<std::mutex> lock(mutex);
+                outputs[c] = std::move(out);
+                errors[c] = std::move(err);
+                done[c] = 1;
+            }
+            cv.notify_all();
+        }
+    };
+
+    threads = std::max(1, threads);
+    std::vector<std::thread> pool;
+    for (int t = 0; t < threads; ++t) pool.emplace_back(worker);
+
+    for (size_t c = 0; c < n_chunks; ++c) {
+        std::string out, err;
+        {
+            std::unique_lock<std::mutex> lock(mutex);
+            cv.wait(lock, [&] { return done[c] != 0; });
+            out.swap(outputs[c]);
+            err.swap(errors[c]);
+        }
+        output_txt.write(out.data(), static_cast<std::streamsize>(out.size()));
+        std::cerr << err;
+    }
+    for (auto& t : pool) t.join();
+
+    std::cout << "D_NET总数: " << dnet_count << "\n";
+
+    std::cout << "✅ 时延计算结果已保存到 " << output_file << "\n";
+}
@@ -1,88 +1,137 @@
 #include "RCTree.hpp"
-#include <stack>
 #include <algorithm>
 
+void ElmoreWorkspace::run(int n, int m, const int* edge_u, const int* edge_v, const double* edge_r,
+                          const double* cap, int driver) {
+    // 按度数计数建立 CSR 邻接表
+    offsets.assign(n + 1, 0);
+    for (int e = 0; e < m; ++e) {
+        offsets[edge_u[e] + 1]++;
+        offsets[edge_v[e] + 1]++;
+    }
+    for (int i = 0; i < n; ++i) offsets[i + 1] += offsets[i];
+    fill.assign(offsets.begin(), offsets.end() - 1);
+    adj.resize(2 * m);
+    adj_edge.resize(2 * m);
+    for (int e = 0; e < m; ++e) {
+        adj[fill[edge_u[e]]] = edge_v[e]; adj_edge[fill[edge_u[e]]++] = e;
+        adj[fill[edge_v[e]]] = edge_u[e]; adj_edge[fill[edge_v[e]]++] = e;
+    }
+
+    // DFS 得到先序和 parent
+    parent.assign(n, -1);
+    parent_r.assign(n, 0.0);
+    visited.assign(n, 0);
+    order.clear();
+    stack.clear();
+    if (driver >= 0 && driver < n) stack.push_back(driver);
+    while (!stack.empty()) {
+        int node = stack.back();
+        stack.pop_back();
+        if (visited[node]) continue;
+        visited[node] = 1;
+        order.push_back(node);
+        for (int k = offsets[node]; k < offsets[node + 1]; ++k) {
+            int nb = adj[k];
+            if (!visited[nb]) {
+                parent[nb] = node;
+                parent_r[nb] = edge_r[adj_edge[k]];
+                stack.push_back(nb);
+            }
+        }
+    }
+
+    // 后序（逆先序）累加子树电容
+    subtree_cap.assign(cap, cap + n);
+    for (auto it = order.rbegin(); it != order.rend(); ++it) {
+        if (parent[*it] >= 0) subtree_cap[parent[*it]] += subtree_cap[*it];
+    }
+
+    // 先序累加 Elmore 延迟
+    delay.assign(n, 0.0);
+    for (int node : order) {
+        if (parent[node] >= 0)
+            delay[node] = delay[parent[node]] + parent_r[node] * subtree_cap[node];
+    }
+}
+
 RCTree::RCTree(double r_unit, double c_unit) : r_unit(r_unit), c_unit(c_unit) {}
 
+void RCTree::clear() {
+    name.clear();
+    node_ids.clear();
+    cap.clear();
+    edge_u.clear();
+    edge_v.clear();
+    edge_r.clear();
+}
+
 void RCTree::set_name(const std::string& name) {
     this->name = name;
 }
 
-void RCTree::add_edge(const std::string& node1, const std::string& node2, double res) {
-    res *= r_unit;
-    graph[node1].push_back(node2);
-    graph[node2].push_back(node1);
-    resistance[edge_key(node1, node2)] = res;
-    resistance[edge_key(node2, node1)] = res;
+int RCTree::intern(std::string_view node) {
+    key_buf.assign(node.data(), node.size());
+    auto [it, inserted] = node_ids.try_emplace(key_buf, static_cast<int>(cap.size()));
+    if (inserted) cap.push_back(0.0);
+    return it->second;
 }
 
-void RCTree::set_node_cap(const std::string& node, double cap) {
-    node_self_cap[node] = cap * c_unit;
+int RCTree::find_node(std::string_view node) const {
+    key_buf.assign(node.data(), node.size());
+    auto it = node_ids.find(key_buf);
+    return it == node_ids.end() ? -1 : it->second;
 }
 
-std::unordered_map<std::string, double> RCTree::compute_delays_to_loads(
-    const std::string& driver,
-    const std::vector<std::string>& loads,
-    bool apply_ln2) const {
+void RCTree::add_edge(std::string_view node1, std::string_view node2, double res) {
+    edge_u.push_back(intern(node1));
+    edge_v.push_back(intern(node2));
+    edge_r.push_back(res * r_unit);
+}
 
-    std::unordered_map<std::string, double> subtree_cap;
-    std::unordered_map<std::string, std::string> parent;
-    std::unordered_map<std::string, std::vector<std::string>> path_to;
-    std::unordered_set<std::string> visited;
-    std::vector<std::string> postorder;
+void RCTree::set_node_cap(std::string_view node, double cap) {
+    this->cap[intern(node)] = cap * c_unit;
+}
 
-    std::stack<std::pair<std::string, std::string>> stack;
-    stack.push({driver, ""});
+void RCTree::add_node_cap(std::string_view node, double cap) {
+    this->cap[intern(node)] += cap * c_unit;
+}
 
-    while (!stack.empty()) {
-        auto [node, par] = stack.top();
-        stack.pop();
-        if (visited.count(node)) continue;
-        visited.insert(node);
-        parent[node] = par;
-        if (par.empty()) path_to[node] = {node};
-        else {
-            path_to[node] = path_to[par];
-            path_to[node].push_back(node);
-        }
-        postorder.push_back(node);
-        for (const auto& neighbor : graph.at(node)) {
-            if (neighbor != par)
-                stack.push({neighbor, node});
-        }
+void RCTree::compute_delays(int driver, const int* loads, int n_loads, double* out, bool apply_ln2) {
+    ws.run(num_nodes(), static_cast<int>(edge_r.size()), edge_u.data(), edge_v.data(), edge_r.data(),
+           cap.data(), driver);
+    double scale = apply_ln2 ? 1e-6 * std::log(2.0) : 1e-6;
+    for (int i = 0; i < n_loads; ++i) {
+        int load = loads[i];
+        out[i] = (load >= 0 && load < num_nodes() && ws.visited[load]) ? ws.delay[load] * scale : -1.0;
     }
+}
 
-    for (auto it = postorder.rbegin(); it != postorder.rend(); ++it) {
-        const auto& node = *it;
-        double cap = node_self_cap.count(node) ? node_self_cap.at(node) : 0.0;
-        for (const auto& neighbor : graph.at(node)) {
-            if (parent.count(neighbor) && parent.at(neighbor) == node) {
-                cap += subtree_cap[neighbor];
-            }
-        }
-        subtree_cap[node] = cap;
-    }
+std::unordered_map<std::string, double> RCTree::compute_delays_to_loads(
+    const std::string& driver,
+    const std::vector<std::string>& loads,
+    bool apply_ln2) {
+
+    std::vector<int> load_ids(loads.size());
+    std::vector<double> out(loads.size());
+    for (size_t i = 0; i < loads.size(); ++i) load_ids[i] = find_node(loads[i]);
+    compute_delays(find_node(driver), load_ids.data(), static_cast<int>(loads.size()), out.data(), apply_ln2);
 
     std::unordered_map<std::string, double> delays;
-    for (const auto& load : loads) {
-        if (!path_to.count(load)) {
-            delays[load] = -1.0;
-            continue;
-        }
-        const auto& path = path_to[load];
-        double delay = 0.0;
-        for (size_t i = 0; i + 1 < path.size(); ++i) {
-            std::string u = path[i], v = path[i + 1];
-            double r = resistance.count(edge_key(u, v)) ? resistance.at(edge_key(u, v)) : 0.0;
-            delay += r * subtree_cap.at(v);
-        }
-        if (apply_ln2)
-            delay *= std::log(2.0);
-        delays[load] = delay * 1e-6;
-    }
+    for (size_t i = 0; i < loads.size(); ++i) delays[loads[i]] = out[i];
     return delays;
 }
 
-std::string RCTree::edge_key(const std::string& u, const std::string& v) const {
-    return u + "," + v;
+void elmore_delays_flat(int n, int m,
+    const int* edge_u, const int* edge_v, const double* edge_r,
+    const double* cap, int driver, const int* loads, int n_loads,
+    double* out, bool apply_ln2) {
+
+    thread_local ElmoreWorkspace ws;  // 每个线程一份，跨调用复用
+    ws.run(n, m, edge_u, edge_v, edge_r, cap, driver);
+    double scale = apply_ln2 ? 1e-6 * std::log(2.0) : 1e-6;
+    for (int i = 0; i < n_loads; ++i) {
+        int load = loads[i];
+        out[i] = (load >= 0 && load < n && ws.visited[load]) ? ws.delay[load] * scale : -1.0;
+    }
 }
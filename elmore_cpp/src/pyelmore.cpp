@@ -0,0 +1,278 @@
+// Python 扩展模块 _elmore_cpp：让 elmore_py 直接调用 C++ 引擎
+//   process_file(spef, netlist, output_dir, threads=-1)   整个文件的 C++ 流程（threads>=0 时多线程）
+//   net_delays(edge_u, edge_v, edge_r, cap, driver, loads, out, apply_ln2=False)
+//       单个 net 的时延，所有参数都是 buffer（如 NumPy 数组），直接读写不拷贝
+//   parse_net_sections(cap_text, res_text, pins, coupling_factor=1.0)
+//       一个 D_NET 的 *CAP/*RES 段文本 -> (nodes, pins, cap, edge_u, edge_v, edge_r)，
+//       节点名在 C++ 中整数化，数值列直接 strtod，数组以 bytearray 返回（int64 / float64）
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <cstdlib>
+#include <cstring>
+#include <string>
+#include <string_view>
+#include <thread>
+#include <unordered_map>
+#include <vector>
+#include "Pipeline.hpp"
+#include "RCTree.hpp"
+
+namespace {
+
+// 自动释放的 Py_buffer
+struct Buffer {
+    Py_buffer view{};
+    bool held = false;
+    ~Buffer() { if (held) PyBuffer_Release(&view); }
+};
+
+// 取得连续 buffer 并检查元素类型：kind 为 'i'（4 字节整数）或 'd'（8 字节浮点）
+bool get_buffer(PyObject* obj, Buffer& buf, char kind, bool writable, const char* name) {
+    int flags = PyBUF_C_CONTIGUOUS | PyBUF_FORMAT | (writable ? PyBUF_WRITABLE : 0);
+    if (PyObject_GetBuffer(obj, &buf.view, flags) < 0) return false;
+    buf.held = true;
+
+    const char* fmt = buf.view.format ? buf.view.format : "B";
+    char code = fmt[std::strlen(fmt) - 1];
+    bool ok = (kind == 'i')
+        ? (buf.view.itemsize == 4 && std::strchr("ilIL", code) != nullptr)
+        : (buf.view.itemsize == 8 && code == 'd');
+    if (!ok) {
+        PyErr_Format(PyExc_TypeError, "%s must be a contiguous %s buffer", name,
+                     kind == 'i' ? "int32" : "float64");
+        return false;
+    }
+    return true;
+}
+
+Py_ssize_t length(const Buffer& buf) { return buf.view.len / buf.view.itemsize; }
+
+PyObject* py_process_file(PyObject*, PyObject* args) {
+    const char* spef_path;
+    const char* netlist_path;
+    const char* output_dir;
+    int threads = -1;  // <0: 逐行读取的单线程流程；>=0: mmap + 多线程（0 为全部核心）
+    if (!PyArg_ParseTuple(args, "sss|i", &spef_path, &netlist_path, &output_dir, &threads)) return nullptr;
+
+    std::string spef(spef_path), netlist(netlist_path), output(output_dir);
+    Py_BEGIN_ALLOW_THREADS
+    if (threads < 0) {
+        compute_and_save_delays(spef, netlist, output);
+    } else {
+        if (threads == 0) threads = static_cast<int>(std::thread::hardware_concurrency());
+        compute_and_save_delays_mt(spef, netlist, output, threads);
+    }
+    Py_END_ALLOW_THREADS
+    Py_RETURN_NONE;
+}
+
+PyObject* py_net_delays(PyObject*, PyObject* args, PyObject* kwargs) {
+    static const char* kwlist[] = {"edge_u", "edge_v", "edge_r", "cap", "driver", "loads", "out",
+                                   "apply_ln2", nullptr};
+    PyObject *u_obj, *v_obj, *r_obj, *cap_obj, *loads_obj, *out_obj;
+    int driver;
+    int apply_ln2 = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOOiOO|p", const_cast<char**>(kwlist),
+                                     &u_obj, &v_obj, &r_obj, &cap_obj, &driver, &loads_obj,
+                                     &out_obj, &apply_ln2))
+        return nullptr;
+
+    Buffer u, v, r, cap, loads, out;
+    if (!get_buffer(u_obj, u, 'i', false, "edge_u") || !get_buffer(v_obj, v, 'i', false, "edge_v") ||
+        !get_buffer(r_obj, r, 'd', false, "edge_r") || !get_buffer(cap_obj, cap, 'd', false, "cap") ||
+        !get_buffer(loads_obj, loads, 'i', false, "loads") || !get_buffer(out_obj, out, 'd', true, "out"))
+        return nullptr;
+
+    Py_ssize_t m = length(u), n = length(cap), n_loads = length(loads);
+    if (length(v) != m || length(r) != m) {
+        PyErr_SetString(PyExc_ValueError, "edge_u, edge_v and edge_r must have the same length");
+        return nullptr;
+    }
+    if (length(out) < n_loads) {
+        PyErr_SetString(PyExc_ValueError, "out is shorter than loads");
+        return nullptr;
+    }
+    const int* eu = static_cast<const int*>(u.view.buf);
+    const int* ev = static_cast<const int*>(v.view.buf);
+    for (Py_ssize_t e = 0; e < m; ++e) {
+        if (eu[e] < 0 || eu[e] >= n || ev[e] < 0 || ev[e] >= n) {
+            PyErr_SetString(PyExc_IndexError, "edge endpoint out of range");
+            return nullptr;
+        }
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    elmore_delays_flat(static_cast<int>(n), static_cast<int>(m), eu, ev,
+                       static_cast<const double*>(r.view.buf), static_cast<const double*>(cap.view.buf),
+                       driver, static_cast<const int*>(loads.view.buf), static_cast<int>(n_loads),
+                       static_cast<double*>(out.view.buf), apply_ln2 != 0);
+    Py_END_ALLOW_THREADS
+
+    Py_INCREF(out_obj);
+    return out_obj;
+}
+
+// 一行中的前 4 个 token（已去掉 '*'）与 token 总数；去掉 '*' 后为空的 token 不计
+struct Row {
+    std::string tok[4];
+    int count = 0;
+};
+
+bool is_space(char c) { return c == ' ' || c == '\t' || c == '\r' || c == '\v' || c == '\f'; }
+
+template <typename F>
+void for_each_row(std::string_view text, F&& on_row) {
+    Row row;
+    size_t pos = 0;
+    while (pos <= text.size()) {
+        size_t end = text.find('\n', pos);
+        if (end == std::string_view::npos) end = text.size();
+        row.count = 0;
+        size_t i = pos;
+        while (i < end) {
+            while (i < end && is_space(text[i])) ++i;
+            size_t start = i;
+            while (i < end && !is_space(text[i])) ++i;
+            if (start == i) break;
+            std::string token;
+            for (size_t k = start; k < i; ++k)
+                if (text[k] != '*') token.push_back(text[k]);
+            if (token.empty()) continue;
+            if (row.count < 4) row.tok[row.count] = std::move(token);
+            ++row.count;
+        }
+        on_row(row);
+        pos = end + 1;
+    }
+}
+
+// 与 Python 的 float() 一样要求整个 token 都是数值
+bool to_double(const std::string& token, double& value) {
+    char* end = nullptr;
+    value = std::strtod(token.c_str(), &end);
+    if (end != token.c_str() + token.size() || token.empty()) {
+        PyErr_Format(PyExc_ValueError, "could not convert string to float: '%s'", token.c_str());
+        return false;
+    }
+    return true;
+}
+
+template <typename T>
+PyObject* to_bytearray(const std::vector<T>& values) {
+    return PyByteArray_FromStringAndSize(reinterpret_cast<const char*>(values.data()),
+                                         static_cast<Py_ssize_t>(values.size() * sizeof(T)));
+}
+
+PyObject* py_parse_net_sections(PyObject*, PyObject* args, PyObject* kwargs) {
+    static const char* kwlist[] = {"cap_text", "res_text", "pins", "coupling_factor", nullptr};
+    const char *cap_buf, *res_buf;
+    Py_ssize_t cap_len, res_len;
+    PyObject* pins_obj;
+    double coupling_factor = 1.0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "s#s#O|d", const_cast<char**>(kwlist), &cap_buf,
+                                     &cap_len, &res_buf, &res_len, &pins_obj, &coupling_factor))
+        return nullptr;
+    PyObject* pins_seq = PySequence_Fast(pins_obj, "pins must be a sequence of str");
+    if (!pins_seq) return nullptr;
+
+    // 节点按首次出现的顺序编号：*CONN 引脚、全部电阻的第一端、全部电阻的第二端、接地电容、耦合电容
+    std::unordered_map<std::string, int64_t> index;
+    std::vector<std::string> nodes;
+    auto intern = [&](const std::string& node) {
+        auto it = index.try_emplace(node, static_cast<int64_t>(nodes.size())).first;
+        if (it->second == static_cast<int64_t>(nodes.size())) nodes.push_back(node);
+        return it->second;
+    };
+
+    std::vector<int64_t> pins;
+    Py_ssize_t n_pins = PySequence_Fast_GET_SIZE(pins_seq);
+    for (Py_ssize_t i = 0; i < n_pins; ++i) {
+        Py_ssize_t size;
+        const char* name = PyUnicode_AsUTF8AndSize(PySequence_Fast_GET_ITEM(pins_seq, i), &size);
+        if (!name) {
+            Py_DECREF(pins_seq);
+            return nullptr;
+        }
+        pins.push_back(intern(std::string(name, size)));
+    }
+    Py_DECREF(pins_seq);
+
+    std::vector<std::string> res_u, res_v;
+    std::vector<double> edge_r;
+    bool ok = true;
+    for_each_row(std::string_view(res_buf, res_len), [&](Row& row) {
+        if (!ok || row.count < 4) return;
+        double value;
+        ok = to_double(row.tok[3], value);
+        res_u.push_back(std::move(row.tok[1]));
+        res_v.push_back(std::move(row.tok[2]));
+        edge_r.push_back(value);
+    });
+
+    std::vector<std::string> ground_node;
+    std::vector<double> ground_cap;
+    std::vector<std::string> cpl_a, cpl_b;
+    std::vector<double> cpl_cap;
+    for_each_row(std::string_view(cap_buf, cap_len), [&](Row& row) {
+        if (!ok || row.count < 3) return;
+        double value;
+        if (row.count == 3) {
+            ok = to_double(row.tok[2], value);
+            ground_node.push_back(std::move(row.tok[1]));
+            ground_cap.push_back(value);
+        } else {
+            ok = to_double(row.tok[3], value);
+            cpl_a.push_back(std::move(row.tok[1]));
+            cpl_b.push_back(std::move(row.tok[2]));
+            cpl_cap.push_back(value);
+        }
+    });
+    if (!ok) return nullptr;
+
+    std::vector<int64_t> edge_u(res_u.size()), edge_v(res_v.size()), ground_idx(ground_node.size());
+    for (size_t e = 0; e < res_u.size(); ++e) edge_u[e] = intern(res_u[e]);
+    for (size_t e = 0; e < res_v.size(); ++e) edge_v[e] = intern(res_v[e]);
+    for (size_t k = 0; k < ground_node.size(); ++k) ground_idx[k] = intern(ground_node[k]);
+    std::vector<int64_t> cpl_idx(cpl_a.size());
+    for (size_t k = 0; k < cpl_a.size(); ++k) {
+        // 耦合电容接地到属于本 net 的那一端（与 spefReader.net_caps 相同）
+        bool keep_a = index.count(cpl_a[k]) || !index.count(cpl_b[k]);
+        cpl_idx[k] = intern(keep_a ? cpl_a[k] : cpl_b[k]);
+    }
+
+    // 同一节点重复出现时接地电容以最后一次为准，耦合电容累加
+    std::vector<double> cap(nodes.size(), 0.0);
+    for (size_t k = 0; k < ground_idx.size(); ++k) cap[ground_idx[k]] = ground_cap[k];
+    for (size_t k = 0; k < cpl_idx.size(); ++k) cap[cpl_idx[k]] += cpl_cap[k] * coupling_factor;
+
+    PyObject* node_list = PyList_New(static_cast<Py_ssize_t>(nodes.size()));
+    if (!node_list) return nullptr;
+    for (size_t i = 0; i < nodes.size(); ++i) {
+        PyObject* name = PyUnicode_FromStringAndSize(nodes[i].data(), static_cast<Py_ssize_t>(nodes[i].size()));
+        if (!name) {
+            Py_DECREF(node_list);
+            return nullptr;
+        }
+        PyList_SET_ITEM(node_list, static_cast<Py_ssize_t>(i), name);
+    }
+    return Py_BuildValue("(NNNNNN)", node_list, to_bytearray(pins), to_bytearray(cap),
+                         to_bytearray(edge_u), to_bytearray(edge_v), to_bytearray(edge_r));
+}
+
+PyMethodDef methods[] = {
+    {"process_file", py_process_file, METH_VARARGS,
+     "process_file(spef, netlist, output_dir, threads=-1): run the whole C++ pipeline on one SPEF"},
+    {"net_delays", reinterpret_cast<PyCFunction>(reinterpret_cast<void (*)(void)>(py_net_delays)),
+     METH_VARARGS | METH_KEYWORDS,
+     "net_delays(edge_u, edge_v, edge_r, cap, driver, loads, out, apply_ln2=False) -> out"},
+    {"parse_net_sections", reinterpret_cast<PyCFunction>(reinterpret_cast<void (*)(void)>(py_parse_net_sections)),
+     METH_VARARGS | METH_KEYWORDS,
+     "parse_net_sections(cap_text, res_text, pins, coupling_factor=1.0) -> (nodes, pins, cap, edge_u, edge_v, edge_r)"},
+    {nullptr, nullptr, 0, nullptr},
+};
+
+PyModuleDef module = {PyModuleDef_HEAD_INIT, "_elmore_cpp", "Elmore delay C++ backend", -1, methods};
+
+}  // namespace
+
+PyMODINIT_FUNC PyInit__elmore_cpp(void) { return PyModule_Create(&module); }
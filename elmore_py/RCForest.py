@@ -0,0 +1,332 @@
+import math
+import numpy as np
+from spefReader import *
+from meshSolver import edges_have_loop, solve_mesh
+
+# 批量计算结果：每行一个 (net, driver, load, delay)
+# net 为全局 net 序号，driver/load 为批内全局节点编号（见 RCForest.node_names）
+DELAY_DTYPE = np.dtype([
+    ('net', np.int64),
+    ('driver', np.int64),
+    ('load', np.int64),
+    ('delay', np.float64),
+])
+
+
+class RCForest:
+    """
+    把成千上万个 net 打包成一个扁平森林：各 net 的节点按偏移拼接，
+    parent/R/C 都是整块数组，所有 driver→load 延迟用少量向量化的逐层遍历求出，
+    避免每个 net 一个 RCTree 对象和每次调用一个 dict 的开销。
+    每个 net 以第一个 driver 为根（与它不连通的 driver 另起一棵树），其余 driver 用换根公式
+    delay(d, l) = A[l] - A[w] + B[d] - B[w]（w = LCA(d, l)）得到，
+    LCA 对所有 driver×load 对用倍增法向量化求出。
+    有电阻环的 net（判定与 meshSolver.has_loop 相同）改用 meshSolver.solve_mesh 求解，
+    每个 net 的求解方式记录在 net_methods 中。
+    """
+    def __init__(self, r_unit=1.0, c_unit=1.0, first_net=0):
+        self.r_unit = r_unit
+        self.c_unit = c_unit
+        self.first_net = first_net   # 本批第一个 net 的全局序号
+        self.net_names = []
+        self.node_names = []         # 批内全局节点编号 -> 节点名
+        self.node_offsets = [0]      # 第 i 个 net 的节点为 [node_offsets[i], node_offsets[i+1])
+        self.node_net = []           # 节点 -> 批内 net 序号
+        self.cap = []
+        self.edge_u = []
+        self.edge_v = []
+        self.edge_r = []
+        self.edge_offsets = [0]      # 第 i 个 net 的电阻为 [edge_offsets[i], edge_offsets[i+1])
+        self.net_methods = None      # compute 之后为每个 net 的 'tree' / 'mesh'
+        self.pair_net = []           # driver×load 查询
+        self.pair_driver = []
+        self.pair_load = []
+
+    def __len__(self):
+        return len(self.net_names)
+
+    def add_net(self, net):
+        """加入一个 spefReader.DNet 或 spefReader.NetArrays"""
+        if isinstance(net, NetArrays):
+            self.add_net_arrays(net)
+            return
+        net_idx = len(self.net_names)
+        base = self.node_offsets[-1]
+        local = {}
+
+        def intern(node):
+            idx = local.get(node)
+            if idx is None:
+                idx = base + len(local)
+                local[node] = idx
+                self.node_names.append(node)
+                self.cap.append(0.0)
+            return idx
+
+        drivers = [intern(node) for node, direction in net.conns if direction == 'I']
+        loads = [intern(node) for node, direction in net.conns if direction == 'O']
+        for node, cap in net_caps(net):
+            self.cap[intern(node)] = cap * self.c_unit
+        for node1, node2, res in net.ress:
+            self.edge_u.append(intern(node1))
+            self.edge_v.append(intern(node2))
+            self.edge_r.append(res * self.r_unit)
+
+        for d in drivers:
+            self.pair_driver.extend([d] * len(loads))
+            self.pair_load.extend(loads)
+        self.pair_net.extend([net_idx] * (len(drivers) * len(loads)))
+
+        self.net_names.append(net.name)
+        self.node_offsets.append(base + len(local))
+        self.edge_offsets.append(len(self.edge_u))
+        self.node_net.extend([net_idx] * len(local))
+
+    def add_net_arrays(self, arrays):
+        """加入一个块解析得到的 NetArrays，节点编号整体加上偏移即可，不再逐节点查表"""
+        net_idx = len(self.net_names)
+        base = self.node_offsets[-1]
+        n = len(arrays.nodes)
+
+        conn_idx = (arrays.pins + base).tolist()
+        drivers = [idx for idx, (_, direction) in zip(conn_idx, arrays.conns) if direction == 'I']
+        loads = [idx for idx, (_, direction) in zip(conn_idx, arrays.conns) if direction == 'O']
+
+        self.node_names.extend(arrays.nodes)
+        self.cap.extend((arrays.cap * self.c_unit).tolist())
+        self.edge_u.extend((arrays.edge_u + base).tolist())
+        self.edge_v.extend((arrays.edge_v + base).tolist())
+        self.edge_r.extend((arrays.edge_r * self.r_unit).tolist())
+
+        for d in drivers:
+            self.pair_driver.extend([d] * len(loads))
+            self.pair_load.extend(loads)
+        self.pair_net.extend([net_idx] * (len(drivers) * len(loads)))
+
+        self.net_names.append(arrays.name)
+        self.node_offsets.append(base + n)
+        self.edge_offsets.append(len(self.edge_u))
+        self.node_net.extend([net_idx] * n)
+
+    def _build_csr(self, n):
+        u = np.asarray(self.edge_u, dtype=np.int64)
+        v = np.asarray(self.edge_v, dtype=np.int64)
+        e = np.arange(len(u), dtype=np.int64)
+        src = np.concatenate([u, v])
+        order = np.argsort(src, kind='stable')
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+        return offsets, np.concatenate([v, u])[order], np.concatenate([e, e])[order]
+
+    def _build_levels(self, pair_net, pair_driver, n):
+        """
+        逐层 BFS，parent_edge 为节点到父节点的电阻编号。
+        每轮每个 net 取第一个尚未到达的 driver 为根（与 RCTree 相同，不连通的 driver 各自成树），
+        所有 net 的根同时出发；各轮中同一深度的节点合并为一层
+        """
+        offsets, adj, adj_edge = self._build_csr(n)
+        parent = np.full(n, -1, dtype=np.int64)
+        parent_edge = np.full(n, -1, dtype=np.int64)
+        depth = np.full(n, -1, dtype=np.int64)
+        levels = []
+        while True:
+            pending = depth[pair_driver] < 0
+            if not pending.any():
+                return levels, parent, parent_edge, depth
+            pending_net = pair_net[pending]
+            first = np.ones(len(pending_net), dtype=bool)
+            first[1:] = pending_net[1:] != pending_net[:-1]
+            roots = pair_driver[pending][first]
+            self._bfs(roots, offsets, adj, adj_edge, parent, parent_edge, depth, levels)
+
+    @staticmethod
+    def _bfs(roots, offsets, adj, adj_edge, parent, parent_edge, depth, levels):
+        depth[roots] = 0
+        frontier = roots
+        if levels:
+            levels[0] = np.concatenate([levels[0], roots])
+        else:
+            levels.append(roots)
+
+        while len(frontier):
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            total = int(counts.sum())
+            if total == 0:
+                break
+            pos = np.arange(total) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            nbr = adj[pos]
+            fresh = depth[nbr] < 0
+            pos, nbr = pos[fresh], nbr[fresh]
+            src = np.repeat(frontier, counts)[fresh]
+            nbr, first = np.unique(nbr, return_index=True)
+            level = depth[frontier[0]] + 1
+            depth[nbr] = level
+            parent[nbr] = src[first]
+            parent_edge[nbr] = adj_edge[pos[first]]
+            if level < len(levels):
+                levels[level] = np.concatenate([levels[level], nbr])
+            else:
+                levels.append(nbr)
+            frontier = nbr
+
+    @staticmethod
+    def _lca(up, depth, a, b):
+        """倍增法向量化求 LCA，up[k] 为 2^k 级祖先表"""
+        a = a.copy()
+        b = b.copy()
+        swap = depth[a] < depth[b]
+        a[swap], b[swap] = b[swap], a[swap]
+        diff = depth[a] - depth[b]
+        for k in range(len(up)):
+            jump = (diff >> k) & 1 == 1
+            a[jump] = up[k][a[jump]]
+        for k in range(len(up) - 1, -1, -1):
+            move = up[k][a] != up[k][b]
+            a[move] = up[k][a[move]]
+            b[move] = up[k][b[move]]
+        return np.where(a == b, a, up[0][a])
+
+    def compute(self, apply_ln2=False):
+        """计算全部 driver→load 延迟，返回 DELAY_DTYPE 结构化数组（不连通的为 NaN）"""
+        cap = np.asarray(self.cap, dtype=np.float64)[:, None]
+        edge_r = np.asarray(self.edge_r, dtype=np.float64)[:, None]
+        result, delay = self._compute(cap, edge_r, apply_ln2)
+        result['delay'] = delay[:, 0]
+        return result
+
+    def _compute(self, cap, edge_r, apply_ln2=False):
+        """
+        cap 为 (节点数, K)、edge_r 为 (电阻数, K) 的数组，K 组 R/C 共用一次拓扑遍历
+        （分层、父节点、倍增表、LCA 都只算一次）。返回 (result, delay)：
+        result 为 DELAY_DTYPE 数组（delay 字段未填），delay 为 (查询数, K)
+        """
+        n = self.node_offsets[-1]
+        pair_net = np.asarray(self.pair_net, dtype=np.int64)
+        pair_driver = np.asarray(self.pair_driver, dtype=np.int64)
+        pair_load = np.asarray(self.pair_load, dtype=np.int64)
+
+        result = np.empty(len(pair_net), dtype=DELAY_DTYPE)
+        result['net'] = pair_net + self.first_net
+        result['driver'] = pair_driver
+        result['load'] = pair_load
+        k = cap.shape[1]
+        self.net_methods = np.full(len(self.net_names), 'tree')
+        if len(pair_net) == 0:
+            self.net_methods[self._detect_loops(np.full(n, -1, dtype=np.int64))] = 'mesh'
+            return result, np.empty((0, k))
+
+        levels, parent, parent_edge, depth = self._build_levels(pair_net, pair_driver, n)
+
+        # 自底向上累加子树电容，同时求每个节点所在树的根
+        subtree_cap = np.array(cap, dtype=np.float64)
+        for level in reversed(levels[1:]):
+            np.add.at(subtree_cap, parent[level], subtree_cap[level])
+        root_of = np.arange(n)
+        for level in levels[1:]:
+            root_of[level] = root_of[parent[level]]
+        total_cap = subtree_cap[root_of]
+
+        # 自顶向下：A 为向下驱动的延迟，B 为向上驱动的延迟
+        down = np.zeros((n, k))
+        up = np.zeros((n, k))
+        for level in levels[1:]:
+            par = parent[level]
+            r = edge_r[parent_edge[level]]
+            down[level] = down[par] + r * subtree_cap[level]
+            up[level] = up[par] + r * (total_cap[level] - subtree_cap[level])
+
+        # 倍增祖先表
+        jump = np.where(parent >= 0, parent, np.arange(n))
+        table = [jump]
+        for _ in range(max(1, int(depth.max()).bit_length()) - 1):
+            jump = jump[jump]
+            table.append(jump)
+
+        reached = (depth[pair_driver] >= 0) & (depth[pair_load] >= 0)
+        reached &= root_of[pair_driver] == root_of[pair_load]
+        d, l = pair_driver[reached], pair_load[reached]
+        w = self._lca(table, depth, d, l)
+
+        scale = 1e-6 * math.log(2) if apply_ln2 else 1e-6
+        delay = np.full((len(pair_net), k), np.nan)
+        delay[reached] = (down[l] - down[w] + up[d] - up[w]) * scale
+
+        looped = self._detect_loops(depth)
+        self.net_methods[looped] = 'mesh'
+        for i in np.flatnonzero(looped).tolist():
+            self._solve_mesh_net(i, cap, edge_r, pair_net, pair_driver, pair_load, delay, scale)
+        return result, delay
+
+    def _detect_loops(self, depth):
+        """
+        每个 net 的 *RES 是否成环（与 meshSolver.has_loop 相同，针对整个 net）：BFS 只沿树边前进，
+        到达的分量中电阻数 > 节点数 - 树数说明有环（含并联电阻）；
+        driver 到不了的分量（很少见）再按 net 用并查集检查。depth 为 BFS 深度（未到达为 -1）
+        """
+        u = np.asarray(self.edge_u, dtype=np.int64)
+        v = np.asarray(self.edge_v, dtype=np.int64)
+        node_net = np.asarray(self.node_net, dtype=np.int64)
+        visited = depth >= 0
+        inside = visited[u] & visited[v]
+        edge_count = np.bincount(node_net[u[inside]], minlength=len(self.net_names))
+        node_count = np.bincount(node_net[visited], minlength=len(self.net_names))
+        tree_count = np.bincount(node_net[depth == 0], minlength=len(self.net_names))
+        looped = edge_count > node_count - tree_count
+        outside = np.flatnonzero(~inside)
+        if len(outside):
+            out_net = node_net[u[outside]]
+            order = np.argsort(out_net, kind='stable')
+            nets, starts = np.unique(out_net[order], return_index=True)
+            for i, edges in zip(nets.tolist(), np.split(outside[order], starts[1:])):
+                if not looped[i]:
+                    looped[i] = edges_have_loop(zip(u[edges].tolist(), v[edges].tolist()))
+        return looped
+
+    def _solve_mesh_net(self, i, cap, edge_r, pair_net, pair_driver, pair_load, delay, scale):
+        """用电导矩阵重新求第 i 个 net 的全部查询（每个 corner 一次），结果写回 delay"""
+        lo, hi = self.node_offsets[i], self.node_offsets[i + 1]
+        e0, e1 = self.edge_offsets[i], self.edge_offsets[i + 1]
+        sel = np.arange(*np.searchsorted(pair_net, [i, i + 1]))
+        edge_u = np.asarray(self.edge_u[e0:e1], dtype=np.int64) - lo
+        edge_v = np.asarray(self.edge_v[e0:e1], dtype=np.int64) - lo
+        drivers = np.unique(pair_driver[sel]) - lo
+        row = np.searchsorted(drivers, pair_driver[sel] - lo)
+        col = pair_load[sel] - lo
+        for k in range(cap.shape[1]):
+            solution = solve_mesh(cap[lo:hi, k], edge_u, edge_v, edge_r[e0:e1, k], drivers.tolist())
+            delay[sel, k] = solution[row, col] * scale
+
+
+def iter_delay_batches(nets, batch_size=4096, r_unit=1.0, c_unit=1.0, apply_ln2=False, profiler=None):
+    """
+    每 batch_size 个 net 打包成一个 RCForest 计算一次，
+    逐批产出 (forest, delays)，内存只与批大小有关。
+    profiler 不为 None 时记录建树/计算耗时和每个 net 的规模（按批计算，没有单个 net 的耗时）
+    """
+    def add(forest, net):
+        if profiler is None:
+            forest.add_net(net)
+            return
+        with profiler.phase('build'):
+            forest.add_net(net)
+        n_drivers = sum(1 for _, direction in net.conns if direction == 'I')
+        n_loads = sum(1 for _, direction in net.conns if direction == 'O')
+        profiler.add_net(net, n_drivers, n_loads)
+
+    def compute(forest):
+        if profiler is None:
+            return forest.compute(apply_ln2)
+        with profiler.phase('compute'):
+            delays = forest.compute(apply_ln2)
+        profiler.tag_methods(forest.net_methods.tolist())
+        return delays
+
+    forest = RCForest(r_unit, c_unit)
+    for net in nets:
+        add(forest, net)
+        if len(forest) >= batch_size:
+            yield forest, compute(forest)
+            forest = RCForest(r_unit, c_unit, forest.first_net + len(forest))
+    if len(forest):
+        yield forest, compute(forest)
@@ -1,4 +1,7 @@
 import math
+from array import array
+import jitKernels
+from jitKernels import tree_sums
 
 class RCTree:
     def __init__(self, r_unit=1.0, c_unit=1.0):
@@ -8,6 +11,13 @@ class RCTree:
         self.node_self_cap = {}
         self.r_unit = r_unit
         self.c_unit = c_unit
+        # driver -> (parent, subtree_cap)，在多次调用之间保留遍历状态，
+        # 拓扑变化（add_edge）时全部失效，电容/电阻修改时增量更新
+        self._states = {}
+        self._edge_count = 0
+        # 整个 net 的 *RES 是否成环（与 meshSolver.has_loop 相同），遍历时顺带得出；
+        # 遍历没有到达所有有电阻的节点（driver 到不了的分量）时为 None，由调用方用 has_loop 判断
+        self.loop_detected = None
 
     def set_name(self,name):
         self.name = name
@@ -18,188 +28,510 @@ class RCTree:
         self.graph.setdefault(node2, []).append(node1)
         self.resistance[(node1, node2)] = res
         self.resistance[(node2, node1)] = res
+        self._edge_count += 1
+        self._states.clear()
 
     def set_node_cap(self, node, cap):
         cap = cap * self.c_unit
+        old = self.node_self_cap.get(node, 0.0)
         self.node_self_cap[node] = cap
+        if self._states and cap != old:
+            self._propagate_cap(node, cap - old)
 
+    def set_edge_res(self, node1, node2, res):
+        """
+        修改已有电阻（ECO）。子树电容不受电阻影响，
+        因此只需更新电阻值，之后的查询沿路径重新求和即可，无需重新遍历
+        """
+        if (node1, node2) not in self.resistance:
+            raise KeyError(f"电阻 {node1} - {node2} 不存在")
+        res = res * self.r_unit
+        self.resistance[(node1, node2)] = res
+        self.resistance[(node2, node1)] = res
 
-    def compute_delays_to_loads(self, driver, loads, apply_ln2=False):
+    def apply_changes(self, caps=None, res=None):
         """
-        针对一个driver节点，遍历RC树，
-        同时记录每个load路径和节点的下游电容，
-        最后计算所有load的Elmore延迟。
+        批量应用 ECO 修改：caps 为 {node: cap}，res 为 {(node1, node2): res}。
+        电容修改只沿祖先链更新子树电容，每项 O(depth)；
+        修改项很多时直接丢弃缓存的遍历状态，下次查询重新计算更省
         """
-        subtree_cap = {}
-        parent = {}
-        path_to = {}
-        visited = set()
+        caps = caps or {}
+        res = res or {}
+        if len(caps) * 8 > len(self.graph):
+            self._states.clear()
+        for (node1, node2), value in res.items():
+            self.set_edge_res(node1, node2, value)
+        for node, value in caps.items():
+            self.set_node_cap(node, value)
+
+    def _check_loop(self, reached, roots, isolated):
+        # reached 个节点分属 roots 个连通分量（isolated 个根没有电阻）：
+        # 覆盖了所有有电阻的节点时，电阻数 > 节点数 - 分量数 即成环（含并联电阻与自环）
+        if reached - isolated == len(self.graph):
+            self.loop_detected = self._edge_count > reached - roots
+        else:
+            self.loop_detected = None
+
+    def _propagate_cap(self, node, delta):
+        """把 node 自电容的变化量加到每个缓存状态中它的所有祖先上"""
+        for parent, subtree_cap in self._states.values():
+            current = node
+            while current is not None and current in parent:
+                subtree_cap[current] += delta
+                current = parent[current]
 
+    def _build_state(self, driver):
+        """从 driver 做一次 DFS，建立 parent 与子树电容并缓存"""
+        parent = {}
         stack = [(driver, None)]
-        postorder = []
+        preorder = []
 
-        # DFS，建立 parent 和 path_to，同时记录遍历顺序
+        # DFS，建立 parent，同时记录遍历顺序
         while stack:
             node, par = stack.pop()
-            if node in visited:
+            if node in parent:
                 continue
-            visited.add(node)
             parent[node] = par
-            if par is None:
-                path_to[node] = [node]
-            else:
-                path_to[node] = path_to[par] + [node]
-            postorder.append(node)
+            preorder.append(node)
             for neighbor in self.graph.get(node, []):
                 if neighbor != par:
                     stack.append((neighbor, node))
+        self._check_loop(len(preorder), 1, driver not in self.graph)
 
         # 反向遍历，计算每个节点的子树电容
-        for node in reversed(postorder):
-            cap = self.node_self_cap.get(node, 0.0)
-            for neighbor in self.graph.get(node, []):
-                if parent.get(neighbor) == node:
-                    cap += subtree_cap.get(neighbor, 0.0)
-            subtree_cap[node] = cap
+        subtree_cap = {node: self.node_self_cap.get(node, 0.0) for node in preorder}
+        for node in reversed(preorder):
+            par = parent[node]
+            if par is not None:
+                subtree_cap[par] += subtree_cap[node]
+
+        state = (parent, subtree_cap)
+        self._states[driver] = state
+        return state
+
+    def compute_delays_to_loads(self, driver, loads, apply_ln2=False):
+        """
+        针对一个driver节点，遍历RC树，
+        同时记录每个节点的父节点和下游电容，
+        最后沿 load 到 driver 的路径计算所有load的Elmore延迟。
+        遍历状态会被缓存，ECO 修改后的查询每个 load 只需 O(depth)。
+        """
+        state = self._states.get(driver)
+        if state is None:
+            state = self._build_state(driver)
+        parent, subtree_cap = state
 
         # 计算从 driver 到每个 load 的延迟
         delays = {}
         for load in loads:
-            if load not in path_to:
+            if load not in parent:
                 delays[load] = None
                 continue
-            path = path_to[load]
+            terms = []
+            node = load
+            par = parent[node]
+            while par is not None:
+                terms.append(self.resistance.get((par, node), 0.0) * subtree_cap[node])
+                node, par = par, parent[par]
             delay = 0.0
-            for i in range(len(path) - 1):
-                u, v = path[i], path[i + 1]
-                r = self.resistance.get((u, v), 0.0)
-                delay += r * subtree_cap[v]
+            for term in reversed(terms):  # 按 driver -> load 的顺序累加
+                delay += term
             if apply_ln2:
                 delay *= math.log(2)
             delays[load] = delay*1e-6
 
         return delays
-    
+
+    def compute_delays_all_drivers(self, drivers, loads, apply_ln2=False):
+        """
+        一次性计算所有 driver 到所有 load 的 Elmore 延迟（树的换根）。
+        以 driver 为根只做一次 DFS 和子树电容计算，记 S 为子树电容、C 为总电容：
+          A[v] = 根到 v 路径上 Σ R·S(下端节点)       （从根向下驱动的延迟）
+          B[v] = 根到 v 路径上 Σ R·(C - S(下端节点))  （沿这条路径向上驱动的延迟）
+        driver d 到 load l 的延迟为 A[l] - A[w] + B[d] - B[w]，其中 w = LCA(d, l)，
+        LCA 用 Tarjan 离线算法对所有 driver×load 一次求出，
+        总复杂度 O(n + drivers × loads)。
+        返回 {driver: {load: delay}}，不连通的 load 为 None。
+        """
+        index = {}          # 节点 -> 先序编号
+        parent = []         # 先序编号 -> 父节点编号
+        parent_r = []
+        comp = []           # 所在连通分量的根编号
+
+        # 每个尚未访问到的 driver 作为一个连通分量的根做 DFS
+        roots = isolated = 0
+        for root in drivers:
+            if root in index:
+                continue
+            roots += 1
+            isolated += root not in self.graph
+            root_idx = len(parent)
+            stack = [(root, -1, 0.0)]
+            while stack:
+                node, par, r = stack.pop()
+                if node in index:
+                    continue
+                idx = len(parent)
+                index[node] = idx
+                parent.append(par)
+                parent_r.append(r)
+                comp.append(root_idx)
+                for neighbor in self.graph.get(node, []):
+                    if neighbor not in index:
+                        stack.append((neighbor, idx, self.resistance.get((node, neighbor), 0.0)))
+
+        n = len(parent)
+        self._check_loop(n, roots, isolated)
+        nodes = [None] * n
+        for node, idx in index.items():
+            nodes[idx] = node
+
+        # 逆先序累加子树电容，再先序计算 A、B（大 net 在安装了 numba 时由编译内核完成）
+        subtree_cap, down, up = tree_sums(parent, parent_r, comp,
+                                          [self.node_self_cap.get(node, 0.0) for node in nodes])
+
+        # 登记 driver×load 查询
+        queries = {}
+        for d in drivers:
+            d_idx = index[d]
+            for l in loads:
+                l_idx = index.get(l)
+                if l_idx is None or comp[l_idx] != comp[d_idx]:
+                    continue
+                queries.setdefault(d_idx, []).append((l_idx, d_idx, l_idx))
+                queries.setdefault(l_idx, []).append((d_idx, d_idx, l_idx))
+
+        # Tarjan 离线 LCA：逆先序即为一个合法的后序
+        uf = list(range(n))
+        anc = list(range(n))
+        done = bytearray(n)
+        pair_delay = {}
+
+        def find(x):
+            while uf[x] != x:
+                uf[x] = uf[uf[x]]
+                x = uf[x]
+            return x
+
+        for idx in range(n - 1, -1, -1):
+            done[idx] = 1
+            for other, d_idx, l_idx in queries.get(idx, ()):
+                if done[other]:
+                    w = anc[find(other)]
+                    pair_delay[(d_idx, l_idx)] = down[l_idx] - down[w] + up[d_idx] - up[w]
+            par = parent[idx]
+            if par >= 0:
+                uf[find(idx)] = find(par)
+                anc[find(par)] = par
+
+        scale = 1e-6 * math.log(2) if apply_ln2 else 1e-6
+        result = {}
+        for d in drivers:
+            d_idx = index[d]
+            delays = {}
+            for l in loads:
+                delay = pair_delay.get((d_idx, index.get(l)))
+                delays[l] = None if delay is None else delay * scale
+            result[d] = delays
+        return result
+
+
+
+class RCTreeA:
+    """
+    紧凑数组版 RC 树：每个 net 只把节点名整数化一次，
+    拓扑用 CSR（offsets/adj）和 parent 数组保存，R/C 保存在 array 缓冲区中，
+    每条边只存一次。接口与 RCTree 相同，适合大量小 net 的场景。
+    """
+    def __init__(self, r_unit=1.0, c_unit=1.0):
+        self.name = ''
+        self.r_unit = r_unit
+        self.c_unit = c_unit
+        self.node_index = {}         # 节点名 -> 整数编号
+        self.index_node = []         # 整数编号 -> 节点名
+        self.cap = array('d')        # 节点自电容
+        self.edge_u = array('i')     # 边端点（每条边只存一次）
+        self.edge_v = array('i')
+        self.edge_r = array('d')
+        self._csr = None             # (offsets, adj, adj_edge)，拓扑变化时失效
+
+    def clear(self):
+        """清空内容以便下一个 net 复用同一个对象和缓冲区"""
+        self.name = ''
+        self.node_index.clear()
+        del self.index_node[:]
+        del self.cap[:]
+        del self.edge_u[:]
+        del self.edge_v[:]
+        del self.edge_r[:]
+        self._csr = None
+
+    def set_name(self, name):
+        self.name = name
+
+    def _intern(self, node):
+        idx = self.node_index.get(node)
+        if idx is None:
+            idx = len(self.index_node)
+            self.node_index[node] = idx
+            self.index_node.append(node)
+            self.cap.append(0.0)
+        return idx
+
+    def add_edge(self, node1, node2, res):
+        self.edge_u.append(self._intern(node1))
+        self.edge_v.append(self._intern(node2))
+        self.edge_r.append(res * self.r_unit)
+        self._csr = None
+
+    def set_node_cap(self, node, cap):
+        self.cap[self._intern(node)] = cap * self.c_unit
+
+    def _build_csr(self):
+        """按度数计数建立 CSR 邻接表，adj_edge 记录每个邻接项对应的边号"""
+        n = len(self.index_node)
+        m = len(self.edge_r)
+        offsets = array('l', bytes(array('l').itemsize * (n + 1)))
+        for u, v in zip(self.edge_u, self.edge_v):
+            offsets[u + 1] += 1
+            offsets[v + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        fill = offsets[:-1]
+        adj = array('l', bytes(array('l').itemsize * (2 * m)))
+        adj_edge = array('l', bytes(array('l').itemsize * (2 * m)))
+        for e in range(m):
+            u, v = self.edge_u[e], self.edge_v[e]
+            adj[fill[u]] = v
+            adj_edge[fill[u]] = e
+            fill[u] += 1
+            adj[fill[v]] = u
+            adj_edge[fill[v]] = e
+            fill[v] += 1
+        self._csr = (offsets, adj, adj_edge)
+        return self._csr
+
+    def _traverse(self, root):
+        """从 root 出发的迭代 DFS，返回先序 order、parent 和到父节点的电阻"""
+        offsets, adj, adj_edge = self._csr or self._build_csr()
+        n = len(self.index_node)
+        parent = array('l', [-1]) * n
+        parent_r = array('d', bytes(8 * n))
+        visited = bytearray(n)
+        order = []
+        stack = [root]
+        edge_r = self.edge_r
+
+        while stack:
+            node = stack.pop()
+            if visited[node]:
+                continue
+            visited[node] = 1
+            order.append(node)
+            for k in range(offsets[node], offsets[node + 1]):
+                neighbor = adj[k]
+                if not visited[neighbor]:
+                    parent[neighbor] = node
+                    parent_r[neighbor] = edge_r[adj_edge[k]]
+                    stack.append(neighbor)
+        return order, parent, parent_r, visited
+
+    def compute_delays_to_loads(self, driver, loads, apply_ln2=False):
+        driver_idx = self.node_index.get(driver)
+        if driver_idx is None:
+            return {load: None for load in loads}
+
+        order, parent, parent_r, visited = self._traverse(driver_idx)
+
+        # 逆先序累加子树电容
+        subtree_cap = array('d', self.cap)
+        for node in reversed(order):
+            par = parent[node]
+            if par >= 0:
+                subtree_cap[par] += subtree_cap[node]
+
+        # 先序自顶向下累加 Elmore 延迟
+        delay_to = array('d', bytes(8 * len(self.index_node)))
+        for node in order:
+            par = parent[node]
+            if par >= 0:
+                delay_to[node] = delay_to[par] + parent_r[node] * subtree_cap[node]
+
+        scale = 1e-6 * math.log(2) if apply_ln2 else 1e-6
+        delays = {}
+        for load in loads:
+            idx = self.node_index.get(load)
+            if idx is None or not visited[idx]:
+                delays[load] = None
+            else:
+                delays[load] = delay_to[idx] * scale
+        return delays
+
+
 import numpy as np
 
 class RCTreeM:
+    """
+    NumPy 稀疏版 RC 树：边以 (u, v, r) 数组保存，按源节点排序得到 CSR，
+    不再构造 n×n 的稠密矩阵。每个 driver 的 parent/层次顺序只建立一次并缓存，
+    子树电容用逐层 np.add.at 自底向上累加，Elmore 延迟逐层自顶向下前缀累加。
+    适合大 net（如几万节点的时钟网）。
+    """
     def __init__(self, r_unit=1.0, c_unit=1.0):
         self.name = ''
         self.node_index = {}         # 节点名 -> 索引
         self.index_node = []         # 索引 -> 节点名
-        self.adj_matrix = None       # 邻接矩阵 (电阻)
-        self.cap_array = None        # 电容数组
+        self.cap_list = []           # 节点自电容
+        self.edge_u = []             # 边列表（每条边只存一次）
+        self.edge_v = []
+        self.edge_r = []
         self.r_unit = r_unit
         self.c_unit = c_unit
-        self.edge_list = []          # 边列表
+        self._cap_array = None       # 电容数组缓存
+        self._csr = None             # (offsets, adj, adj_r) 缓存
+        self._orders = {}            # driver 索引 -> 遍历顺序缓存
+        self._dfs = {}               # driver 索引 -> jitKernels.dfs_preorder 的结果缓存
 
     def _ensure_node(self, node):
         """确保节点存在并分配索引"""
-        if node not in self.node_index:
+        idx = self.node_index.get(node)
+        if idx is None:
             idx = len(self.index_node)
             self.node_index[node] = idx
             self.index_node.append(node)
+            self.cap_list.append(0.0)
+        return idx
 
     def set_name(self, name):
         self.name = name
 
     def add_edge(self, node1, node2, res):
-        self._ensure_node(node1)
-        self._ensure_node(node2)
-        idx1 = self.node_index[node1]
-        idx2 = self.node_index[node2]
-        res *= self.r_unit
-        self.edge_list.append((idx1, idx2, res))
+        self.edge_u.append(self._ensure_node(node1))
+        self.edge_v.append(self._ensure_node(node2))
+        self.edge_r.append(res * self.r_unit)
+        self._cap_array = None
+        self._csr = None
+        self._orders.clear()
+        self._dfs.clear()
 
     def set_node_cap(self, node, cap):
-        self._ensure_node(node)
-        idx = self.node_index[node]
-        cap *= self.c_unit
-        if self.cap_array is None or len(self.cap_array) <= idx:
-            new_size = max(idx + 1, len(self.cap_array) if self.cap_array is not None else 0)
-            new_cap = np.zeros(new_size)
-            if self.cap_array is not None:
-                new_cap[:len(self.cap_array)] = self.cap_array
-            self.cap_array = new_cap
-        self.cap_array[idx] = cap
-
-    def _build_matrices(self):
+        self.cap_list[self._ensure_node(node)] = cap * self.c_unit
+        self._cap_array = None
+
+    @property
+    def cap_array(self):
+        if self._cap_array is None:
+            self._cap_array = np.array(self.cap_list, dtype=np.float64)
+        return self._cap_array
+
+    def _build_csr(self):
+        """把边数组按源节点排序，得到 CSR 邻接表"""
         n = len(self.index_node)
-        self.adj_matrix = np.zeros((n, n))
-        for i, j, r in self.edge_list:
-            self.adj_matrix[i, j] = r
-            self.adj_matrix[j, i] = r
-        if self.cap_array is None:
-            self.cap_array = np.zeros(n)
-        elif len(self.cap_array) < n:
-            # 补足未设置电容的节点
-            new_cap = np.zeros(n)
-            new_cap[:len(self.cap_array)] = self.cap_array
-            self.cap_array = new_cap
+        u = np.asarray(self.edge_u, dtype=np.int64)
+        v = np.asarray(self.edge_v, dtype=np.int64)
+        r = np.asarray(self.edge_r, dtype=np.float64)
+        src = np.concatenate([u, v])
+        dst = np.concatenate([v, u])
+        order = np.argsort(src, kind='stable')
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+        self._csr = (offsets, dst[order], np.concatenate([r, r])[order])
+        return self._csr
 
+    def _build_order(self, root):
+        """
+        从 root 逐层 BFS（每层一次向量化展开），
+        返回 (levels, parent, parent_r, reached)，levels[0] 为 [root]
+        """
+        cached = self._orders.get(root)
+        if cached is not None:
+            return cached
 
-    def compute_delays_to_loads(self, driver, loads, apply_ln2=False):
-        self._build_matrices()
+        offsets, adj, adj_r = self._csr or self._build_csr()
+        n = len(self.index_node)
+        parent = np.full(n, -1, dtype=np.int64)
+        parent_r = np.zeros(n)
+        reached = np.zeros(n, dtype=bool)
+        reached[root] = True
+        frontier = np.array([root], dtype=np.int64)
+        levels = [frontier]
 
-        # 如果是名字（字符串），则转换为索引
-        if isinstance(driver, str):
-            if driver not in self.node_index:
-                return {load: None for load in loads}
-            driver_idx = self.node_index[driver]
-        else:
-            driver_idx = driver
+        while True:
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            total = int(counts.sum())
+            if total == 0:
+                break
+            # 把当前层所有节点的邻接区间展开成一个下标数组
+            pos = np.arange(total) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            nbr = adj[pos]
+            fresh = ~reached[nbr]
+            if not fresh.any():
+                break
+            pos, nbr = pos[fresh], nbr[fresh]
+            src = np.repeat(frontier, counts)[fresh]
+            # 同一层被多个父节点触及（存在回路）时只保留第一次
+            nbr, first = np.unique(nbr, return_index=True)
+            reached[nbr] = True
+            parent[nbr] = src[first]
+            parent_r[nbr] = adj_r[pos[first]]
+            levels.append(nbr)
+            frontier = nbr
 
-        load_indices = []
-        for load in loads:
-            if isinstance(load, str):
-                if load not in self.node_index:
-                    load_indices.append(None)
-                else:
-                    load_indices.append(self.node_index[load])
-            else:
-                load_indices.append(load)
+        cached = (levels, parent, parent_r, reached)
+        self._orders[root] = cached
+        return cached
 
-        n = len(self.index_node)
-        visited = np.zeros(n, dtype=bool)
-        parent = np.full(n, -1, dtype=int)
-        subtree_cap = np.zeros(n)
-        stack = [driver_idx]
-        postorder = []
+    def _compute_jit(self, root):
+        """Numba 内核逐节点完成 DFS、子树电容与路径时延，返回 (delay_to, reached)"""
+        cached = self._dfs.get(root)
+        if cached is None:
+            offsets, adj, adj_r = self._csr or self._build_csr()
+            order, parent, parent_r = jitKernels.dfs_preorder(offsets, adj, adj_r, root)
+            reached = parent >= 0
+            reached[root] = True
+            cached = (order, parent, parent_r, reached)
+            self._dfs[root] = cached
+        order, parent, parent_r, reached = cached
+        subtree_cap = self.cap_array.copy()
+        jitKernels.subtree_caps(order, parent, subtree_cap)
+        delay_to = np.zeros(len(self.index_node))
+        jitKernels.path_delays(order, parent, parent_r, subtree_cap, delay_to)
+        return delay_to, reached
 
-        # DFS to build parent and postorder
-        while stack:
-            node = stack.pop()
-            if visited[node]:
-                continue
-            visited[node] = True
-            postorder.append(node)
-            for neighbor in np.nonzero(self.adj_matrix[node])[0]:
-                if not visited[neighbor]:
-                    parent[neighbor] = node
-                    stack.append(neighbor)
+    def _index_of(self, node):
+        if isinstance(node, str):
+            return self.node_index.get(node)
+        return node
+
+    def compute_delays_to_loads(self, driver, loads, apply_ln2=False):
+        # 如果是名字（字符串），则转换为索引
+        driver_idx = self._index_of(driver)
+        if driver_idx is None:
+            return {load: None for load in loads}
+
+        if jitKernels.jit_enabled() and len(self.index_node) >= jitKernels.JIT_MIN_NODES:
+            delay_to, reached = self._compute_jit(driver_idx)
+        else:
+            levels, parent, parent_r, reached = self._build_order(driver_idx)
 
-        # Bottom-up cap accumulation
-        for node in reversed(postorder):
-            total_cap = self.cap_array[node]
-            children = np.where(parent == node)[0]
-            for child in children:
-                total_cap += subtree_cap[child]
-            subtree_cap[node] = total_cap
+            # 自底向上逐层累加子树电容
+            subtree_cap = self.cap_array.copy()
+            for level in reversed(levels[1:]):
+                np.add.at(subtree_cap, parent[level], subtree_cap[level])
 
-        # Delay calculation
+            # 自顶向下逐层前缀累加 Elmore 延迟
+            delay_to = np.zeros(len(self.index_node))
+            for level in levels[1:]:
+                delay_to[level] = delay_to[parent[level]] + parent_r[level] * subtree_cap[level]
+
+        scale = 1e-6 * np.log(2) if apply_ln2 else 1e-6
         delays = {}
-        for load, load_idx in zip(loads, load_indices):
-            if load_idx is None:
+        for load in loads:
+            load_idx = self._index_of(load)
+            if load_idx is None or not reached[load_idx]:
                 delays[load] = None
-                continue
-            delay = 0.0
-            current = load_idx
-            while current != driver_idx and current != -1:
-                par = parent[current]
-                r = self.adj_matrix[par, current]
-                delay += r * subtree_cap[current]
-                current = par
-            if apply_ln2:
-                delay *= np.log(2)
-            delays[load] = delay * 1e-6
+            else:
+                delays[load] = float(delay_to[load_idx]) * scale
         return delays
@@ -0,0 +1,404 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+import numpy as np
+from spefReader import *
+from RCTree import *
+from RCForest import *
+from delayOutput import *
+from delayWriter import write_delays
+from cppBackend import RCTreeCpp, cpp_available
+
+# 合成 net：节点编号 0..n-1，edges 为 [(u, v, r)]，caps 按节点编号，drivers/loads 为节点编号
+SynthNet = namedtuple('SynthNet', ['n', 'edges', 'caps', 'drivers', 'loads'])
+
+# elmore_cpp 可执行文件的候选位置（相对本文件）：单配置生成器直接输出到 build/，
+# 多配置生成器（Ninja Multi-Config / VS）输出到 build/<配置>/，build/elmore 为早期的目标名
+CPP_BUILD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'elmore_cpp', 'build')
+CPP_BIN_CANDIDATES = [os.path.normpath(os.path.join(CPP_BUILD_DIR, *parts)) for parts in (
+    ('elmore_cpp',), ('Release', 'elmore_cpp'), ('RelWithDebInfo', 'elmore_cpp'), ('Debug', 'elmore_cpp'),
+    ('elmore',))]
+
+
+CPP_SOURCE_DIRS = [os.path.normpath(os.path.join(CPP_BUILD_DIR, '..', name)) for name in ('src', 'inc')]
+
+
+def cpp_sources_mtime():
+    """elmore_cpp 源文件（src/、inc/）中最新的修改时间，没有源文件时为 0"""
+    latest = 0.0
+    for directory in CPP_SOURCE_DIRS:
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                latest = max(latest, os.path.getmtime(os.path.join(directory, name)))
+    return latest
+
+
+def find_cpp_bin():
+    """
+    在候选位置中返回可执行的 elmore_cpp，找不到时为 None。
+    有多个时取最新编译的一个（比源文件旧的说明不是当前代码编译出的，只在没有更新的时才使用）
+    """
+    found = [path for path in CPP_BIN_CANDIDATES if os.path.isfile(path) and os.access(path, os.X_OK)]
+    if not found:
+        return None
+    return max(found, key=os.path.getmtime)
+
+
+def _caps(n, rnd):
+    return [rnd.uniform(0.001, 1.0) for _ in range(n)]
+
+
+def chain_net(size, rnd):
+    """长链：driver 在一端，沿途每隔 size/8 个节点挂一个 load（最深的路径）"""
+    n = max(size, 2)
+    edges = [(i - 1, i, rnd.uniform(0.1, 5.0)) for i in range(1, n)]
+    loads = sorted({n - 1} | set(range(max(1, n // 8), n, max(1, n // 8))))
+    return SynthNet(n, edges, _caps(n, rnd), [0], loads)
+
+
+def htree_net(size, rnd):
+    """平衡 H 树：完全二叉树，每两层线长（电阻）减半，所有叶子都是 load"""
+    levels = max(1, int(size).bit_length() - 1)
+    n = (1 << (levels + 1)) - 1
+    edges = []
+    for child in range(1, n):
+        depth = (child + 1).bit_length() - 1
+        edges.append(((child - 1) // 2, child, 10.0 / (1 << ((depth - 1) // 2))))
+    return SynthNet(n, edges, _caps(n, rnd), [0], list(range(n // 2, n)))
+
+
+def star_net(size, rnd):
+    """宽星形：driver 经一段电阻接到中心节点，其余节点都直接挂在中心上且都是 load"""
+    n = max(size, 3)
+    edges = [(0, 1, rnd.uniform(0.1, 5.0))] + [(1, i, rnd.uniform(0.1, 5.0)) for i in range(2, n)]
+    return SynthNet(n, edges, _caps(n, rnd), [0], list(range(2, n)))
+
+
+def random_net(size, rnd, n_drivers=1):
+    """随机树：每个节点随机连到之前的某个节点，约 sqrt(n) 个 load"""
+    n = max(size, n_drivers + 1)
+    edges = [(rnd.randrange(i), i, rnd.uniform(0.1, 50.0)) for i in range(1, n)]
+    pins = rnd.sample(range(n), min(n, n_drivers + max(1, int(n ** 0.5))))
+    return SynthNet(n, edges, _caps(n, rnd), pins[:n_drivers], pins[n_drivers:])
+
+
+def multi_driver_net(size, rnd):
+    """多 driver 的随机树（总线/三态网络），8 个 driver"""
+    return random_net(size, rnd, n_drivers=8)
+
+
+GENERATORS = {
+    'chain': chain_net,
+    'htree': htree_net,
+    'star': star_net,
+    'random': random_net,
+    'multi_driver': multi_driver_net,
+}
+
+# 默认用例：(生成器, 每个 net 的节点数, net 个数)
+DEFAULT_CASES = [
+    ('chain', 2000, 20),
+    ('htree', 4096, 20),
+    ('star', 2000, 20),
+    ('random', 40, 2000),
+    ('random', 1000, 200),
+    ('multi_driver', 500, 50),
+]
+
+
+def make_dnets(kind, size, count, seed=0, first_net=1, first_inst=1000000):
+    """生成 count 个合成 net，返回 (DNet 列表, name_map)；引脚命名为 "实例编号:端口" """
+    rnd = random.Random(seed)
+    name_map = {}
+    nets = []
+    inst = first_inst
+    for k in range(first_net, first_net + count):
+        synth = GENERATORS[kind](size, rnd)
+        net_id = str(k)
+        name_map[net_id] = f"{kind}_{k}"
+        names = [f"{net_id}:{i}" for i in range(synth.n)]
+        conns = []
+        for node, direction, port in ([(d, 'I', 'Z') for d in synth.drivers] +
+                                      [(l, 'O', 'A') for l in synth.loads]):
+            name_map[str(inst)] = f"u{inst}"
+            names[node] = f"{inst}:{port}"
+            conns.append((names[node], direction))
+            inst += 1
+        caps = [(names[i], round(c, 5)) for i, c in enumerate(synth.caps)]
+        ress = [(names[u], names[v], round(r, 4)) for u, v, r in synth.edges]
+        nets.append(DNet(net_id, name_map[net_id], conns, caps, ress))
+    return nets, name_map
+
+
+def write_spef(path, nets, name_map):
+    """把 DNet 列表写成 SPEF（*NAME_MAP + *D_NET），供文件级流水线和 elmore_cpp 使用"""
+    with open(path, 'w') as f:
+        f.write('*SPEF "IEEE 1481-1998"\n*DESIGN "bench"\n*T_UNIT 1 NS\n*C_UNIT 1 FF\n*R_UNIT 1 OHM\n\n')
+        f.write('*NAME_MAP\n')
+        f.write(''.join(f"*{idx} {name}\n" for idx, name in name_map.items()))
+        f.write('\n')
+        for net in nets:
+            lines = [f"*D_NET *{net.net_id} {sum(c for _, c in net.caps):.5f}", '', '*CONN']
+            lines += [f"*I *{node} {direction} *C 0 0" for node, direction in net.conns]
+            lines += ['', '*CAP']
+            lines += [f"{i} *{node} {cap}" for i, (node, cap) in enumerate(net.caps, 1)]
+            lines += ['', '*RES']
+            lines += [f"{i} *{a} *{b} {r}" for i, (a, b, r) in enumerate(net.ress, 1)]
+            lines += ['*END', '', '']
+            f.write('\n'.join(lines))
+
+
+def write_netlist(path, nets, name_map):
+    """elmore_cpp 需要的 netlist_info：每个 net 的 Input（driver）/Output（load）引脚"""
+    with open(path, 'w') as f:
+        for net in nets:
+            names = real_pin_names(net, name_map)
+            f.write(f"Net name: {net.name}\n")
+            for node, direction in net.conns:
+                f.write(f"{'Input' if direction == 'I' else 'Output'}: {names[node]} (INV)\n")
+
+
+def _per_driver(tree_cls):
+    def run(nets):
+        out = []
+        for net in nets:
+            tree = fill_tree(net, tree_cls())
+            drivers, loads = split_pins(net)
+            for driver in drivers:
+                delays = tree.compute_delays_to_loads(driver, loads)
+                out.extend(np.nan if delays[l] is None else delays[l] for l in loads)
+        return np.array(out)
+    return run
+
+
+def _all_drivers(nets):
+    out = []
+    for net in nets:
+        tree = fill_tree(net, RCTree())
+        drivers, loads = split_pins(net)
+        delays = tree.compute_delays_all_drivers(drivers, loads)
+        for driver in drivers:
+            out.extend(np.nan if delays[driver][l] is None else delays[driver][l] for l in loads)
+    return np.array(out)
+
+
+def _forest(nets):
+    return np.concatenate([d['delay'] for _, d in iter_delay_batches(nets, 4096)] or [np.empty(0)])
+
+
+# 内存中的引擎：输入 DNet 列表，输出按 net / driver / load 顺序排列的时延数组
+BACKENDS = {
+    'py': _all_drivers,
+    'py_single': _per_driver(RCTree),
+    'array': _per_driver(RCTreeA),
+    'numpy': _per_driver(RCTreeM),
+    'forest': _forest,
+    'cpp': _per_driver(RCTreeCpp),
+}
+
+
+def _time(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _max_rel_err(result, reference):
+    if result.shape != reference.shape:
+        return float('inf')
+    if not np.array_equal(np.isnan(result), np.isnan(reference)):
+        return float('inf')
+    ok = ~np.isnan(reference)
+    diff = np.abs(result[ok] - reference[ok])
+    scale = np.maximum(np.abs(reference[ok]), 1e-300)
+    return float((diff / scale).max()) if ok.any() else 0.0
+
+
+def _file_pipeline(spef_path, out_dir):
+    """Python 文件级流水线：SpefReader + RCForest 批量计算 + 文本输出"""
+    with SpefReader(spef_path) as reader, \
+            open_delay_output(os.path.join(out_dir, 'py_file.txt')) as output:
+        write_delays(reader, reader.name_map, output, batch_size=4096)
+    return load_delays(os.path.join(out_dir, 'py_file.txt'))
+
+
+def _run_cpp_bin(cpp_bin, netlist_path, spef_path, out_dir, threads=None):
+    cmd = [cpp_bin, netlist_path, spef_path, out_dir] + ([str(threads)] if threads is not None else [])
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    base = os.path.splitext(os.path.basename(spef_path))[0]
+    return load_delays(os.path.join(out_dir, f"{base}.txt"))
+
+
+def _table_agrees(table, nets, name_map, reference, tol=1.5e-6):
+    """文件输出只有 6 位小数，按 (load, driver) 对齐后用绝对误差比较"""
+    expected = {}
+    i = 0
+    for net in nets:
+        names = real_pin_names(net, name_map)
+        drivers, loads = split_pins(net)
+        for driver in drivers:
+            for load in loads:
+                expected[(names[load], names[driver])] = reference[i]
+                i += 1
+    names = table.names.tolist()
+    got = {(names[l], names[d]): x for l, d, x in
+           zip(table.load.tolist(), table.driver.tolist(), table.delay.tolist())}
+    if got.keys() != expected.keys():
+        return False, float('inf')
+    err = max((abs(got[k] - v) for k, v in expected.items() if not np.isnan(v)), default=0.0)
+    return bool(err <= tol), float(err)
+
+
+def run_case(kind, size, count, backends, repeat, cpp_bin=None, cpp_threads=None, seed=0):
+    """运行一个用例，返回 {backend: {'seconds', 'nets_per_s', 'max_rel_err'/'max_abs_err', 'agree'}}"""
+    nets, name_map = make_dnets(kind, size, count, seed)
+    results = {}
+    reference = None
+    for name in backends:
+        if name == 'cpp' and not cpp_available():
+            print(f"  跳过 {name}：_elmore_cpp 扩展模块未编译")
+            continue
+        if name in BACKENDS:
+            seconds, delays = _time(lambda: BACKENDS[name](nets), repeat)
+            if reference is None:
+                reference = delays
+            err = _max_rel_err(delays, reference)
+            results[name] = {'seconds': seconds, 'nets_per_s': count / seconds,
+                             'max_rel_err': err, 'agree': bool(err <= 1e-9)}
+
+    file_backends = [name for name in backends if name in ('py_file', 'cpp_bin')]
+    if file_backends and reference is not None:
+        tmp = tempfile.mkdtemp(prefix='elmore_bench_')
+        try:
+            spef_path = os.path.join(tmp, 'bench.spef')
+            netlist_path = os.path.join(tmp, 'bench.netlist')
+            write_spef(spef_path, nets, name_map)
+            write_netlist(netlist_path, nets, name_map)
+            for name in file_backends:
+                if name == 'cpp_bin':
+                    if not cpp_bin or not os.path.exists(cpp_bin):
+                        print(f"  跳过 {name}：找不到 elmore_cpp 可执行文件，请用 --cpp-bin 指定"
+                              f"（已查找 {', '.join(CPP_BIN_CANDIDATES)}）")
+                        continue
+                    if not os.access(cpp_bin, os.X_OK):
+                        print(f"  跳过 {name}：{cpp_bin} 没有执行权限（chmod +x）")
+                        continue
+                    if os.path.getmtime(cpp_bin) < cpp_sources_mtime():
+                        print(f"  ⚠️ {cpp_bin} 比 elmore_cpp 源文件旧，结果可能来自过时的版本（请重新编译或用 --cpp-bin 指定）")
+                    fn = lambda: _run_cpp_bin(cpp_bin, netlist_path, spef_path, tmp, cpp_threads)
+                else:
+                    fn = lambda: _file_pipeline(spef_path, tmp)
+                seconds, table = _time(fn, repeat)
+                agree, err = _table_agrees(table, nets, name_map, reference)
+                results[name] = {'seconds': seconds, 'nets_per_s': count / seconds,
+                                 'max_abs_err': err, 'agree': agree}
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """与基线结果比较，耗时超过基线 (1 + threshold) 倍的记为回归，返回回归列表"""
+    regressions = []
+    for case, backends in results.items():
+        for name, entry in backends.items():
+            base = baseline.get(case, {}).get(name)
+            if base and entry['seconds'] > base['seconds'] * (1 + threshold):
+                regressions.append((case, name, base['seconds'], entry['seconds']))
+    return regressions
+
+
+def parse_case(text):
+    """命令行用例格式 kind:size:count，例如 chain:5000:10"""
+    kind, size, count = text.split(':')
+    if kind not in GENERATORS:
+        raise argparse.ArgumentTypeError(f"未知的生成器 {kind}，可选 {', '.join(GENERATORS)}")
+    return kind, int(size), int(count)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="合成 RC 树基准测试：比较各计算引擎的速度与结果一致性")
+    parser.add_argument('--case', type=parse_case, action='append', default=None,
+                        help="用例 kind:size:count（可重复），kind 为 " + '/'.join(GENERATORS))
+    parser.add_argument('--scale', type=float, default=1.0, help="默认用例的节点数缩放系数")
+    parser.add_argument('--backend', action='append', default=None,
+                        help="参与比较的引擎（可重复），可选 " + '/'.join(list(BACKENDS) + ['py_file', 'cpp_bin'])
+                             + "，第一个作为一致性检查的参考")
+    parser.add_argument('--repeat', type=int, default=3, help="每项重复次数，取最短时间")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cpp-bin', type=str, default=find_cpp_bin(),
+                        help="elmore_cpp 可执行文件路径（默认在 elmore_cpp/build 下的常见构建目录中"
+                             "取有执行权限且最新编译的一个）")
+    parser.add_argument('--cpp-threads', type=int, default=None, help="elmore_cpp 的线程数参数（不指定为串行模式）")
+    parser.add_argument('--output', type=str, default=None, help="结果 JSON 保存路径")
+    parser.add_argument('--baseline', type=str, default=None, help="基线结果 JSON，用于检查性能回归")
+    parser.add_argument('--threshold', type=float, default=0.2, help="回归阈值（相对基线变慢的比例）")
+    parser.add_argument('--write-spef', type=str, default=None,
+                        help="只生成合成 SPEF（以及同名 .netlist）到该路径，不做计时；使用第一个用例")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cases = args.case or [(kind, max(2, int(size * args.scale)), count) for kind, size, count in DEFAULT_CASES]
+
+    if args.write_spef:
+        nets, name_map = make_dnets(*cases[0], seed=args.seed)
+        write_spef(args.write_spef, nets, name_map)
+        write_netlist(os.path.splitext(args.write_spef)[0] + '.netlist', nets, name_map)
+        print(f"✅ 已生成 {len(nets)} 个 net 的合成 SPEF: {args.write_spef}")
+        sys.exit(0)
+
+    backends = args.backend or ['py', 'array', 'numpy', 'forest', 'cpp', 'py_file', 'cpp_bin']
+    results = {}
+    all_agree = True
+    for kind, size, count in cases:
+        case = f"{kind}:{size}:{count}"
+        print(f"用例 {case}")
+        results[case] = run_case(kind, size, count, backends, args.repeat,
+                                 args.cpp_bin, args.cpp_threads, args.seed)
+        for name, entry in results[case].items():
+            err = entry.get('max_rel_err', entry.get('max_abs_err'))
+            flag = '' if entry['agree'] else '  ❌ 结果不一致'
+            print(f"  {name:<10} {entry['seconds']:10.4f} 秒  {entry['nets_per_s']:12.1f} net/秒  误差 {err:.2e}{flag}")
+            all_agree &= entry['agree']
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"✅ 基准结果已保存到 {args.output}")
+
+    failed = not all_agree
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        for case, name, before, after in regressions:
+            print(f"⚠️ 性能回归 {case} {name}: {before:.4f} 秒 -> {after:.4f} 秒")
+        failed |= bool(regressions)
+        if not regressions:
+            print("与基线相比没有性能回归")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,142 @@
+import pytest
+from RCTree import RCTree
+from spefReader import SpefReader, fill_tree, split_pins
+
+# 测试用的小 SPEF：
+#   net_a 单 driver 的树，带一个指向 net_b 的耦合电容
+#   net_b 两个 driver 的树
+#   net_c *RES 成环
+#   net_d 两个互不相连的部分，各有一个 driver（跨部分的 driver/load 不可达）
+SMALL_SPEF = """*SPEF "IEEE 1481-1998"
+*DESIGN "top"
+*T_UNIT 1 NS
+*C_UNIT 1 FF
+*R_UNIT 1 OHM
+
+*NAME_MAP
+*1 net_a
+*2 net_b
+*3 net_c
+*4 net_d
+*101 u1
+*102 u2
+*103 u3
+*104 u4
+
+*D_NET *1 2.5
+
+*CONN
+*I *101:Z I *C 0 0 *L 0.001 *D INV
+*I *102:A O *C 0 0 *L 0.001 *D INV
+*I *103:A O *C 0 0 *L 0.001 *D INV
+
+*CAP
+1 *101:Z 0.1
+2 *1:1 0.4
+3 *1:2 0.3
+4 *102:A 0.2
+5 *103:A 0.5
+6 *1:2 *2:1 0.25
+
+*RES
+1 *101:Z *1:1 10.0
+2 *1:1 *1:2 20.0
+3 *1:2 *102:A 5.0
+4 *1:1 *103:A 40.0
+*END
+
+*D_NET *2 1.5
+
+*CONN
+*I *103:Z I *C 0 0 *L 0.001 *D INV
+*I *104:Z I *C 0 0 *L 0.001 *D INV
+*I *101:A O *C 0 0 *L 0.001 *D INV
+*I *102:B O *C 0 0 *L 0.001 *D INV
+
+*CAP
+1 *103:Z 0.05
+2 *2:1 0.3
+3 *2:2 0.2
+4 *104:Z 0.05
+5 *101:A 0.4
+6 *102:B 0.6
+
+*RES
+1 *103:Z *2:1 15.0
+2 *2:1 *2:2 25.0
+3 *2:2 *104:Z 8.0
+4 *2:1 *101:A 30.0
+5 *2:2 *102:B 12.0
+*END
+
+*D_NET *3 1.2
+
+*CONN
+*I *104:Y I *C 0 0 *L 0.001 *D INV
+*I *101:B O *C 0 0 *L 0.001 *D INV
+
+*CAP
+1 *3:1 0.3
+2 *3:2 0.3
+3 *101:B 0.6
+
+*RES
+1 *104:Y *3:1 10.0
+2 *3:1 *3:2 20.0
+3 *104:Y *3:2 30.0
+4 *3:2 *101:B 5.0
+*END
+
+*D_NET *4 1.0
+
+*CONN
+*I *101:Q I *C 0 0 *L 0.001 *D INV
+*I *103:Q I *C 0 0 *L 0.001 *D INV
+*I *102:C O *C 0 0 *L 0.001 *D INV
+*I *104:C O *C 0 0 *L 0.001 *D INV
+
+*CAP
+1 *4:1 0.2
+2 *102:C 0.3
+3 *4:2 0.4
+4 *104:C 0.1
+
+*RES
+1 *101:Q *4:1 7.0
+2 *4:1 *102:C 3.0
+3 *103:Q *4:2 11.0
+4 *4:2 *104:C 2.0
+*END
+"""
+
+
+@pytest.fixture
+def spef_text():
+    return SMALL_SPEF
+
+
+@pytest.fixture
+def spef_path(tmp_path, spef_text):
+    path = tmp_path / 'small.spef'
+    path.write_text(spef_text)
+    return str(path)
+
+
+@pytest.fixture
+def small_design(spef_path):
+    """(name_map, [DNet])"""
+    with SpefReader(spef_path) as reader:
+        return reader.name_map, list(reader)
+
+
+@pytest.fixture
+def reference_delays():
+    """
+    基准：每个 driver 用一棵新建的 RCTree 单独遍历得到的时延，
+    返回 {driver: {load: delay 或 None}}
+    """
+    def compute(net):
+        input_nodes, output_nodes = split_pins(net)
+        return {driver: fill_tree(net, RCTree()).compute_delays_to_loads(driver, output_nodes)
+                for driver in input_nodes}
+    return compute
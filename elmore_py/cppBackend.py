@@ -0,0 +1,78 @@
+import numpy as np
+from RCTree import RCTreeA
+
+# C++ 扩展由 elmore_cpp 的 CMake 编译（-DELMORE_BUILD_PYTHON=ON，默认开启），
+# 产物 _elmore_cpp*.so 直接输出到本目录
+try:
+    import _elmore_cpp
+except ImportError:
+    _elmore_cpp = None
+
+
+def cpp_available():
+    return _elmore_cpp is not None
+
+
+def cpp_parse_available():
+    # 旧版本编译出的扩展没有 parse_net_sections，需要重新编译
+    return hasattr(_elmore_cpp, 'parse_net_sections')
+
+
+def _require_cpp():
+    if _elmore_cpp is None:
+        raise ImportError("未找到 _elmore_cpp 扩展，请先编译："
+                          "cmake -S elmore_cpp -B elmore_cpp/build-py && cmake --build elmore_cpp/build-py")
+    return _elmore_cpp
+
+
+def process_file(spef_path, netlist_path, output_dir, threads=None):
+    """
+    用 C++ 流程处理整个 SPEF（按 netlist_info 选择输入/输出引脚）。
+    threads 不为 None 时使用 mmap + 多线程模式，0 表示使用全部核心
+    """
+    if threads is None:
+        _require_cpp().process_file(spef_path, netlist_path, output_dir)
+    else:
+        _require_cpp().process_file(spef_path, netlist_path, output_dir, threads)
+
+
+def parse_net_sections(cap_text, res_text, pins, coupling_factor=1.0):
+    """
+    C++ 解析一个 D_NET 的 *CAP/*RES 段：节点名整数化、数值列 strtod 都在 C++ 中完成，
+    返回 (nodes, pins, cap, edge_u, edge_v, edge_r)，数组为 int64 / float64（可写，不再拷贝）
+    """
+    nodes, pins, cap, edge_u, edge_v, edge_r = _require_cpp().parse_net_sections(
+        cap_text, res_text, pins, coupling_factor)
+    return (nodes, np.frombuffer(pins, dtype=np.int64), np.frombuffer(cap, dtype=np.float64),
+            np.frombuffer(edge_u, dtype=np.int64), np.frombuffer(edge_v, dtype=np.int64),
+            np.frombuffer(edge_r, dtype=np.float64))
+
+
+def net_delays(edge_u, edge_v, edge_r, cap, driver, loads, out=None, apply_ln2=False):
+    """
+    单个 net 的 C++ Elmore 计算。edge_u/edge_v/loads 为 int32、edge_r/cap 为 float64 的
+    连续 buffer，直接按地址读取不拷贝；结果写入 out（未给出时新建），不连通的 load 为 -1
+    """
+    if out is None:
+        out = np.empty(len(loads), dtype=np.float64)
+    return _require_cpp().net_delays(edge_u, edge_v, edge_r, cap, driver, loads, out, apply_ln2)
+
+
+class RCTreeCpp(RCTreeA):
+    """
+    C++ 后端的 RC 树：建树与 RCTreeA 相同（整数化节点 + array 缓冲区），
+    计算时把缓冲区直接交给 C++ 引擎
+    """
+    def __init__(self, r_unit=1.0, c_unit=1.0):
+        _require_cpp()
+        super().__init__(r_unit, c_unit)
+
+    def compute_delays_to_loads(self, driver, loads, apply_ln2=False):
+        driver_idx = self.node_index.get(driver)
+        if driver_idx is None:
+            return {load: None for load in loads}
+
+        load_idx = np.array([self.node_index.get(load, -1) for load in loads], dtype=np.int32)
+        out = net_delays(self.edge_u, self.edge_v, self.edge_r, self.cap, driver_idx, load_idx,
+                         apply_ln2=apply_ln2)
+        return {load: (None if delay < 0 else delay) for load, delay in zip(loads, out.tolist())}
@@ -0,0 +1,305 @@
+import gzip
+import shutil
+from array import array
+from collections import namedtuple
+import numpy as np
+from meshSolver import METHODS
+
+# --format 可选的输出格式及对应的文件后缀
+OUTPUT_FORMATS = ('txt', 'npy', 'csv-gz')
+OUTPUT_SUFFIX = {'txt': '.txt', 'npy': '.npz', 'csv-gz': '.csv.gz'}
+CSV_HEADER = "load,driver,delay,method\n"
+# 没有求解方式时 csv 中 method 列的占位值
+UNKNOWN_METHOD = '-'
+
+# load_delays 的结果：names 为去重后的引脚名表，load/driver 为其中的下标，
+# method 为每行所属 net 的求解方式（文本格式或旧文件中没有时为 None）
+DelayTable = namedtuple('DelayTable', ['names', 'load', 'driver', 'delay', 'method'], defaults=(None,))
+
+
+class DelayOutput:
+    """
+    时延输出的公共接口：write_rows 逐批写入 (load, driver, delay)，close 时落盘。
+    methods 为每行所属 net 的求解方式（meshSolver.METHODS），net_methods 为这些行来自的
+    各个 net 的求解方式，按方式累计到 method_counts（没有输出行的 net 也计入）
+    """
+
+    def __init__(self):
+        self.method_counts = dict.fromkeys(METHODS, 0)
+
+    def count_methods(self, net_methods):
+        counts = self.method_counts
+        for method in net_methods:
+            counts[method] += 1
+
+    def write_rows(self, loads, drivers, delays, methods=None, net_methods=()):
+        raise NotImplementedError
+
+    def write_corner_rows(self, loads, drivers, delays, methods=None, net_methods=()):
+        """多 corner 模式：delays 为 (行数, corner 数) 数组，每个 corner 一列"""
+        raise NotImplementedError
+
+    def copy_from(self, path):
+        """把同格式的另一个输出文件（例如并行模式的分块文件）追加到本输出"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class TextDelayOutput(DelayOutput):
+    """
+    原有的文本格式，每行 "load driver delay"（求解方式只计入 method_counts，不写入文件）。
+    格式化后的行先攒在内存里，累计到 buffer_size 个字符才写一次文件
+    """
+    # 子类（csv）在每行末尾追加 method 列
+    write_methods = False
+
+    def __init__(self, target, buffer_size=1 << 20, sep=' ', header=None, opener=open):
+        super().__init__()
+        # target 可以是路径，也可以是已打开的文本文件（例如 sys.stdout，不负责关闭）
+        self._own = isinstance(target, str)
+        self.file = opener(target, 'wt') if self._own else target
+        self.buffer_size = buffer_size
+        self.sep = sep
+        self._buffer = []
+        self._buffered = 0
+        if header:
+            self._buffer.append(header)
+
+    def _method_column(self, methods, count):
+        if methods is None:
+            methods = [UNKNOWN_METHOD] * count
+        return [f"{self.sep}{method}\n" for method in methods]
+
+    def write_rows(self, loads, drivers, delays, methods=None, net_methods=()):
+        self.count_methods(net_methods)
+        sep = self.sep
+        if self.write_methods:
+            ends = self._method_column(methods, len(delays))
+            chunk = ''.join([f"{load}{sep}{driver}{sep}{delay:.6f}{end}"
+                             for load, driver, delay, end in zip(loads, drivers, delays, ends)])
+        else:
+            chunk = ''.join([f"{load}{sep}{driver}{sep}{delay:.6f}\n"
+                             for load, driver, delay in zip(loads, drivers, delays)])
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write_corner_rows(self, loads, drivers, delays, methods=None, net_methods=()):
+        self.count_methods(net_methods)
+        sep = self.sep
+        ends = self._method_column(methods, len(delays)) if self.write_methods else ["\n"] * len(delays)
+        chunk = ''.join([f"{load}{sep}{driver}{sep}" + sep.join([f"{d:.6f}" for d in row]) + end
+                         for load, driver, row, end in zip(loads, drivers, delays.tolist(), ends)])
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.file.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def copy_from(self, path):
+        self.flush()
+        with open(path, 'r') as part:
+            shutil.copyfileobj(part, self.file, 1 << 20)
+
+    def close(self):
+        self.flush()
+        if self._own:
+            self.file.close()
+
+
+class CsvGzDelayOutput(TextDelayOutput):
+    """
+    gzip 压缩的 CSV（load,driver,delay,method），header=False 时不写表头（用于并行分块）；
+    多 corner 模式下表头为 load,driver,<corner 名>...,method
+    """
+    write_methods = True
+
+    def __init__(self, path, buffer_size=1 << 20, header=True, corners=None):
+        if corners:
+            header_line = ','.join(['load', 'driver'] + list(corners) + ['method']) + '\n'
+        else:
+            header_line = CSV_HEADER
+        super().__init__(path, buffer_size, sep=',', header=header_line if header else None,
+                         opener=gzip.open)
+
+    def copy_from(self, path):
+        self.flush()
+        with gzip.open(path, 'rt') as part:
+            shutil.copyfileobj(part, self.file, 1 << 20)
+
+
+class NpyDelayOutput(DelayOutput):
+    """
+    二进制格式（.npz）：delay 为 float64 数组，load/driver 为 int32 下标，
+    指向去重后的引脚名表 names。时延不做 6 位小数截断。
+    method 为 int8 数组，指向求解方式名表 methods（-1 表示未知）。
+    多 corner 模式下 delay 为 (行数, corner 数)，corner 名保存在 corners 中
+    """
+    def __init__(self, path, corners=None):
+        super().__init__()
+        self.path = path
+        self.corners = list(corners) if corners else None
+        self.index = {}
+        self.load = array('i')
+        self.driver = array('i')
+        self.delay = array('d')
+        self.method = array('b')
+        self._method_code = {method: code for code, method in enumerate(METHODS)}
+
+    def _add_methods(self, methods, count):
+        if methods is None:
+            self.method.extend([-1] * count)
+        else:
+            code = self._method_code
+            self.method.extend([code.get(method, -1) for method in methods])
+
+    def _intern_all(self, names):
+        intern = self.index.setdefault
+        index = self.index
+        return [intern(str(name), len(index)) for name in names]
+
+    def write_rows(self, loads, drivers, delays, methods=None, net_methods=()):
+        self.count_methods(net_methods)
+        self.load.extend(self._intern_all(loads))
+        self.driver.extend(self._intern_all(drivers))
+        self.delay.extend(delays)
+        self._add_methods(methods, len(delays))
+
+    def write_corner_rows(self, loads, drivers, delays, methods=None, net_methods=()):
+        self.count_methods(net_methods)
+        self.load.extend(self._intern_all(loads))
+        self.driver.extend(self._intern_all(drivers))
+        self.delay.frombytes(np.ascontiguousarray(delays, dtype=np.float64).tobytes())
+        self._add_methods(methods, len(delays))
+
+    def append_table(self, table):
+        mapping = np.array(self._intern_all(table.names.tolist()), dtype=np.int32)
+        self.load.extend(mapping[table.load].tolist())
+        self.driver.extend(mapping[table.driver].tolist())
+        self.delay.extend(table.delay.tolist())
+        self._add_methods(None if table.method is None else table.method.tolist(), len(table.load))
+
+    def copy_from(self, path):
+        self.append_table(load_delays(path, 'npy'))
+
+    def close(self):
+        delay = np.frombuffer(self.delay, dtype=np.float64)
+        extra = {}
+        if self.corners:
+            delay = delay.reshape(-1, len(self.corners))
+            extra['corners'] = np.array(self.corners, dtype=str)
+        # 传入文件对象，避免 np.savez 自动追加 .npz 后缀
+        with open(self.path, 'wb') as f:
+            np.savez(f,
+                     names=np.array(list(self.index), dtype=str),
+                     load=np.frombuffer(self.load, dtype=np.int32),
+                     driver=np.frombuffer(self.driver, dtype=np.int32),
+                     delay=delay,
+                     method=np.frombuffer(self.method, dtype=np.int8),
+                     methods=np.array(METHODS, dtype=str), **extra)
+
+
+def open_delay_output(target, fmt='txt', header=True, corners=None):
+    """按格式创建输出对象；header 只对 csv-gz 有效，corners 为多 corner 模式的列名"""
+    if fmt == 'txt':
+        return TextDelayOutput(target)
+    if fmt == 'csv-gz':
+        return CsvGzDelayOutput(target, header=header, corners=corners)
+    if fmt == 'npy':
+        return NpyDelayOutput(target, corners)
+    raise ValueError(f"不支持的输出格式: {fmt}")
+
+
+def format_of(path):
+    """按文件后缀判断格式"""
+    if path.endswith('.npz'):
+        return 'npy'
+    if path.endswith('.csv.gz'):
+        return 'csv-gz'
+    return 'txt'
+
+
+def _iter_text_blocks(f, size=1 << 24):
+    """按块读取文本文件，每块都截断在行尾，内存只与块大小有关"""
+    rest = ''
+    for block in iter(lambda: f.read(size), ''):
+        block = rest + block
+        cut = block.rfind('\n') + 1
+        rest = block[cut:]
+        if cut:
+            yield block[:cut]
+    if rest:
+        yield rest
+
+
+def _corner_column(corner, names, path):
+    # corner 可以是列序号，也可以是 corner 名（需要 csv 表头或 npz 中的 corners）
+    if isinstance(corner, int):
+        return corner
+    if corner not in names:
+        raise ValueError(f"{path} 中没有 corner {corner}")
+    return names.index(corner)
+
+
+def load_delays(path, fmt=None, corner=0):
+    """
+    读取任意格式的时延文件，返回 DelayTable（文本格式按块流式解析）。
+    多 corner 文件（每行多列时延）只取 corner 指定的那一列；
+    npz 与带 method 列的 csv 同时读出每行的求解方式（未知为 '-'）
+    """
+    fmt = fmt or format_of(path)
+    if fmt == 'npy':
+        with np.load(path) as data:
+            delay = data['delay']
+            if delay.ndim == 2:
+                names = data['corners'].tolist() if 'corners' in data else []
+                delay = delay[:, _corner_column(corner, names, path)]
+            method = None
+            if 'method' in data:
+                labels = np.append(data['methods'], UNKNOWN_METHOD)
+                method = labels[data['method']]
+            return DelayTable(data['names'], data['load'], data['driver'], delay, method)
+
+    index = {}
+    intern = index.setdefault
+    load, driver, delays, methods = array('i'), array('i'), [], []
+    with (gzip.open(path, 'rt') if fmt == 'csv-gz' else open(path, 'r')) as f:
+        first = f.readline()
+        width = len(first.replace(',', ' ').split()) or 3
+        header = first.strip().split(',') if fmt == 'csv-gz' else []
+        if header[:2] != ['load', 'driver']:
+            header = []
+            f.seek(0)
+        # 最后一列为 method 时单独读出，不参与 corner 编号
+        has_method = header[-1:] == ['method']
+        corner_names = header[2:-1] if has_method else header[2:]
+        column = 2 + _corner_column(corner, corner_names, path)
+        for block in _iter_text_blocks(f):
+            tokens = block.replace(',', ' ').split() if fmt == 'csv-gz' else block.split()
+            if width < 3 or len(tokens) % width:
+                raise ValueError(f"{path} 不是 {width} 列的时延文件")
+            load.extend([intern(name, len(index)) for name in tokens[0::width]])
+            driver.extend([intern(name, len(index)) for name in tokens[1::width]])
+            delays.append(np.array(tokens[column::width], dtype=np.float64))
+            if has_method:
+                methods.extend(tokens[width - 1::width])
+
+    return DelayTable(np.array(list(index), dtype=str),
+                      np.frombuffer(load, dtype=np.int32),
+                      np.frombuffer(driver, dtype=np.int32),
+                      np.concatenate(delays) if delays else np.empty(0),
+                      np.array(methods, dtype=str) if has_method else None)
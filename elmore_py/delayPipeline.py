@@ -0,0 +1,139 @@
+import queue
+import threading
+from time import perf_counter
+from RCForest import *
+from delayWriter import *
+
+# 队列结束标记
+_DONE = object()
+
+
+class _Stop(Exception):
+    """其它阶段出错时用于结束当前阶段"""
+
+
+def _put(q, item, stop):
+    # 队列满时阻塞（背压），同时定期检查其它阶段是否已经出错
+    while True:
+        if stop.is_set():
+            raise _Stop()
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def _get(q, stop):
+    while True:
+        if stop.is_set():
+            raise _Stop()
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+
+class _Stage(threading.Thread):
+    """运行 target(*args)，出错时记录异常并通知其它阶段停止"""
+    def __init__(self, name, stop, target, *args):
+        super().__init__(name=name, daemon=True)
+        self.stop = stop
+        self.target = target
+        self.args = args
+        self.error = None
+
+    def run(self):
+        try:
+            self.target(*self.args)
+        except _Stop:
+            pass
+        except BaseException as exc:
+            self.error = exc
+            self.stop.set()
+
+
+def _read_stage(nets, parse_q, stop, group_size, profiler):
+    group = []
+    it = iter(nets)
+    while True:
+        if profiler is not None:
+            start = perf_counter()
+        net = next(it, _DONE)
+        if profiler is not None:
+            profiler.add_time('parse', perf_counter() - start)
+        if net is _DONE:
+            break
+        group.append(net)
+        if len(group) >= group_size:
+            _put(parse_q, group, stop)
+            group = []
+    if group:
+        _put(parse_q, group, stop)
+    _put(parse_q, _DONE, stop)
+
+
+def _iter_queue(parse_q, stop):
+    while True:
+        group = _get(parse_q, stop)
+        if group is _DONE:
+            return
+        yield from group
+
+
+def _compute_stage(parse_q, write_q, stop, name_map, batch_size, backend, profiler, memo, counter):
+    nets = _iter_queue(parse_q, stop)
+    if batch_size:
+        for forest, delays in iter_delay_batches(nets, batch_size, profiler=profiler):
+            counter[0] += len(forest)
+            _put(write_q, batch_delay_rows(forest, delays, name_map), stop)
+    else:
+        for net in nets:
+            counter[0] += 1
+            _put(write_q, net_delay_rows(net, name_map, backend, profiler, memo), stop)
+    _put(write_q, _DONE, stop)
+
+
+def pipeline_delays(nets, name_map, output, batch_size=None, backend='py', profiler=None, memo=None,
+                    queue_depth=8, group_size=64):
+    """
+    与 write_delays 相同的计算与输出，但解析、计算、写出分别在三个阶段中重叠进行：
+    读取线程 -> 解析队列 -> 计算线程 -> 写出队列 -> 当前线程写出。
+    两个队列都最多容纳 queue_depth 项（解析队列每项 group_size 个 net），
+    队列满时上游阻塞，内存占用由队列深度决定。返回处理的 net 数
+    """
+    stop = threading.Event()
+    parse_q = queue.Queue(maxsize=queue_depth)
+    write_q = queue.Queue(maxsize=queue_depth)
+    counter = [0]
+    stages = [
+        _Stage('spef-reader', stop, _read_stage, nets, parse_q, stop, group_size, profiler),
+        _Stage('elmore-compute', stop, _compute_stage, parse_q, write_q, stop, name_map,
+               batch_size, backend, profiler, memo, counter),
+    ]
+    for stage in stages:
+        stage.start()
+
+    try:
+        while True:
+            rows = _get(write_q, stop)
+            if rows is _DONE:
+                break
+            if profiler is None:
+                output.write_rows(*rows)
+            else:
+                with profiler.phase('write'):
+                    output.write_rows(*rows)
+    except _Stop:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for stage in stages:
+            stage.join()
+
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
+    return counter[0]
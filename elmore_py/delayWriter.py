@@ -0,0 +1,141 @@
+from math import nan
+from time import perf_counter
+import numpy as np
+from RCTree import *
+from RCForest import *
+from spefReader import *
+from cppBackend import RCTreeCpp
+from delayOutput import *
+from meshSolver import has_loop, mesh_delays
+
+# --backend 可选的计算引擎
+BACKENDS = {
+    'py': RCTree,        # 纯 Python（dict 实现，支持换根一次算出所有 driver）
+    'array': RCTreeA,    # 紧凑数组版（CSR + array 缓冲区），适合大量小 net
+    'numpy': RCTreeM,    # NumPy 稀疏逐层向量化，适合大 net
+    'cpp': RCTreeCpp,    # elmore_cpp 编译出的扩展模块
+}
+
+
+def net_delay_rows(net, name_map, backend='py', profiler=None, memo=None):
+    """
+    计算一个 D_NET 中每个输入节点到所有输出节点的时延，返回
+    (loads, drivers, delays, methods, net_methods)（即 DelayOutput.write_rows 的参数），
+    methods 为每行的求解方式，net_methods 为 [本 net 的求解方式]；
+    不可达的输出节点时延为 nan，与批量模式一致。
+    profiler 为 netProfiler.RunProfiler 时记录建树/计算耗时、该 net 的规模和求解方式；
+    memo 为 netMemo.DelayMemo 时先按规范哈希查缓存，命中则不建树。
+    *RES 成环的 net 改用 meshSolver 的电导矩阵求解。成环的判定对所有后端相同（整个 net，
+    即 has_loop）：RCTree 在遍历中顺带得出（几乎没有额外开销），其它后端先用 has_loop 检查
+    """
+    if profiler is not None:
+        start = perf_counter()
+    raw_to_real_name = real_pin_names(net, name_map)
+    input_nodes, output_nodes = split_pins(net)
+    all_delays = None
+    method = 'memo'
+    if memo is not None:
+        key = memo.key(net)
+        all_delays = memo.get(key, net)
+    if profiler is not None:
+        built = perf_counter()
+
+    if all_delays is None:
+        rctree = BACKENDS[backend]()
+        looped = False if hasattr(rctree, 'loop_detected') else has_loop(net)
+        if not looped:
+            fill_tree(net, rctree)
+            if profiler is not None:
+                built = perf_counter()
+            if len(input_nodes) > 1 and hasattr(rctree, 'compute_delays_all_drivers'):
+                # 多个 driver：一次遍历加换根求出所有输入节点到所有输出节点的时延；
+                # 单个 driver 时直接遍历更快
+                all_delays = rctree.compute_delays_all_drivers(input_nodes, output_nodes)
+            else:
+                all_delays = {input_node: rctree.compute_delays_to_loads(input_node, output_nodes)
+                              for input_node in input_nodes}
+            looped = getattr(rctree, 'loop_detected', False)
+            if looped is None:
+                looped = has_loop(net)
+        method = 'mesh' if looped else 'tree'
+        if looped:
+            all_delays = mesh_delays(net, input_nodes, output_nodes)
+        if memo is not None:
+            memo.put(key, net, all_delays)
+    if profiler is not None:
+        computed = perf_counter()
+        profiler.add_time('build', built - start)
+        profiler.add_time('compute', computed - built)
+        profiler.add_net(net, len(input_nodes), len(output_nodes), computed - start, method)
+
+    loads, drivers, values = [], [], []
+    for input_node in input_nodes:
+        input_name = raw_to_real_name.get(input_node)
+        delays = all_delays[input_node]
+        loads.extend(raw_to_real_name.get(load_node) for load_node in delays)
+        drivers.extend([input_name] * len(delays))
+        values.extend([nan if delay is None else delay for delay in delays.values()])
+    return loads, drivers, values, [method] * len(values), [method]
+
+
+def write_net_delays(net, name_map, output, backend='py', profiler=None, memo=None):
+    """计算一个 D_NET 的时延并写入 output（DelayOutput）"""
+    rows = net_delay_rows(net, name_map, backend, profiler, memo)
+    if profiler is None:
+        output.write_rows(*rows)
+    else:
+        with profiler.phase('write'):
+            output.write_rows(*rows)
+
+
+def batch_delay_rows(forest, delays, name_map):
+    """
+    一个 RCForest 批次的结果转成 (loads, drivers, delays, methods, net_methods)，
+    行顺序与 net_delay_rows 相同，求解方式取自 forest.net_methods
+    """
+    pin_name = {}
+    for idx in np.unique(np.concatenate([delays['driver'], delays['load']])).tolist():
+        raw_node = forest.node_names[idx]
+        name = None
+        if ':' in raw_node:
+            name_id, port = raw_node.split(':')
+            mapped = name_map.get(name_id)
+            if mapped:
+                name = f"{mapped}/{port}"
+        pin_name[idx] = name
+
+    return ([pin_name[load] for load in delays['load'].tolist()],
+            [pin_name[driver] for driver in delays['driver'].tolist()],
+            delays['delay'].tolist(),
+            forest.net_methods[delays['net'] - forest.first_net].tolist(),
+            forest.net_methods.tolist())
+
+
+def write_batch_delays(forest, delays, name_map, output):
+    """写出一个 RCForest 批次的结果"""
+    output.write_rows(*batch_delay_rows(forest, delays, name_map))
+
+
+def write_delays(nets, name_map, output, batch_size=None, backend='py', profiler=None, memo=None):
+    """
+    计算并写出一串 D_NET 的时延，返回处理的 net 数（批量模式固定使用 RCForest）。
+    profiler 不为 None 时额外统计解析、建树、计算、写出各阶段的耗时；
+    memo（netMemo.DelayMemo）只用于逐个 net 计算的模式
+    """
+    count = 0
+    if profiler is not None:
+        nets = profiler.timed(nets, 'parse')
+    if batch_size:
+        # 批量模式：每 batch_size 个 net 打包成一个森林一起计算
+        for forest, delays in iter_delay_batches(nets, batch_size, profiler=profiler):
+            count += len(forest)
+            if profiler is None:
+                write_batch_delays(forest, delays, name_map, output)
+            else:
+                with profiler.phase('write'):
+                    write_batch_delays(forest, delays, name_map, output)
+    else:
+        for net in nets:
+            count += 1
+            write_net_delays(net, name_map, output, backend, profiler, memo)
+    return count
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from array import array
+import numpy as np
+from spefReader import *
+
+CACHE_VERSION = 3
+
+# 缓存目录中每个条目保存的数组，布局与 spefReader.NetArrays 相同（耦合电容已按 1 倍接地）
+#   *_blob: 以 '\n' 连接的 utf-8 字符串表；*_offsets: 每个 net 的起止下标（长度 n_nets+1）
+ARRAY_NAMES = [
+    'map_ids_blob', 'map_names_blob',
+    'net_ids_blob', 'net_names_blob',
+    'node_blob', 'node_blob_offsets', 'node_offsets', 'node_cap',
+    'conn_node', 'conn_dir', 'conn_offsets',
+    'res_u', 'res_v', 'res_value', 'res_offsets',
+]
+
+
+def spef_cache_key(spef_path, mode='mtime'):
+    """
+    缓存键：mode='mtime' 用 路径+大小+修改时间（开销为零），
+    mode='hash' 对文件内容做哈希（文件被复制/touch 后仍可命中）
+    """
+    stat = os.stat(spef_path)
+    h = hashlib.blake2b(digest_size=16)
+    if mode == 'hash':
+        with open(spef_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 24), b''):
+                h.update(block)
+        h.update(str(stat.st_size).encode())
+    else:
+        h.update(f"{os.path.abspath(spef_path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return f"{mode}-{h.hexdigest()}"
+
+
+def _blob(strings):
+    return np.frombuffer('\n'.join(strings).encode(), dtype=np.uint8)
+
+
+def _split_blob(blob):
+    text = blob.tobytes().decode()
+    return text.split('\n') if text else []
+
+
+def build_design_arrays(spef_path):
+    """完整解析一次 SPEF（块解析，见 SpefReader.iter_arrays），把 name map 和每个 net 的 NetArrays 拼接成整块数组"""
+    node_blob = bytearray()
+    node_blob_offsets = array('q', [0])
+    node_offsets, conn_offsets, res_offsets = array('q', [0]), array('q', [0]), array('q', [0])
+    node_cap, conn_node, conn_dir = [], [], bytearray()
+    res_u, res_v, res_value = [], [], []
+    net_ids, net_names = [], []
+
+    with SpefReader(spef_path) as reader:
+        name_map = reader.name_map
+        for net in reader.iter_arrays():
+            node_blob += ''.join(node + '\n' for node in net.nodes).encode()
+            node_blob_offsets.append(len(node_blob))
+            node_offsets.append(node_offsets[-1] + len(net.nodes))
+            node_cap.append(net.cap)
+            conn_node.append(net.pins)
+            conn_dir += bytes(ord(direction[0]) if direction else 0 for _, direction in net.conns)
+            conn_offsets.append(len(conn_dir))
+            res_u.append(net.edge_u)
+            res_v.append(net.edge_v)
+            res_value.append(net.edge_r)
+            res_offsets.append(res_offsets[-1] + len(net.edge_u))
+            net_ids.append(net.net_id)
+            net_names.append(net.name)
+
+    def joined(parts, dtype):
+        return np.concatenate(parts).astype(dtype, copy=False) if parts else np.zeros(0, dtype=dtype)
+
+    return {
+        'map_ids_blob': _blob(name_map.keys()),
+        'map_names_blob': _blob(name_map.values()),
+        'net_ids_blob': _blob(net_ids),
+        'net_names_blob': _blob(net_names),
+        'node_blob': np.frombuffer(bytes(node_blob), dtype=np.uint8),
+        'node_blob_offsets': np.frombuffer(node_blob_offsets, dtype=np.int64),
+        'node_offsets': np.frombuffer(node_offsets, dtype=np.int64),
+        'node_cap': joined(node_cap, np.float64),
+        'conn_node': joined(conn_node, np.int64),
+        'conn_dir': np.frombuffer(bytes(conn_dir), dtype=np.uint8),
+        'conn_offsets': np.frombuffer(conn_offsets, dtype=np.int64),
+        'res_u': joined(res_u, np.int64),
+        'res_v': joined(res_v, np.int64),
+        'res_value': joined(res_value, np.float64),
+        'res_offsets': np.frombuffer(res_offsets, dtype=np.int64),
+    }
+
+
+class CachedDesign:
+    """
+    从缓存目录内存映射加载的设计，接口与 SpefReader 相同：
+    name_map 属性 + 迭代产出 NetArrays，其中的数组都是内存映射文件的切片（零拷贝），
+    只有节点名需要从字符串表解码
+    """
+    def __init__(self, entry_dir):
+        self.entry_dir = entry_dir
+        self.arrays = {
+            name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode='r')
+            for name in ARRAY_NAMES
+        }
+        a = self.arrays
+        self.name_map = dict(zip(_split_blob(a['map_ids_blob']), _split_blob(a['map_names_blob'])))
+        self.net_ids = _split_blob(a['net_ids_blob'])
+        self.net_names = _split_blob(a['net_names_blob'])
+        # 偏移表很小，转成 list 后每个 net 取切片边界不再经过 NumPy 标量
+        self._offsets = {name: a[name].tolist() for name in
+                         ('node_blob_offsets', 'node_offsets', 'conn_offsets', 'res_offsets')}
+
+    def __len__(self):
+        return len(self.net_ids)
+
+    def node_names(self, i):
+        offsets = self._offsets['node_blob_offsets']
+        # 每个节点名都以 '\n' 结尾
+        return bytes(self.arrays['node_blob'][offsets[i]:offsets[i + 1]]).decode().split('\n')[:-1]
+
+    def net_arrays(self, i):
+        """第 i 个 net 的 NetArrays（pins/cap/edge_u/edge_v/edge_r 为零拷贝视图）"""
+        a, o = self.arrays, self._offsets
+        names = self.node_names(i)
+        n0, n1 = o['node_offsets'][i], o['node_offsets'][i + 1]
+        c0, c1 = o['conn_offsets'][i], o['conn_offsets'][i + 1]
+        r0, r1 = o['res_offsets'][i], o['res_offsets'][i + 1]
+        pins = a['conn_node'][c0:c1]
+        conns = [(names[n], chr(d)) for n, d in zip(pins.tolist(), a['conn_dir'][c0:c1].tolist())]
+        return NetArrays(self.net_ids[i], self.net_names[i], conns, pins, names, a['node_cap'][n0:n1],
+                         a['res_u'][r0:r1], a['res_v'][r0:r1], a['res_value'][r0:r1])
+
+    def net(self, i):
+        """重建第 i 个 DNet（电容为每个节点接地后的总电容，没有单独的耦合电容项）"""
+        v = self.net_arrays(i)
+        names = v.nodes
+        caps = [(names[n], c) for n, c in enumerate(v.cap.tolist()) if c]
+        ress = [(names[u], names[w], r) for u, w, r in
+                zip(v.edge_u.tolist(), v.edge_v.tolist(), v.edge_r.tolist())]
+        return DNet(v.net_id, v.name, v.conns, caps, ress)
+
+    def __iter__(self):
+        for i in range(len(self.net_ids)):
+            yield self.net_arrays(i)
+
+    def close(self):
+        self.arrays = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def evict_cache(cache_dir, max_bytes, keep=None):
+    """按最近使用时间淘汰缓存条目，直到总大小不超过 max_bytes"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if os.path.isdir(path) and not name.startswith('.'):
+            entries.append((os.path.getmtime(path), _dir_size(path), name, path))
+    total = sum(size for _, size, _, _ in entries)
+    for _, size, name, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+    return total
+
+
+def _entry_ready(entry_dir):
+    """entry_dir 是否为当前版本的完整缓存条目（meta.json 与数组一起写在临时目录中，整体原子改名）"""
+    try:
+        with open(os.path.join(entry_dir, 'meta.json')) as f:
+            return json.load(f).get('version') == CACHE_VERSION
+    except (OSError, ValueError):
+        return False
+
+
+def open_design(spef_path, cache_dir, key_mode='mtime', max_bytes=None):
+    """
+    有缓存则直接内存映射加载，否则解析 SPEF 并写入缓存后再加载。
+    max_bytes 为缓存目录的大小上限（按最近使用淘汰）
+    """
+    key = spef_cache_key(spef_path, key_mode)
+    entry_dir = os.path.join(cache_dir, key)
+
+    if _entry_ready(entry_dir):
+        os.utime(entry_dir)  # 记录最近使用时间
+        return CachedDesign(entry_dir)
+    # 旧版本或残缺（没有有效 meta.json）的条目
+    shutil.rmtree(entry_dir, ignore_errors=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = os.path.join(cache_dir, f".{key}.{os.getpid()}.tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        for name, arr in build_design_arrays(spef_path).items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), arr)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump({
+                'version': CACHE_VERSION,
+                'spef': os.path.abspath(spef_path),
+                'key': key,
+                'created': time.time(),
+            }, f, indent=4)
+        try:
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # 目标目录非空：另一个进程在本次解析期间写好了同一条目，直接使用它、丢弃本次结果；
+            # 否则是残缺的条目，删除后再替换
+            if not _entry_ready(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(tmp_dir, entry_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if max_bytes is not None:
+        evict_cache(cache_dir, max_bytes, keep=key)
+    return CachedDesign(entry_dir)
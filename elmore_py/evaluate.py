@@ -1,8 +1,23 @@
+import argparse
 import os
-import matplotlib.pyplot as plt
+from collections import namedtuple
+import numpy as np
+from delayOutput import DelayTable, load_delays, format_of
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+# join_delays 的结果：load/driver 为 names 中的下标，calc/golden 为两边的时延
+JoinedDelays = namedtuple('JoinedDelays', ['names', 'load', 'driver', 'calc', 'golden',
+                                           'only_calc', 'only_golden'])
+
 
 def read_delays_from_file(file_path):
-    """从文件中读取时延数据并返回字典格式"""
+    """从文件中读取时延数据并返回字典格式（.npz/.csv.gz 由 delayOutput.load_delays 读取）"""
+    if format_of(file_path) != 'txt':
+        table = load_delays(file_path)
+        names = table.names.tolist()
+        return {(names[load], names[driver]): delay for load, driver, delay in
+                zip(table.load.tolist(), table.driver.tolist(), table.delay.tolist())}
     delays = {}
     with open(file_path, 'r') as f:
         for line in f:
@@ -15,75 +30,201 @@ def read_delays_from_file(file_path):
                 delays[(input_node, output_node)] = delay
     return delays
 
-def compare_delays_and_save(calculated_delays, golden_delays, tolerance_relative=0.05, calculated_file=""):
-    """比较计算结果与golden data，并输出误差统计，同时绘制散点图"""
-    absolute_errors = []
-    relative_errors = []
-    
-    # 用于绘图的数据
-    x_values = []  # golden data
-    y_values = []  # calculated delay
-
-    for (input_node, output_node), calc_delay in calculated_delays.items():
-        if (input_node, output_node) in golden_delays:
-            golden_delay = golden_delays[(input_node, output_node)]
-            
-            # 判断延迟值小于0.05时使用绝对误差，大于等于0.05时使用相对误差
-            if golden_delay < tolerance_relative:
-                error = abs(calc_delay - golden_delay)
-                absolute_errors.append(error)
-            else:
-                if golden_delay != 0:
-                    error = abs((calc_delay - golden_delay) / golden_delay)
-                    relative_errors.append(error)
-                else:
-                    # 如果黄金时延为零，计算绝对误差
-                    error = abs(calc_delay - golden_delay)
-                    absolute_errors.append(error)
-            
-            # 添加数据点用于绘图
-            x_values.append(golden_delay)
-            y_values.append(calc_delay)
-
-    # 输出误差统计信息
-    abs_precision = sum(absolute_errors) / len(absolute_errors) if absolute_errors else 0
-    rel_precision = sum(relative_errors) / len(relative_errors) if relative_errors else 0
-
-    # 转换相对误差为百分比格式
-    rel_precision_percent = rel_precision * 100
-
-    print(f"Average Absolute Error: {abs_precision:.6f}")
-    print(f"Average Relative Error: {rel_precision_percent:.2f}%")
-
-    # 获取文件名（不含路径和扩展名）
-    base_name = os.path.splitext(os.path.basename(calculated_file))[0]
-
-    # 绘制图形
+
+def _table_from_dict(delays):
+    index = {}
+    intern = index.setdefault
+    load = [intern(a, len(index)) for a, _ in delays]
+    driver = [intern(b, len(index)) for _, b in delays]
+    return DelayTable(np.array(list(index), dtype=str), np.array(load, dtype=np.int32),
+                      np.array(driver, dtype=np.int32), np.array(list(delays.values()), dtype=np.float64))
+
+
+def _last_unique(keys):
+    """同一个键出现多次时保留最后一次（与读成字典的结果一致），返回按键排序的下标"""
+    _, first = np.unique(keys[::-1], return_index=True)
+    return len(keys) - 1 - first
+
+
+def join_delays(calc, golden):
+    """
+    按 (load, driver) 连接两个 DelayTable：两边的引脚名表先统一编号，
+    每对引脚编码成一个 int64 键，去重排序后用 intersect1d 求交集
+    """
+    names, inverse = np.unique(np.concatenate([calc.names, golden.names]), return_inverse=True)
+    inverse = inverse.reshape(-1).astype(np.int64)
+    n = max(len(names), 1)
+    calc_map, golden_map = inverse[:len(calc.names)], inverse[len(calc.names):]
+    calc_key = calc_map[calc.load] * n + calc_map[calc.driver]
+    golden_key = golden_map[golden.load] * n + golden_map[golden.driver]
+
+    calc_idx = _last_unique(calc_key)
+    golden_idx = _last_unique(golden_key)
+    common, calc_pos, golden_pos = np.intersect1d(calc_key[calc_idx], golden_key[golden_idx],
+                                                  assume_unique=True, return_indices=True)
+    return JoinedDelays(names, common // n, common % n,
+                        calc.delay[calc_idx[calc_pos]], golden.delay[golden_idx[golden_pos]],
+                        len(calc_idx) - len(common), len(golden_idx) - len(common))
+
+
+def delay_errors(calc, golden, tolerance_relative=0.05):
+    """golden 小于 tolerance_relative 时用绝对误差，否则用相对误差，返回 (error, is_absolute)"""
+    is_absolute = golden < tolerance_relative
+    diff = np.abs(calc - golden)
+    error = np.where(is_absolute, diff, diff / np.where(is_absolute, 1.0, golden))
+    return error, is_absolute
+
+
+def _worst(joined, error, mask, top_n):
+    """mask 范围内误差最大的 top_n 对，按误差从大到小（mask 中不应含 nan，否则 nan 会排在最前）"""
+    idx = np.flatnonzero(mask)
+    if len(idx) > top_n:
+        idx = idx[np.argpartition(error[idx], -top_n)[-top_n:]]
+    idx = idx[np.argsort(error[idx])[::-1]]
+    names = joined.names
+    return [{
+        'load': str(names[joined.load[i]]),
+        'driver': str(names[joined.driver[i]]),
+        'calc': float(joined.calc[i]),
+        'golden': float(joined.golden[i]),
+        'error': float(error[i]),
+    } for i in idx.tolist()]
+
+
+def _percentiles(values):
+    if len(values) == 0:
+        return {}
+    return dict(zip([f"p{p:g}" for p in PERCENTILES] + ['max'],
+                    np.percentile(values, PERCENTILES).tolist() + [float(values.max())]))
+
+
+def compare_delay_tables(calc, golden, tolerance_relative=0.05, top_n=10):
+    """
+    向量化地比较两个 DelayTable，返回 (误差统计 dict, JoinedDelays)。
+    任一边为 nan/inf 的对（例如不可达的 load）不参与误差统计，只计入 non_finite
+    """
+    joined = join_delays(calc, golden)
+    error, is_absolute = delay_errors(joined.calc, joined.golden, tolerance_relative)
+    finite = np.isfinite(joined.calc) & np.isfinite(joined.golden)
+    use_abs = is_absolute & finite
+    use_rel = ~is_absolute & finite
+    abs_errors = error[use_abs]
+    rel_errors = error[use_rel]
+
+    stats = {
+        'matched': len(joined.calc),
+        'only_calc': joined.only_calc,
+        'only_golden': joined.only_golden,
+        'non_finite': int(len(finite) - np.count_nonzero(finite)),
+        'abs_count': len(abs_errors),
+        'rel_count': len(rel_errors),
+        'abs_mean': float(abs_errors.mean()) if len(abs_errors) else 0.0,
+        'rel_mean': float(rel_errors.mean()) if len(rel_errors) else 0.0,
+        'abs_percentiles': _percentiles(abs_errors),
+        'rel_percentiles': _percentiles(rel_errors),
+        'worst_abs': _worst(joined, error, use_abs, top_n),
+        'worst_rel': _worst(joined, error, use_rel, top_n),
+    }
+    return stats, joined
+
+
+def print_stats(stats, tolerance_relative=0.05):
+    print(f"Average Absolute Error: {stats['abs_mean']:.6f}")
+    print(f"Average Relative Error: {stats['rel_mean'] * 100:.2f}%")
+    print(f"匹配 {stats['matched']} 对，仅在计算结果中 {stats['only_calc']} 对，"
+          f"仅在 golden 中 {stats['only_golden']} 对")
+    if stats['non_finite']:
+        print(f"⚠️ {stats['non_finite']} 对时延为 nan/inf（例如不可达的 load），未计入误差统计")
+    if stats['abs_percentiles']:
+        text = ' '.join(f"{k}={v:.6f}" for k, v in stats['abs_percentiles'].items())
+        print(f"绝对误差分位数（golden < {tolerance_relative}，{stats['abs_count']} 对）: {text}")
+    if stats['rel_percentiles']:
+        text = ' '.join(f"{k}={v * 100:.2f}%" for k, v in stats['rel_percentiles'].items())
+        print(f"相对误差分位数（{stats['rel_count']} 对）: {text}")
+    for key, title, fmt in (('worst_rel', '相对误差', lambda e: f"{e * 100:.2f}%"),
+                            ('worst_abs', '绝对误差', lambda e: f"{e:.6f}")):
+        if stats[key]:
+            print(f"{title}最大的 {len(stats[key])} 对（load driver calc golden error）:")
+            for row in stats[key]:
+                print(f"  {row['load']} {row['driver']} {row['calc']:.6f} {row['golden']:.6f} {fmt(row['error'])}")
+
+
+def plot_delays(golden, calc, stats, base_name, plot_path=None, max_points=100000):
+    """
+    无界面绘图（Agg 后端）并保存为图片。点数超过 max_points 时改用 hexbin 密度图，
+    避免逐点绘制几百万个散点
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    finite = np.isfinite(golden) & np.isfinite(calc)
+    golden, calc = golden[finite], calc[finite]
     plt.figure(figsize=(8, 8))
-    plt.scatter(x_values, y_values, color='blue', label='Calculated Delay')  # 绘制散点图
-    plt.plot([0, max(x_values)], [0, max(x_values)], color='red', linestyle='--')  # 添加y=x线
-    # 添加误差值作为标签
-    plt.scatter([], [], color='red', label=f'Avg Abs Error: {abs_precision:.6f}')  # 误差值在图例中的显示
-    plt.scatter([], [], color='red', label=f'Avg Rel Error: {rel_precision_percent:.2f}%')  # 误差值在图例中的显示
-    
+    if len(golden) > max_points:
+        plt.hexbin(golden, calc, gridsize=300, bins='log', mincnt=1, cmap='Blues')
+        plt.colorbar(label='count (log)')
+    else:
+        plt.scatter(golden, calc, s=4, color='blue', label='Calculated Delay')
+    top = float(golden.max()) if len(golden) else 1.0
+    plt.plot([0, top], [0, top], color='red', linestyle='--')  # 添加y=x线
+    # 误差值在图例中的显示
+    plt.scatter([], [], color='red', label=f"Avg Abs Error: {stats['abs_mean']:.6f}")
+    plt.scatter([], [], color='red', label=f"Avg Rel Error: {stats['rel_mean'] * 100:.2f}%")
+
     plt.xlabel('Golden Data (ms)')
     plt.ylabel('Calculated Delay (ms)')
     plt.title(f'Golden Data vs Calculated Delay ({base_name})')
+    plt.legend(loc='upper left')
+    plt.grid(True)
+    plt.savefig(plot_path or f"{base_name}.png")
+    plt.close()
 
-    
 
-    plt.legend(loc='upper left')  # 图例位置调整为左上角
-    plt.grid(True)
-    plt.show()
-    plt.savefig(base_name)  # 保存图片
-def evaluate(calculated_file, golden_file):
-    """主函数：读取文件，比较时延并输出误差，同时绘制图形"""
-    # 读取计算结果文件和黄金数据文件
-    calculated_delays = read_delays_from_file(calculated_file)
-    golden_delays = read_delays_from_file(golden_file)
-    
-    # 进行比较并输出误差统计，同时绘制图形
-    compare_delays_and_save(calculated_delays, golden_delays, calculated_file=calculated_file)
+def _base_name(path):
+    base_name = os.path.basename(path)
+    return base_name[:-len('.csv.gz')] if base_name.endswith('.csv.gz') else os.path.splitext(base_name)[0]
+
+
+def compare_delays_and_save(calculated_delays, golden_delays, tolerance_relative=0.05, calculated_file="",
+                            plot=True, top_n=10):
+    """比较两个 {(load, driver): delay} 字典，输出误差统计并（可选）绘图"""
+    stats, joined = compare_delay_tables(_table_from_dict(calculated_delays), _table_from_dict(golden_delays),
+                                         tolerance_relative, top_n)
+    print_stats(stats, tolerance_relative)
+    if plot:
+        plot_delays(joined.golden, joined.calc, stats, _base_name(calculated_file))
+    return stats
+
+
+def evaluate(calculated_file, golden_file, plot=True, top_n=10, tolerance_relative=0.05, plot_path=None,
+             corner=0):
+    """
+    主函数：把两个文件读成数组，向量化比较时延并输出误差，可选地绘制图形，返回误差统计。
+    计算结果为多 corner 文件时取 corner 指定的列（序号或 corner 名）
+    """
+    stats, joined = compare_delay_tables(load_delays(calculated_file, corner=corner), load_delays(golden_file),
+                                         tolerance_relative, top_n)
+    print_stats(stats, tolerance_relative)
+    if plot:
+        plot_delays(joined.golden, joined.calc, stats, _base_name(calculated_file), plot_path)
+    return stats
+
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="与 golden 时延比较并统计误差")
+    parser.add_argument('--calc', type=str, required=True, help="计算结果文件（.txt/.npz/.csv.gz）")
+    parser.add_argument('--golden', type=str, required=True, help="golden 时延文件")
+    parser.add_argument('--top', type=int, default=10, help="列出误差最大的对数")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="golden 小于该值时用绝对误差，否则用相对误差")
+    parser.add_argument('--plot', type=str, default=None, help="图片保存路径（不指定则不绘图）")
+    parser.add_argument('--corner', type=lambda s: int(s) if s.isdigit() else s, default=0,
+                        help="多 corner 结果中参与比较的列（序号或 corner 名）")
+    return parser.parse_args()
 
 
+if __name__ == "__main__":
+    args = parse_args()
+    evaluate(args.calc, args.golden, plot=args.plot is not None, top_n=args.top,
+             tolerance_relative=args.tolerance, plot_path=args.plot, corner=args.corner)
@@ -2,6 +2,7 @@ import os
 import re
 from collections import defaultdict
 from RCTree import *  
+from spefInput import open_spef
 
 
 def parse_netlist_info(netlist_path): 
@@ -41,7 +42,8 @@ def parse_name_map(spef_path):
     in_name_map = False
     pattern = re.compile(r'\*(\d+)\s+(\S+)')
 
-    with open(spef_path, 'r') as f:
+    # 压缩的 SPEF 透明解压，读到 NAME_MAP 结束即关闭
+    with open_spef(spef_path) as f:
         for line in f:
             line = line.strip()
             if line.startswith('*NAME_MAP'):
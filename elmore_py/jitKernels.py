@@ -0,0 +1,170 @@
+import threading
+import numpy as np
+
+# 可选的 Numba 编译内核：安装了 numba 时把遍历、子树电容、路径时延的循环编译成机器码，
+# 没有 numba 时同一份函数按纯 Python 执行（对 list / array 同样适用）
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# 节点数少于该值的 net 直接走纯 Python：转成数组和调用内核的固定开销比循环本身还大
+JIT_MIN_NODES = 64
+
+_enabled = numba is not None
+_warm = threading.Event()
+
+
+def numba_available():
+    return numba is not None
+
+
+def jit_enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    """--no-jit 时关闭；没有安装 numba 时始终为 False"""
+    global _enabled
+    _enabled = bool(flag) and numba is not None
+
+
+def _jit(func):
+    # cache=True 把编译结果写到 __pycache__，之后的运行直接加载，不再编译
+    if numba is None:
+        return func
+    return numba.njit(cache=True, nogil=True)(func)
+
+
+def _py(kernel):
+    # 内核的纯 Python 版本：list 路径不能交给 Numba（会为 reflected list 另编译一份并逐项装箱）
+    return getattr(kernel, 'py_func', kernel)
+
+
+@_jit
+def dfs_preorder(offsets, adj, adj_r, root):
+    """
+    从 root 出发的迭代 DFS（CSR 邻接表），返回 (order, parent, parent_r)：
+    order 为访问到的节点的先序，未访问到的节点 parent 为 -1。
+    电阻环由调用方事先用 meshSolver.has_loop 排除，这里重复到达的节点直接跳过
+    """
+    n = len(offsets) - 1
+    parent = np.full(n, -1, dtype=np.int64)
+    parent_r = np.zeros(n)
+    visited = np.zeros(n, dtype=np.bool_)
+    order = np.empty(n, dtype=np.int64)
+    # 每个邻接项最多入栈一次
+    stack_node = np.empty(len(adj) + 1, dtype=np.int64)
+    stack_par = np.empty(len(adj) + 1, dtype=np.int64)
+    stack_r = np.empty(len(adj) + 1)
+    stack_node[0] = root
+    stack_par[0] = -1
+    stack_r[0] = 0.0
+    top = 0
+    count = 0
+    while top >= 0:
+        node = stack_node[top]
+        par = stack_par[top]
+        r = stack_r[top]
+        top -= 1
+        if visited[node]:
+            continue
+        visited[node] = True
+        parent[node] = par
+        parent_r[node] = r
+        order[count] = node
+        count += 1
+        skipped = False
+        for k in range(offsets[node], offsets[node + 1]):
+            neighbor = adj[k]
+            if neighbor == par and not skipped:
+                skipped = True     # 只跳过来时的那一条边
+                continue
+            top += 1
+            stack_node[top] = neighbor
+            stack_par[top] = node
+            stack_r[top] = adj_r[k]
+    return order[:count], parent, parent_r
+
+
+@_jit
+def subtree_caps(order, parent, subtree_cap):
+    """逆先序把每个节点的电容累加到父节点上（subtree_cap 初值为自电容，原地修改）"""
+    for i in range(len(order) - 1, 0, -1):
+        node = order[i]
+        par = parent[node]
+        if par >= 0:
+            subtree_cap[par] += subtree_cap[node]
+
+
+@_jit
+def path_delays(order, parent, parent_r, subtree_cap, delay_to):
+    """先序自顶向下累加 Elmore 时延 delay_to[v] = delay_to[parent] + R·S(v)（原地修改）"""
+    for i in range(1, len(order)):
+        node = order[i]
+        par = parent[node]
+        delay_to[node] = delay_to[par] + parent_r[node] * subtree_cap[node]
+
+
+@_jit
+def reroot_sums(parent, parent_r, comp, subtree_cap, down, up):
+    """
+    RCTree.compute_delays_all_drivers 的三个循环，节点按先序编号：
+    逆先序累加子树电容，再先序求 down（从根向下）与 up（沿路径向上）的 R·C 前缀和
+    """
+    n = len(parent)
+    for idx in range(n - 1, 0, -1):
+        par = parent[idx]
+        if par >= 0:
+            subtree_cap[par] += subtree_cap[idx]
+    for idx in range(n):
+        par = parent[idx]
+        if par >= 0:
+            r = parent_r[idx]
+            down[idx] = down[par] + r * subtree_cap[idx]
+            up[idx] = up[par] + r * (subtree_cap[comp[idx]] - subtree_cap[idx])
+
+
+def tree_sums(parent, parent_r, comp, cap):
+    """
+    对先序编号的 list 计算 (subtree_cap, down, up)，均返回 list。
+    节点数 ≥ JIT_MIN_NODES 且启用了 Numba 时转成数组交给编译内核，否则直接按纯 Python 计算
+    """
+    n = len(parent)
+    if _enabled and n >= JIT_MIN_NODES:
+        subtree_cap = np.array(cap, dtype=np.float64)
+        down = np.zeros(n)
+        up = np.zeros(n)
+        reroot_sums(np.array(parent, dtype=np.int64), np.array(parent_r, dtype=np.float64),
+                    np.array(comp, dtype=np.int64), subtree_cap, down, up)
+        return subtree_cap.tolist(), down.tolist(), up.tolist()
+    subtree_cap = list(cap)
+    down = [0.0] * n
+    up = [0.0] * n
+    _py(reroot_sums)(parent, parent_r, comp, subtree_cap, down, up)
+    return subtree_cap, down, up
+
+
+def _compile_all():
+    # 用与正式调用相同的类型（int64 / float64 数组）各调用一次，触发编译或从缓存加载
+    offsets = np.array([0, 1, 2], dtype=np.int64)
+    adj = np.array([1, 0], dtype=np.int64)
+    order, parent, parent_r = dfs_preorder(offsets, adj, np.ones(2), 0)
+    cap = np.ones(2)
+    subtree_caps(order, parent, cap)
+    path_delays(order, parent, parent_r, cap, np.zeros(2))
+    reroot_sums(parent, parent_r, np.zeros(2, dtype=np.int64), cap, np.zeros(2), np.zeros(2))
+
+
+def warm_up(background=True):
+    """
+    预先编译（或从磁盘缓存加载）所有内核。background=True 时在后台线程中进行，
+    与 SPEF 解析重叠；编译期间调用内核的线程会等待 Numba 的编译锁
+    """
+    if not _enabled or _warm.is_set():
+        return
+    _warm.set()
+    if background:
+        threading.Thread(target=_compile_all, name='numba-warmup', daemon=True).start()
+    else:
+        _compile_all()
@@ -1,115 +1,91 @@
 from getMap import *
 from RCTree import *
+from spefReader import *
+from spefInput import is_compressed, strip_compression_suffix
+from delayWriter import *
+from parallelSpef import *
+from designCache import *
+from delayPipeline import pipeline_delays
+from netProfiler import RunProfiler
+from netMemo import DelayMemo
+from multiCorner import Corner, parse_corners, write_corner_delays
+from jitKernels import set_enabled, warm_up
+from cppBackend import cpp_parse_available
+from contextlib import ExitStack
 import argparse
 import os
 import time
 from evaluate import *
 
-def compute_and_save_delays(spef_path, output_dir):
+def compute_and_save_delays(spef_path, output_dir, batch_size=None, jobs=1,
+                            cache_dir=None, cache_key='mtime', cache_max_mb=None, backend='py',
+                            bulk_parse=False, fmt='txt', profiler=None, pipeline=False, queue_depth=8,
+                            memo=None, corners=None, corner_spefs=()):
 
-    name_map = parse_name_map(spef_path)
-    count = 0
-    with open(spef_path, 'r') as spef_file:
-        lines = spef_file.readlines()
-    
-    raw_to_real_name = {}
-    rctree = None
-    
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
-    spef_filename = os.path.basename(spef_path)
-    base_filename = os.path.splitext(spef_filename)[0]
-    output_file = os.path.join(output_dir, f"{base_filename}.txt")
-    input_nodes = []
-    output_nodes = []
-    with open(output_file, 'w') as output_txt:
-        in_dnet = False
-        in_conn = False
-        in_cap = False
-        in_res = False
-
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith("*D_NET") and not in_dnet:
-                count+=1
-                in_dnet = True
-                raw_to_real_name = {}
-                rctree = RCTree()
-                input_nodes = []
-                output_nodes = []
-                
-                parts = line.split()
-                net_id = parts[1].lstrip("*")
-                net_name = name_map.get(net_id, net_id)
-                rctree.set_name(net_name)
-                continue
-            
-            if in_dnet and line.startswith("*END"):
-
-                in_dnet = False
-               
-
-                for input_node in input_nodes:
-                    input_name = raw_to_real_name.get(input_node)
-                    delays = rctree.compute_delays_to_loads(input_node, output_nodes)
 
-                    for load_node, delay in delays.items():
-                        load_real_name = raw_to_real_name.get(load_node)
-                        output_txt.write(f"{load_real_name} {input_name} {delay:.6f}\n")
-
-            
-            if in_dnet:
-                if line.startswith("*CONN"):
-                    in_conn = True
-                    in_cap = False
-                    in_res = False
-                    continue
-                elif line.startswith("*CAP"):
-                    in_conn = False
-                    in_cap = True
-                    in_res = False
-                    continue
-                elif line.startswith("*RES"):
-                    in_conn = False
-                    in_cap = False
-                    in_res = True
-                    continue
-
-            if in_conn and line.startswith("*I"):
-                parts = line.split()
-                if len(parts) >= 3:
-                    raw_node = parts[1].lstrip('*')
-                    if ':' in raw_node:
-                        name_id, port = raw_node.split(':')
-                        mapped = name_map.get(name_id)
-                        if mapped:
-                            raw_to_real_name[raw_node] = f"{mapped}/{port}"
-
-                    node_id = parts[1].lstrip('*')  # 获取纯编号，例如 "12"
-                    direction = parts[2]  # I 或 O
-                    if direction == 'I':
-                        input_nodes.append(node_id)
-                    elif direction == 'O':
-                        output_nodes.append(node_id)
-
-
-            elif in_cap:
-                parts = line.split()
-                if len(parts) >= 3:
-                    node = parts[1].lstrip('*')
-                    cap = float(parts[2])
-                    rctree.set_node_cap(node, cap)
+    spef_filename = os.path.basename(spef_path)
+    base_filename = os.path.splitext(strip_compression_suffix(spef_filename))[0]
+    output_file = os.path.join(output_dir, f"{base_filename}{OUTPUT_SUFFIX[fmt]}")
+
+    # --pipeline：解析、计算、写出三个阶段用有界队列连接，重叠执行
+    # memo（netMemo.DelayMemo）：结构与数值相同的 net 只计算一次
+    if pipeline:
+        write = lambda *a: pipeline_delays(*a, memo=memo, queue_depth=queue_depth)
+    else:
+        write = lambda *a: write_delays(*a, memo=memo)
+
+    if jobs > 1 and is_compressed(spef_path):
+        # 压缩文件不能按字节偏移切分，退回单进程（解压在后台进行）
+        print(f"⚠️ {spef_path} 是压缩文件，不支持多进程切分，改为单进程处理")
+        jobs = 1
+    if bulk_parse and not cpp_parse_available():
+        # 块解析的加速来自 C++ 的 parse_net_sections，纯 NumPy 版本并不比逐行解析快
+        print("⚠️ _elmore_cpp 未编译或版本过旧（缺少 parse_net_sections），--bulk-parse 改用逐行解析")
+        bulk_parse = False
+
+    start = time.perf_counter()
+    if corners or corner_spefs:
+        # 多 corner：一次拓扑遍历得到所有 corner 的时延，每个 corner 一列（单进程批量计算）
+        spef_paths = [spef_path] + list(corner_spefs)
+        if not corners:
+            corners = [Corner(os.path.splitext(strip_compression_suffix(os.path.basename(path)))[0], 1.0, 1.0)
+                       for path in spef_paths]
+        with ExitStack() as stack:
+            readers = [stack.enter_context(SpefReader(path)) for path in spef_paths]
+            output = stack.enter_context(open_delay_output(output_file, fmt, corners=[c.name for c in corners]))
+            count = write_corner_delays(readers, corners, output, batch_size or 4096)
+        method_counts = output.method_counts
+        print(f"corner: {', '.join(c.name for c in corners)}")
+    elif jobs > 1:
+        # 多进程模式：按 *D_NET 边界切分文件，各块结果按顺序合并（统计只记录总耗时）
+        count, method_counts = compute_delays_parallel(spef_path, output_file, jobs, batch_size, backend,
+                                                       fmt=fmt, memo=memo)
+        if profiler is not None:
+            profiler.add_time('parallel', time.perf_counter() - start)
+    elif cache_dir:
+        # 二进制缓存：首次解析后写入缓存，之后直接内存映射加载
+        max_bytes = int(cache_max_mb * 1024 * 1024) if cache_max_mb else None
+        with open_design(spef_path, cache_dir, cache_key, max_bytes) as design, \
+                open_delay_output(output_file, fmt) as output:
+            if profiler is not None:
+                profiler.add_time('name_map', time.perf_counter() - start)
+            count = write(design, design.name_map, output, batch_size, backend, profiler)
+        method_counts = output.method_counts
+    else:
+        # 单遍流式读取：NAME_MAP 与 D_NET 来自同一次文件扫描
+        with SpefReader(spef_path) as reader, open_delay_output(output_file, fmt) as output:
+            if profiler is not None:
+                profiler.add_time('name_map', time.perf_counter() - start)
+            # --bulk-parse：*CAP/*RES 段整块交给 C++ 解析成数组，不再逐行 split/float
+            nets = reader.iter_arrays() if bulk_parse else reader
+            count = write(nets, reader.name_map, output, batch_size, backend, profiler)
+        method_counts = output.method_counts
 
-            elif in_res:
-                parts = line.split()
-                if len(parts) >= 4:
-                    node1 = parts[1].lstrip('*')
-                    node2 = parts[2].lstrip('*')
-                    res = float(parts[3])
-                    rctree.add_edge(node1, node2, res)
     print(f"D_NET总数 {count}")
+    # 每种求解方式（tree / mesh / memo）的 net 数
+    print("求解方式: " + '，'.join(f"{name} {n} 个" for name, n in method_counts.items() if n))
     print(f"✅ 时延计算结果已保存到 {output_file}")
     return output_file
 
@@ -125,6 +101,42 @@ def parse_args():
     parser.add_argument('--spef', type=str, required=True, help="SPEF 文件路径")
     parser.add_argument('--output', type=str, required=True, help="输出目录路径")
     parser.add_argument('--golden', type=str, required=True)
+    parser.add_argument('--batch', type=int, default=None,
+                        help="批量模式：每批打包计算的 D_NET 数（不指定则逐个 net 计算）")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="并行进程数（默认 1，即单进程）")
+    parser.add_argument('--backend', choices=list(BACKENDS), default='py',
+                        help="时延计算引擎：py=RCTree，array=RCTreeA，numpy=RCTreeM，cpp=elmore_cpp 扩展模块")
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help="解析结果二进制缓存目录（与 --jobs 同时指定时不使用缓存）")
+    parser.add_argument('--cache-key', choices=['mtime', 'hash'], default='mtime',
+                        help="缓存失效依据：文件修改时间或内容哈希")
+    parser.add_argument('--cache-max-mb', type=float, default=None,
+                        help="缓存目录大小上限（MB），超出时淘汰最久未用的条目")
+    parser.add_argument('--bulk-parse', action='store_true',
+                        help="用 _elmore_cpp 按段整块解析 *CAP/*RES 为数组（仅单进程、不使用缓存时生效）")
+    parser.add_argument('--format', choices=list(OUTPUT_FORMATS), default='txt',
+                        help="输出格式：txt=文本，npy=.npz（float 时延数组+去重引脚名表），csv-gz=gzip 压缩 CSV")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="解析/计算/写出流水线重叠执行（单进程模式）")
+    parser.add_argument('--queue-depth', type=int, default=8,
+                        help="流水线各阶段之间队列的最大长度，决定内存上限")
+    parser.add_argument('--memo', type=int, default=0, metavar='N',
+                        help="按规范哈希缓存 net 的时延结果，最多 N 项（LRU，0 表示不缓存；批量模式下不生效）")
+    parser.add_argument('--memo-precision', choices=['float32', 'float64'], default='float32',
+                        help="缓存哈希中 R/C 数值的量化精度（float64 为精确比较）")
+    parser.add_argument('--corners', type=parse_corners, default=None,
+                        help="多 corner 模式：名字[:R 缩放[:C 缩放]]，逗号分隔，例如 cworst:1.1:1.2,cbest:0.9:0.85")
+    parser.add_argument('--corner-spef', nargs='+', default=[],
+                        help="其它 corner 的 SPEF（与 --spef 拓扑相同），与 --spef 一起各占一列")
+    parser.add_argument('--no-jit', action='store_true',
+                        help="安装了 numba 时也不使用编译内核（py/numpy 后端）")
+    parser.add_argument('--no-plot', action='store_true', help="只输出误差统计，不绘图")
+    parser.add_argument('--profile', action='store_true',
+                        help="统计各阶段耗时与每个 net 的规模/耗时，结束时打印报告")
+    parser.add_argument('--profile-json', type=str, default=None,
+                        help="运行统计报告的 JSON 保存路径（指定即启用统计）")
+    parser.add_argument('--profile-top', type=int, default=10, help="报告中列出最慢/最大的 net 数")
 
     return parser.parse_args()
 
@@ -136,15 +148,33 @@ if __name__ == "__main__":
     spef_path = args.spef
     output_dir = args.output
     golden_file = args.golden
+    profiler = RunProfiler(args.profile_top) if args.profile or args.profile_json else None
+    memo = DelayMemo(args.memo, args.memo_precision) if args.memo > 0 else None
+    if args.no_jit:
+        set_enabled(False)
+    elif args.jobs <= 1 and args.backend in ('py', 'numpy'):
+        # 编译（或加载缓存）与 SPEF 解析在后台重叠；多进程时由各工作进程自行加载
+        warm_up()
     # 记录开始时间
     start_time = time.time()
     # 调用计算并保存时延的函数
-    output_file = compute_and_save_delays(spef_path, output_dir)
+    output_file = compute_and_save_delays(spef_path, output_dir, args.batch, args.jobs,
+                                          args.cache_dir, args.cache_key, args.cache_max_mb,
+                                          args.backend, args.bulk_parse, args.format, profiler,
+                                          args.pipeline, args.queue_depth, memo,
+                                          args.corners, args.corner_spef)
     # 记录结束时间
     end_time = time.time()
 
     # 计算执行时间
     execution_time = end_time - start_time
     print(f"代码执行时间: {execution_time:.6f} 秒")
+    if memo is not None:
+        memo.print_stats()
+    if profiler is not None:
+        profiler.print_report()
+        if args.profile_json:
+            profiler.save_json(args.profile_json)
+            print(f"✅ 运行统计已保存到 {args.profile_json}")
    
-    evaluate(output_file, golden_file)
\ No newline at end of file
+    evaluate(output_file, golden_file, plot=not args.no_plot)
\ No newline at end of file
@@ -0,0 +1,132 @@
+import math
+import numpy as np
+from spefReader import *
+
+try:
+    from scipy.sparse import csc_matrix
+    from scipy.sparse.linalg import splu
+except ImportError:  # 没有 scipy 时退回 NumPy 稠密求解
+    csc_matrix = splu = None
+
+# 每个 net 的求解方式：tree = RC 树的 O(n) 遍历，mesh = 电导矩阵稀疏求解，memo = 命中时延缓存
+METHODS = ('tree', 'mesh', 'memo')
+
+
+def _net_graph(net):
+    """(节点名列表, 电容数组, edge_u, edge_v, edge_r)，DNet 的节点按 *CONN、*CAP、*RES 的顺序编号"""
+    if isinstance(net, NetArrays):
+        return (net.nodes, np.asarray(net.cap, dtype=np.float64), np.asarray(net.edge_u, dtype=np.int64),
+                np.asarray(net.edge_v, dtype=np.int64), np.asarray(net.edge_r, dtype=np.float64))
+    index = {}
+    intern = index.setdefault
+    for node, _ in net.conns:
+        intern(node, len(index))
+    caps = net_caps(net)
+    cap_idx = [intern(node, len(index)) for node, _ in caps]
+    edge_u = [intern(node1, len(index)) for node1, _, _ in net.ress]
+    edge_v = [intern(node2, len(index)) for _, node2, _ in net.ress]
+    cap = np.zeros(len(index))
+    cap[cap_idx] = [value for _, value in caps]
+    return (list(index), cap, np.array(edge_u, dtype=np.int64), np.array(edge_v, dtype=np.int64),
+            np.array([res for _, _, res in net.ress], dtype=np.float64))
+
+
+def _find(uf, x):
+    while uf[x] != x:
+        uf[x] = uf[uf[x]]
+        x = uf[x]
+    return x
+
+
+def edges_have_loop(edges):
+    """edges 为 (节点, 节点) 序列，并查集检查是否成环（包括并联电阻和自环），O(边数)"""
+    uf = {}
+    for node1, node2 in edges:
+        a = _find(uf, uf.setdefault(node1, node1))
+        b = _find(uf, uf.setdefault(node2, node2))
+        if a == b:
+            return True
+        uf[a] = b
+    return False
+
+
+def has_loop(net):
+    """
+    检查整个 net 的 *RES 是否成环。所有计算路径（各逐 net 后端与 RCForest）
+    都按这一定义选择 tree / mesh，与 driver 能否到达成环的部分无关
+    """
+    if isinstance(net, NetArrays):
+        return edges_have_loop(zip(net.edge_u.tolist(), net.edge_v.tolist()))
+    return edges_have_loop((node1, node2) for node1, node2, _ in net.ress)
+
+
+def _union_labels(n, pairs_u, pairs_v):
+    uf = list(range(n))
+    for a, b in zip(pairs_u, pairs_v):
+        ra, rb = _find(uf, a), _find(uf, b)
+        if ra != rb:
+            uf[ra] = rb
+    return np.array([_find(uf, x) for x in range(n)], dtype=np.int64)
+
+
+def solve_mesh(cap, edge_u, edge_v, edge_r, drivers):
+    """
+    一阶矩（Elmore）时延的一般解法，适用于有电阻环的 net：
+    以 driver 为理想电压源（接地），解 G' v = C'，v 即各节点的时延（R·C，未乘单位），
+    G' 为去掉 driver 行列的节点电导矩阵，C' 为其余节点的电容。
+    每个 driver 做一次稀疏 LU 分解，一次回代得到所有节点的时延；
+    零电阻先把两端合并成一个节点。drivers 为节点编号，
+    返回 (驱动数, 节点数) 的数组，与 driver 不连通的节点为 NaN
+    """
+    n = len(cap)
+    short = edge_r == 0
+    rep = _union_labels(n, edge_u[short].tolist(), edge_v[short].tolist())
+    rep_ids, rep = np.unique(rep, return_inverse=True)
+    m = len(rep_ids)
+    node_cap = np.bincount(rep, weights=cap, minlength=m)
+    u, v = rep[edge_u[~short]], rep[edge_v[~short]]
+    g = 1.0 / edge_r[~short]
+    keep = u != v
+    u, v, g = u[keep], v[keep], g[keep]
+    label = _union_labels(m, u.tolist(), v.tolist())
+
+    # 节点电导矩阵（COO 形式的行、列、值）
+    rows = np.concatenate([u, v, u, v])
+    cols = np.concatenate([u, v, v, u])
+    vals = np.concatenate([g, g, -g, -g])
+
+    result = np.full((len(drivers), n), np.nan)
+    for i, driver in enumerate(drivers):
+        d = rep[driver]
+        members = np.flatnonzero((label == label[d]) & (np.arange(m) != d))
+        position = np.full(m, -1, dtype=np.int64)
+        position[members] = np.arange(len(members))
+        delay_of = np.full(m, np.nan)
+        delay_of[d] = 0.0
+        if len(members):
+            inside = (position[rows] >= 0) & (position[cols] >= 0)
+            r, c, x = position[rows[inside]], position[cols[inside]], vals[inside]
+            if splu is not None:
+                matrix = csc_matrix((x, (r, c)), shape=(len(members), len(members)))
+                delay_of[members] = splu(matrix).solve(node_cap[members])
+            else:
+                matrix = np.zeros((len(members), len(members)))
+                np.add.at(matrix, (r, c), x)
+                delay_of[members] = np.linalg.solve(matrix, node_cap[members])
+        result[i] = delay_of[rep]
+    return result
+
+
+def mesh_delays(net, drivers, loads, apply_ln2=False):
+    """用 solve_mesh 计算一个 DNet/NetArrays 的时延，返回 {driver: {load: delay}}（与 RCTree 相同）"""
+    nodes, cap, edge_u, edge_v, edge_r = _net_graph(net)
+    index = {node: i for i, node in enumerate(nodes)}
+    delays = solve_mesh(cap, edge_u, edge_v, edge_r, [index[driver] for driver in drivers])
+    scale = 1e-6 * math.log(2) if apply_ln2 else 1e-6
+    result = {}
+    for driver, row in zip(drivers, delays.tolist()):
+        result[driver] = {}
+        for load in loads:
+            delay = row[index[load]] if load in index else math.nan
+            result[driver][load] = None if math.isnan(delay) else delay * scale
+    return result
@@ -0,0 +1,114 @@
+from collections import namedtuple
+import numpy as np
+from spefReader import *
+from RCForest import *
+from delayWriter import batch_delay_rows
+
+# 一个 RC corner：r_scale/c_scale 乘在该 corner 的电阻/电容上
+Corner = namedtuple('Corner', ['name', 'r_scale', 'c_scale'])
+
+
+def parse_corners(spec):
+    """
+    解析 --corners："cworst:1.1:1.2,cbest:0.9:0.85"，每项为 名字[:R 缩放[:C 缩放]]，
+    省略的缩放系数为 1
+    """
+    corners = []
+    for item in spec.split(','):
+        parts = item.strip().split(':')
+        if not parts[0] or len(parts) > 3:
+            raise ValueError(f"无法解析 corner: {item}")
+        scales = [float(x) for x in parts[1:]] + [1.0] * (3 - len(parts))
+        corners.append(Corner(parts[0], scales[0], scales[1]))
+    return corners
+
+
+class CornerForest(RCForest):
+    """
+    多 corner 的 RCForest：拓扑来自第一个 SPEF，其它 corner SPEF（NAME_MAP 编号须一致）
+    的 R/C 按节点名和 *RES 顺序对齐成 (节点数, SPEF 数)、(电阻数, SPEF 数) 的列，再乘上各 corner 的缩放系数。
+    只有一个 SPEF 时所有 corner 共用它的 R/C，只是缩放不同
+    """
+    def __init__(self, corners, first_net=0):
+        super().__init__(first_net=first_net)
+        self.corners = corners
+        self.cap_cols = []   # 每个 net 一个 (节点数, SPEF 数-1) 数组
+        self.res_cols = []
+
+    def add_corner_nets(self, nets):
+        """nets 为各 corner SPEF 中同一个 D_NET 的 DNet 元组（第一个决定拓扑）"""
+        base = self.node_offsets[-1]
+        first_edge = len(self.edge_u)
+        self.add_net(nets[0])
+        if len(nets) == 1:
+            return
+
+        index = {node: base + i for i, node in enumerate(self.node_names[base:])}
+        edge_u = self.edge_u[first_edge:]
+        edge_v = self.edge_v[first_edge:]
+        cap = np.zeros((len(index), len(nets) - 1))
+        res = np.empty((len(edge_u), len(nets) - 1))
+        for k, net in enumerate(nets[1:]):
+            if net.name != nets[0].name or len(net.ress) != len(edge_u):
+                raise ValueError(f"corner SPEF 的 D_NET {net.name} 与 {nets[0].name} 拓扑不一致")
+            for node, value in net_caps(net):
+                idx = index.get(node)
+                if idx is None:
+                    raise ValueError(f"corner SPEF 的 D_NET {net.name} 中多出节点 {node}")
+                cap[idx - base, k] = value
+            for j, (node1, node2, value) in enumerate(net.ress):
+                if index.get(node1) != edge_u[j] or index.get(node2) != edge_v[j]:
+                    raise ValueError(f"corner SPEF 的 D_NET {net.name} 第 {j + 1} 个电阻与拓扑不一致")
+                res[j, k] = value
+        self.cap_cols.append(cap)
+        self.res_cols.append(res)
+
+    def compute_corners(self, apply_ln2=False):
+        """一次拓扑遍历求出所有 corner 的时延，返回 (result, delay)，delay 为 (查询数, corner 数)"""
+        cap = np.asarray(self.cap, dtype=np.float64)[:, None]
+        edge_r = np.asarray(self.edge_r, dtype=np.float64)[:, None]
+        if self.cap_cols:
+            cap = np.hstack([cap, np.concatenate(self.cap_cols)])
+            edge_r = np.hstack([edge_r, np.concatenate(self.res_cols)])
+        cap = cap * np.array([c.c_scale for c in self.corners])
+        edge_r = edge_r * np.array([c.r_scale for c in self.corners])
+        return self._compute(cap, edge_r, apply_ln2)
+
+
+def iter_corner_nets(readers):
+    """多个 SPEF 同步迭代，逐个产出同一 D_NET 的 DNet 元组"""
+    iterators = [iter(reader) for reader in readers]
+    while True:
+        nets = tuple(next(it, None) for it in iterators)
+        if all(net is None for net in nets):
+            return
+        if any(net is None for net in nets):
+            raise ValueError("各 corner SPEF 的 D_NET 数不一致")
+        yield nets
+
+
+def write_corner_delays(readers, corners, output, batch_size=4096):
+    """
+    多 corner 计算：readers 为一个或与 corners 等长的多个 SpefReader，
+    每 batch_size 个 net 打包成一个 CornerForest，结果按 corner 依次写成多列。返回 net 数
+    """
+    if len(readers) not in (1, len(corners)):
+        raise ValueError(f"corner SPEF 数 ({len(readers)}) 必须为 1 或等于 corner 数 ({len(corners)})")
+    name_map = readers[0].name_map
+    count = 0
+    forest = CornerForest(corners)
+    for nets in iter_corner_nets(readers):
+        forest.add_corner_nets(nets)
+        if len(forest) >= batch_size:
+            count += _write_forest(forest, name_map, output)
+            forest = CornerForest(corners, forest.first_net + len(forest))
+    if len(forest):
+        count += _write_forest(forest, name_map, output)
+    return count
+
+
+def _write_forest(forest, name_map, output):
+    result, delay = forest.compute_corners()
+    loads, drivers, _, methods, net_methods = batch_delay_rows(forest, result, name_map)
+    output.write_corner_rows(loads, drivers, delay, methods, net_methods)
+    return len(forest)
@@ -0,0 +1,176 @@
+import argparse
+import fnmatch
+import mmap
+import os
+import pickle
+import sys
+import time
+from collections import namedtuple
+from getMap import parse_name_map
+from spefReader import *
+from spefInput import is_compressed
+from delayWriter import *
+
+INDEX_VERSION = 2
+
+# 一个 D_NET 在文件中的位置：[start, end) 为字节范围，
+# caps 为 *CAP 段的条目数（含耦合电容），pins 为 *CONN 段的 *I/*P 条目数
+NetEntry = namedtuple('NetEntry', ['net_id', 'name', 'start', 'end', 'caps', 'pins'])
+
+
+def index_path_for(spef_path):
+    return spef_path + '.netidx'
+
+
+SECTION_TAGS = (b'\n*CONN', b'\n*CAP', b'\n*RES', b'\n*INDUC', b'\n*END')
+
+
+def _find_dnet(mm, pos):
+    """返回 pos 处或之后第一个 *D_NET 行首的偏移，没有则返回 -1"""
+    if mm[pos:pos + 6] == b'*D_NET' and (pos == 0 or mm[pos - 1:pos] == b'\n'):
+        return pos
+    found = mm.find(b'\n*D_NET', pos)
+    return found + 1 if found >= 0 else -1
+
+
+def _section_lines(mm, start, end, tag):
+    """返回 [start, end) 中 tag 段的非空行（不含段标记行本身）"""
+    pos = mm.find(b'\n' + tag, start, end)
+    if pos < 0:
+        return []
+    body = mm.find(b'\n', pos + 1, end)
+    if body < 0:
+        return []
+    stop = end
+    for other in SECTION_TAGS:
+        found = mm.find(other, body, stop)
+        if found >= 0:
+            stop = found
+    return [line for line in mm[body:stop].split(b'\n') if line.strip()]
+
+
+def build_net_index(spef_path):
+    """内存映射扫描一次 SPEF，记录每个 D_NET 的字节范围、名字、电容条目数和引脚数"""
+    if is_compressed(spef_path):
+        raise ValueError(f"{spef_path} 是压缩文件，无法按偏移随机读取，请先解压再建立索引")
+    name_map = parse_name_map(spef_path)
+    nets = []
+    with open(spef_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        pos = _find_dnet(mm, 0)
+        while pos >= 0:
+            line_end = mm.find(b'\n', pos)
+            header = mm[pos:line_end if line_end >= 0 else size].split()
+            end = mm.find(b'\n*END', pos)
+            end = size if end < 0 else mm.find(b'\n', end + 1)
+            end = size if end < 0 else end + 1
+
+            net_id = header[1].decode().lstrip('*')
+            pins = [line for line in _section_lines(mm, pos, end, b'*CONN')
+                    if line.lstrip().startswith((b'*I', b'*P'))]
+            nets.append(NetEntry(
+                net_id,
+                name_map.get(net_id, net_id),
+                pos,
+                end,
+                len(_section_lines(mm, pos, end, b'*CAP')),
+                len(pins),
+            ))
+            pos = _find_dnet(mm, end)
+
+    stat = os.stat(spef_path)
+    return {
+        'version': INDEX_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'name_map': name_map,
+        'nets': nets,
+    }
+
+
+def save_net_index(index, spef_path):
+    with open(index_path_for(spef_path), 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_net_index(spef_path, rebuild=False):
+    """读取旁路索引文件，大小或修改时间与 SPEF 不一致时重新建立"""
+    path = index_path_for(spef_path)
+    stat = os.stat(spef_path)
+    if not rebuild and os.path.exists(path):
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+        if (index.get('version') == INDEX_VERSION and index['size'] == stat.st_size
+                and index['mtime_ns'] == stat.st_mtime_ns):
+            return index
+
+    index = build_net_index(spef_path)
+    save_net_index(index, spef_path)
+    return index
+
+
+def select_nets(index, patterns):
+    """按 net 名或编号匹配（支持通配符）"""
+    selected = []
+    for entry in index['nets']:
+        for pattern in patterns:
+            if fnmatch.fnmatchcase(entry.name, pattern) or fnmatch.fnmatchcase(entry.net_id, pattern):
+                selected.append(entry)
+                break
+    return selected
+
+
+def read_net(spef_path, entry, name_map):
+    """按字节范围直接读取并解析一个 D_NET"""
+    with open(spef_path, 'rb') as f:
+        f.seek(entry.start)
+        text = f.read(entry.end - entry.start).decode()
+    return next(iter_dnets(text.splitlines(), name_map), None)
+
+
+def compute_selected_delays(spef_path, patterns, output, rebuild=False, index=None):
+    """
+    只计算匹配到的 net 的时延，写入 output（DelayOutput），返回匹配到的 NetEntry 列表。
+    index 为已经加载的索引时直接使用
+    """
+    if index is None:
+        index = load_net_index(spef_path, rebuild)
+    selected = select_nets(index, patterns)
+    for entry in selected:
+        net = read_net(spef_path, entry, index['name_map'])
+        if net is not None:
+            write_net_delays(net, index['name_map'], output)
+    return selected
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="按 net 名随机访问 SPEF 并计算时延")
+    parser.add_argument('--spef', type=str, required=True, help="SPEF 文件路径")
+    parser.add_argument('--net', type=str, action='append', default=[],
+                        help="net 名或编号，支持通配符，可重复指定")
+    parser.add_argument('--output', type=str, default=None, help="输出文件路径（默认打印到终端），按后缀 .txt/.npz/.csv.gz 选择格式")
+    parser.add_argument('--list', action='store_true', help="只列出匹配的 net，不计算时延")
+    parser.add_argument('--rebuild', action='store_true', help="强制重建索引")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    start_time = time.time()
+    index = load_net_index(args.spef, args.rebuild)
+    print(f"索引加载/建立耗时: {time.time() - start_time:.6f} 秒，共 {len(index['nets'])} 个 D_NET",
+          file=sys.stderr)
+
+    patterns = args.net or ['*']
+    if args.list:
+        for entry in select_nets(index, patterns):
+            print(f"{entry.name} id={entry.net_id} bytes={entry.start}-{entry.end} "
+                  f"caps={entry.caps} pins={entry.pins}")
+    else:
+        output = (open_delay_output(args.output, format_of(args.output)) if args.output
+                  else TextDelayOutput(sys.stdout))
+        with output:
+            start_time = time.time()
+            selected = compute_selected_delays(args.spef, patterns, output, index=index)
+            print(f"计算 {len(selected)} 个 net 耗时: {time.time() - start_time:.6f} 秒", file=sys.stderr)
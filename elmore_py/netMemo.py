@@ -0,0 +1,106 @@
+import hashlib
+from array import array
+from collections import OrderedDict
+import numpy as np
+from spefReader import *
+
+
+# 量化精度：'float32' 把 R/C 舍入到单精度（相对误差约 6e-8），'float64' 按原值精确比较
+PRECISIONS = {'float32': ('f', np.float32), 'float64': ('d', np.float64)}
+
+
+def canonical_key(net, precision='float32'):
+    """
+    net 的规范哈希：节点按首次出现的顺序重新编号（*CONN 引脚在前），
+    对引脚方向、电容表、电阻表（数值按 precision 量化）做哈希。
+    只有节点名不同、其余完全相同的 net 得到相同的键；引脚在 *CONN 中的位置也计入键，
+    因此命中时可以按位置把缓存的时延对应回本 net 的引脚
+    """
+    code, dtype = PRECISIONS[precision]
+    h = hashlib.blake2b(digest_size=16)
+    h.update(''.join(direction for _, direction in net.conns).encode())
+    if isinstance(net, NetArrays):
+        h.update(array('q', [len(net.pins), len(net.cap), len(net.edge_u)]))
+        h.update(np.asarray(net.pins, dtype=np.int64).tobytes())
+        h.update(np.asarray(net.cap, dtype=dtype).tobytes())
+        h.update(np.asarray(net.edge_u, dtype=np.int64).tobytes())
+        h.update(np.asarray(net.edge_v, dtype=np.int64).tobytes())
+        h.update(np.asarray(net.edge_r, dtype=dtype).tobytes())
+        return h.digest()
+
+    # 小 net 占多数，这里用 array 而不是 numpy，避免每个 net 多次创建数组的开销
+    index = {}
+    intern = index.setdefault
+    caps = net_caps(net)
+    ids = array('q', [len(net.conns), len(caps)])
+    ids.extend([intern(node, len(index)) for node, _ in net.conns])
+    ids.extend([intern(node, len(index)) for node, _ in caps])
+    for node1, node2, _ in net.ress:
+        ids.append(intern(node1, len(index)))
+        ids.append(intern(node2, len(index)))
+    h.update(ids)
+    h.update(array(code, [cap for _, cap in caps]))
+    h.update(array(code, [res for _, _, res in net.ress]))
+    return h.digest()
+
+
+class DelayMemo:
+    """
+    按规范哈希缓存每个 net 的 driver→load 时延（有界 LRU）。
+    缓存值只记录引脚在 *CONN 中的位置，命中时换成本 net 的引脚名，
+    重复的 net 只需计算一次哈希，不再建树和遍历
+    """
+    def __init__(self, max_entries=65536, precision='float32'):
+        self.max_entries = max_entries
+        self.precision = precision
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, net):
+        return canonical_key(net, self.precision)
+
+    def get(self, key, net):
+        """命中时返回 {driver: {load: delay}}（与 compute_delays_all_drivers 相同），否则返回 None"""
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        conns = net.conns
+        return {conns[driver][0]: dict(zip([conns[load][0] for load in loads], delays))
+                for driver, loads, delays in value}
+
+    def put(self, key, net, all_delays):
+        position = {}
+        for pos, (node, _) in enumerate(net.conns):
+            position.setdefault(node, pos)
+        self._cache[key] = tuple((position[driver], tuple(position[load] for load in delays),
+                                  tuple(delays.values()))
+                                 for driver, delays in all_delays.items())
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def merge_stats(self, stats):
+        """累加其它进程中 DelayMemo.stats() 的计数"""
+        self.hits += stats['hits']
+        self.misses += stats['misses']
+        self.evictions += stats['evictions']
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._cache),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"🔁 时延缓存：命中 {stats['hits']} 次，未命中 {stats['misses']} 次，"
+              f"命中率 {stats['hit_rate'] * 100:.2f}%，淘汰 {stats['evictions']} 项，当前 {stats['entries']} 项")
@@ -0,0 +1,160 @@
+import json
+import math
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+import numpy as np
+
+perf_counter = time.perf_counter
+
+# 各阶段的含义：
+#   name_map  读取 *NAME_MAP        parse    解析 D_NET（迭代器每次产出所用时间）
+#   build     建立 RC 树/森林        compute  遍历求时延
+#   write     格式化并写出结果
+PHASES = ('name_map', 'parse', 'build', 'compute', 'write')
+
+
+def net_size(net):
+    """(节点数, 边数)，DNet 的节点数为 *CAP 与 *RES 中出现的不同节点数"""
+    if hasattr(net, 'edge_u'):
+        return len(net.nodes), len(net.edge_u)
+    nodes = {node for node, _ in net.caps}
+    for node1, node2, _ in net.ress:
+        nodes.add(node1)
+        nodes.add(node2)
+    return len(nodes), len(net.ress)
+
+
+class RunProfiler:
+    """
+    可选的运行统计：各阶段累计耗时、每个 net 的规模（节点/边/driver/load 数）与计算耗时、
+    net 规模直方图，以及最慢/最大 net 的报告。未启用时调用方传 None，只多几次 is None 判断
+    """
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.net_names = []
+        self.nodes = array('q')
+        self.edges = array('q')
+        self.drivers = array('q')
+        self.loads = array('q')
+        self.seconds = array('d')   # 每个 net 建树 + 计算的耗时，批量模式下为 NaN
+        self.methods = []           # 每个 net 的求解方式（meshSolver.METHODS）
+        self.start = perf_counter()
+
+    def add_time(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - start)
+
+    def timed(self, iterable, phase='parse'):
+        """包装迭代器，把每次取下一个元素的耗时计入 phase"""
+        it = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add_time(phase, perf_counter() - start)
+                return
+            self.add_time(phase, perf_counter() - start)
+            yield item
+
+    def add_net(self, net, n_drivers, n_loads, seconds=math.nan, method='tree'):
+        nodes, edges = net_size(net)
+        self.net_names.append(net.name)
+        self.nodes.append(nodes)
+        self.edges.append(edges)
+        self.drivers.append(n_drivers)
+        self.loads.append(n_loads)
+        self.seconds.append(seconds)
+        self.methods.append(method)
+
+    def tag_methods(self, methods):
+        """批量模式在计算之后才知道方式：改写最后 len(methods) 个 net 的标记"""
+        if len(methods):
+            self.methods[-len(methods):] = methods
+
+    def _top(self, values, n):
+        values = np.asarray(values)
+        valid = np.flatnonzero(~np.isnan(values)) if values.dtype.kind == 'f' else np.arange(len(values))
+        if len(valid) > n:
+            valid = valid[np.argpartition(values[valid], -n)[-n:]]
+        valid = valid[np.argsort(values[valid])[::-1]]
+        return [self._net_entry(i) for i in valid.tolist()]
+
+    def _net_entry(self, i):
+        seconds = self.seconds[i]
+        return {
+            'name': self.net_names[i],
+            'nodes': self.nodes[i],
+            'edges': self.edges[i],
+            'drivers': self.drivers[i],
+            'loads': self.loads[i],
+            'method': self.methods[i],
+            'seconds': None if math.isnan(seconds) else seconds,
+        }
+
+    def size_histogram(self):
+        """按节点数的 2 的幂分桶：[{'min_nodes', 'max_nodes', 'nets', 'seconds'}]"""
+        if not len(self.nodes):
+            return []
+        nodes = np.frombuffer(self.nodes, dtype=np.int64)
+        seconds = np.frombuffer(self.seconds, dtype=np.float64)
+        bucket = np.floor(np.log2(np.maximum(nodes, 1))).astype(np.int64)
+        counts = np.bincount(bucket)
+        timed = np.bincount(bucket, weights=~np.isnan(seconds), minlength=len(counts))
+        times = np.bincount(bucket, weights=np.nan_to_num(seconds), minlength=len(counts))
+        return [{'min_nodes': 1 << b, 'max_nodes': (1 << (b + 1)) - 1, 'nets': int(counts[b]),
+                 'seconds': float(times[b]) if timed[b] else None}
+                for b in range(len(counts)) if counts[b]]
+
+    def report(self):
+        return {
+            'wall_seconds': perf_counter() - self.start,
+            'phases': self.phases,
+            'nets': len(self.net_names),
+            'total_nodes': int(sum(self.nodes)),
+            'total_edges': int(sum(self.edges)),
+            'methods': dict(Counter(self.methods)),
+            'size_histogram': self.size_histogram(),
+            'slowest': self._top(self.seconds, self.top_n),
+            'largest': self._top(self.nodes, self.top_n),
+        }
+
+    def save_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=4, ensure_ascii=False)
+
+    def print_report(self):
+        report = self.report()
+        print(f"📊 运行统计：{report['nets']} 个 net，{report['total_nodes']} 个节点，"
+              f"{report['total_edges']} 条边，总耗时 {report['wall_seconds']:.6f} 秒")
+        for name, seconds in report['phases'].items():
+            share = seconds / report['wall_seconds'] * 100 if report['wall_seconds'] else 0.0
+            print(f"  {name:<9} {seconds:12.6f} 秒  {share:6.2f}%")
+        if not report['nets']:
+            return
+        print("  求解方式: " + '，'.join(f"{name} {count} 个" for name, count in report['methods'].items()))
+        print("  net 规模分布（节点数）:")
+        for row in report['size_histogram']:
+            seconds = '-' if row['seconds'] is None else f"{row['seconds']:.6f} 秒"
+            print(f"    {row['min_nodes']:>8} - {row['max_nodes']:<8} {row['nets']:>9} 个  {seconds}")
+        if report['slowest']:
+            print(f"  最慢的 {len(report['slowest'])} 个 net:")
+            for row in report['slowest']:
+                print(f"    {row['name']} {row['seconds']:.6f} 秒 nodes={row['nodes']} edges={row['edges']} "
+                      f"drivers={row['drivers']} loads={row['loads']} method={row['method']}")
+        else:
+            print("  （批量模式下按批计算，没有单个 net 的耗时）")
+        print(f"  最大的 {len(report['largest'])} 个 net:")
+        for row in report['largest']:
+            print(f"    {row['name']} nodes={row['nodes']} edges={row['edges']} "
+                  f"drivers={row['drivers']} loads={row['loads']} method={row['method']}")
@@ -0,0 +1,118 @@
+import mmap
+import os
+import re
+from multiprocessing import Pool
+from spefReader import *
+from spefInput import is_compressed
+from delayWriter import *
+from netMemo import DelayMemo
+from jitKernels import warm_up
+
+# 每个工作进程只接收一次 NAME_MAP
+_worker_name_map = None
+
+# *D_NET 行首（允许行首有空白，与 spefReader.DNET_PATTERN 相同），直接在 mmap 上搜索
+DNET_LINE = re.compile(rb'^[ \t]*\*D_NET\b', re.M)
+
+
+def split_dnet_chunks(spef_path, n_chunks):
+    """
+    按字节偏移把 SPEF 的 D_NET 部分切成约 n_chunks 块，
+    每块的起点都对齐到某个 "*D_NET" 行的行首（行首可以有缩进），返回 [(start, end)]；
+    文件中没有 *D_NET 时返回 []
+    """
+    if is_compressed(spef_path):
+        raise ValueError(f"{spef_path} 是压缩文件，无法按字节偏移切分，请使用单进程模式或先解压")
+    size = os.path.getsize(spef_path)
+    if size == 0:
+        return []
+    with open(spef_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        match = DNET_LINE.search(mm)
+        if match is None:
+            return []
+        first = match.start()
+
+        bounds = [first]
+        step = (size - first) / n_chunks
+        for k in range(1, n_chunks):
+            # 从 bounds[-1] + 1 开始，避免再次匹配到上一块的起点
+            match = DNET_LINE.search(mm, max(int(first + k * step), bounds[-1] + 1))
+            if match is None:
+                break
+            bounds.append(match.start())
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def iter_chunk_lines(spef_path, start, end):
+    """逐行读取 [start, end) 字节范围"""
+    with open(spef_path, 'rb') as f:
+        f.seek(start)
+        pos = start
+        for raw in f:
+            if pos >= end:
+                break
+            pos += len(raw)
+            yield raw.decode()
+
+
+def _init_worker(name_map):
+    global _worker_name_map
+    _worker_name_map = name_map
+    # 每个工作进程各自加载 Numba 内核（cache=True 时从磁盘缓存读取，不重新编译）
+    warm_up(background=False)
+
+
+def _process_chunk(task):
+    spef_path, start, end, part_path, batch_size, backend, fmt, memo_args = task
+    nets = iter_dnets(iter_chunk_lines(spef_path, start, end), _worker_name_map)
+    # 每块使用自己的时延缓存，命中统计返回给主进程汇总
+    memo = DelayMemo(*memo_args) if memo_args else None
+    # 分块文件与最终输出同格式，表头只在最终输出中写一次
+    with open_delay_output(part_path, fmt, header=False) as output:
+        count = write_delays(nets, _worker_name_map, output, batch_size, backend, memo=memo)
+    return count, output.method_counts, memo.stats() if memo is not None else None
+
+
+def compute_delays_parallel(spef_path, output_file, jobs, batch_size=None, backend='py',
+                            chunks_per_job=4, fmt='txt', memo=None):
+    """
+    多进程计算：各块结果先写入临时分块文件，
+    再按块顺序合并到 output_file，输出与单进程完全一致。
+    返回 (D_NET 总数, 各求解方式的 net 数)。
+    memo 不为 None 时各块使用同样大小的缓存，命中统计累加到 memo 上
+    """
+    with SpefReader(spef_path) as reader:
+        name_map = reader.name_map
+
+    chunks = split_dnet_chunks(spef_path, jobs * chunks_per_job)
+    if not chunks:
+        # 找不到 *D_NET 行首（格式不符合预期）时不能切分，退回单进程按行解析
+        print(f"⚠️ {spef_path} 中找不到 *D_NET 行首，无法切分，改为单进程处理")
+        with SpefReader(spef_path) as reader, open_delay_output(output_file, fmt) as output:
+            count = write_delays(reader, reader.name_map, output, batch_size, backend, memo=memo)
+        return count, output.method_counts
+    part_paths = [f"{output_file}.part{k}" for k in range(len(chunks))]
+    memo_args = (memo.max_entries, memo.precision) if memo is not None else None
+    tasks = [(spef_path, start, end, part_path, batch_size, backend, fmt, memo_args)
+             for (start, end), part_path in zip(chunks, part_paths)]
+
+    count = 0
+    try:
+        with Pool(jobs, initializer=_init_worker, initargs=(name_map,)) as pool, \
+                open_delay_output(output_file, fmt) as output:
+            # imap 按提交顺序返回，逐块合并
+            for part_path, (part_count, method_counts, memo_stats) in zip(part_paths,
+                                                                          pool.imap(_process_chunk, tasks)):
+                count += part_count
+                for method, n in method_counts.items():
+                    output.method_counts[method] += n
+                if memo_stats is not None:
+                    memo.merge_stats(memo_stats)
+                output.copy_from(part_path)
+                os.remove(part_path)
+    finally:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+    return count, output.method_counts
@@ -0,0 +1,169 @@
+import gzip
+import io
+import lzma
+import queue
+import shutil
+import subprocess
+import threading
+
+# 按文件头魔数识别压缩格式（不依赖扩展名）
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+# 子进程解压命令，按顺序取第一个能找到的
+_COMMANDS = {
+    'gzip': (['pigz', '-dc'], ['gzip', '-dc']),
+    'xz': (['xz', '-dc', '-T0'],),
+    'zstd': (['zstd', '-dcq'],),
+}
+
+BLOCK_SIZE = 1 << 22
+COMPRESSED_SUFFIXES = ('.gz', '.xz', '.zst', '.zstd')
+
+
+def compression_of(path):
+    """返回 'gzip'/'xz'/'zstd'，未压缩时返回 None"""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, kind in _MAGIC:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def is_compressed(path):
+    return compression_of(path) is not None
+
+
+def strip_compression_suffix(name):
+    """去掉压缩扩展名：Group0.spef.gz -> Group0.spef"""
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _python_stream(path, kind):
+    if kind == 'gzip':
+        return gzip.open(path, 'rb')
+    if kind == 'xz':
+        return lzma.open(path, 'rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(f"读取 {path} 需要 zstd 命令或 zstandard 模块") from None
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def _command_for(kind):
+    for command in _COMMANDS[kind]:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+class _ProcessStream(io.RawIOBase):
+    """读取外部解压命令的标准输出；提前关闭时结束子进程，读到末尾时检查退出码"""
+    def __init__(self, command, path):
+        self.path = path
+        self._proc = subprocess.Popen(command + [path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = self._proc.stdout.readinto(b)
+        if n == 0 and self._proc.wait() != 0:
+            raise OSError(f"解压 {self.path} 失败: {self._proc.stderr.read().decode(errors='replace').strip()}")
+        return n
+
+    def close(self):
+        if not self.closed:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.wait()
+            self._proc.stdout.close()
+            self._proc.stderr.close()
+        super().close()
+
+
+class _PrefetchStream(io.RawIOBase):
+    """
+    后台线程从 stream 中按 block_size 大块读取（即解压），放入最多 depth 块的有界队列，
+    解析线程从队列中取数据。zlib/lzma 解压时会释放 GIL，解压与解析可以重叠
+    """
+    def __init__(self, stream, block_size=BLOCK_SIZE, depth=4):
+        self._stream = stream
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._view = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._fill, args=(block_size,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _fill(self, block_size):
+        try:
+            while True:
+                block = self._stream.read(block_size)
+                if not self._put(block) or not block:
+                    return
+        except BaseException as exc:
+            self._put(exc)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._view and not self._eof:
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                raise item
+            if not item:
+                self._eof = True
+            self._view = memoryview(item)
+        n = min(len(b), len(self._view))
+        b[:n] = self._view[:n]
+        self._view = self._view[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    self._thread.join(0.01)
+            self._stream.close()
+        super().close()
+
+
+def open_spef(path, decompress='auto', block_size=BLOCK_SIZE):
+    """
+    以文本模式打开 SPEF，gzip/xz/zstd 压缩文件透明解压，解压在后台进行：
+    decompress='process' 用外部命令（pigz/gzip、xz、zstd）在子进程中解压，
+    'thread' 在后台线程中用 Python 模块解压，'auto' 找得到外部命令时用子进程
+    """
+    kind = compression_of(path)
+    if kind is None:
+        return open(path, 'r')
+    command = _command_for(kind) if decompress in ('auto', 'process') else None
+    if command is not None:
+        raw = _ProcessStream(command, path)
+    elif decompress == 'process':
+        raise RuntimeError(f"找不到 {kind} 的解压命令")
+    else:
+        raw = _PrefetchStream(_python_stream(path, kind), block_size)
+    return io.TextIOWrapper(io.BufferedReader(raw, buffer_size=block_size))
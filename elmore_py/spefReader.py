@@ -0,0 +1,336 @@
+import re
+from collections import namedtuple
+import numpy as np
+from spefInput import open_spef
+from cppBackend import cpp_parse_available, parse_net_sections
+
+# 一个 *D_NET 的紧凑记录：
+#   conns:     [(raw_node, direction)]      *CONN 段中的 *I 行
+#   caps:      [(node, cap)]                *CAP 段中的接地电容（3 列）
+#   ress:      [(node1, node2, res)]        *RES 段
+#   couplings: [(node1, node2, cap)]        *CAP 段中的耦合电容（4 列）
+DNet = namedtuple('DNet', ['net_id', 'name', 'conns', 'caps', 'ress', 'couplings'],
+                  defaults=((),))
+
+# 块解析得到的一个 *D_NET：*CAP/*RES 段保留为整块原始文本，由 parse_net_arrays 整块转换
+DNetBlock = namedtuple('DNetBlock', ['net_id', 'name', 'conns', 'cap_text', 'res_text'])
+
+# parse_net_arrays 的结果，节点编号为 nodes 中的下标：
+#   pins:   与 conns 一一对应的节点编号   nodes: 节点名列表
+#   cap:    每个节点的电容（耦合电容已按 coupling_factor 接地）
+#   edge_u/edge_v/edge_r:                *RES 段的电阻
+NetArrays = namedtuple('NetArrays', ['net_id', 'name', 'conns', 'pins', 'nodes', 'cap',
+                                     'edge_u', 'edge_v', 'edge_r'])
+
+NAME_MAP_PATTERN = re.compile(r'\*(\d+)\s+(\S+)')
+
+
+def read_name_map(lines):
+    """
+    从行迭代器中读取 *NAME_MAP，遇到 name map 结束（或第一个 *D_NET）时停止。
+    返回 (name_map, 结束处尚未处理的行)，以便调用方继续流式读取。
+    """
+    name_map = {}
+    in_name_map = False
+
+    for raw in lines:
+        line = raw.strip()
+        if line.startswith('*NAME_MAP'):
+            in_name_map = True
+            continue
+
+        if in_name_map:
+            if not line.startswith('*'):
+                return name_map, raw  # 到达非 * 开头的行，说明 name map 结束
+            match = NAME_MAP_PATTERN.match(line)
+            if match:
+                idx, name = match.groups()
+                name_map[idx] = name
+            else:
+                return name_map, raw  # 不再是 *数字 name 的格式，name map 结束
+        elif line.startswith('*D_NET'):
+            return name_map, raw  # 没有 *NAME_MAP，直接进入 net 部分
+
+    return name_map, None
+
+
+def iter_dnets(lines, name_map):
+    """逐个产出 *D_NET 记录，内存只与当前 net 的大小有关"""
+    in_dnet = False
+    in_conn = in_cap = in_res = False
+    net_id = net_name = None
+    conns = caps = ress = couplings = None
+
+    for line in lines:
+        line = line.strip()
+
+        if line.startswith("*D_NET") and not in_dnet:
+            in_dnet = True
+            in_conn = in_cap = in_res = False
+            net_id = line.split()[1].lstrip("*")
+            net_name = name_map.get(net_id, net_id)
+            conns, caps, ress, couplings = [], [], [], []
+            continue
+
+        if not in_dnet:
+            continue
+
+        if line.startswith("*END"):
+            in_dnet = False
+            in_conn = in_cap = in_res = False
+            yield DNet(net_id, net_name, conns, caps, ress, couplings)
+            continue
+
+        if line.startswith("*CONN"):
+            in_conn, in_cap, in_res = True, False, False
+            continue
+        elif line.startswith("*CAP"):
+            in_conn, in_cap, in_res = False, True, False
+            continue
+        elif line.startswith("*RES"):
+            in_conn, in_cap, in_res = False, False, True
+            continue
+
+        if in_conn:
+            if line.startswith("*I"):
+                parts = line.split()
+                if len(parts) >= 3:
+                    conns.append((parts[1].lstrip('*'), parts[2]))
+        elif in_cap:
+            parts = line.split()
+            if len(parts) >= 4:
+                # 耦合电容：编号 节点1 节点2 电容值
+                couplings.append((parts[1].lstrip('*'), parts[2].lstrip('*'), float(parts[3])))
+            elif len(parts) == 3:
+                caps.append((parts[1].lstrip('*'), float(parts[2])))
+        elif in_res:
+            parts = line.split()
+            if len(parts) >= 4:
+                ress.append((parts[1].lstrip('*'), parts[2].lstrip('*'), float(parts[3])))
+
+
+class SpefReader:
+    """
+    单遍流式读取 SPEF：打开时读入 *NAME_MAP，
+    之后迭代时逐个产出 DNet 记录，不会把整个文件读入内存。
+    gzip/xz/zstd 压缩的 SPEF 在后台解压（见 spefInput.open_spef）。
+    """
+
+    def __init__(self, spef_path):
+        self.spef_path = spef_path
+        self._file = open_spef(spef_path)
+        self.name_map, self._pending = read_name_map(self._file)
+
+    def _lines(self):
+        if self._pending is not None:
+            yield self._pending
+            self._pending = None
+        yield from self._file
+
+    def __iter__(self):
+        return iter_dnets(self._lines(), self.name_map)
+
+    def _chunks(self, size=1 << 22):
+        if self._pending is not None:
+            yield self._pending
+            self._pending = None
+        yield from iter(lambda: self._file.read(size), '')
+
+    def iter_arrays(self, coupling_factor=1.0):
+        """块解析模式：按大块读取文件，逐个产出 NetArrays，*CAP/*RES 段整块转换为数组"""
+        for block in iter_dnet_blocks(self._chunks(), self.name_map):
+            yield parse_net_arrays(block, coupling_factor)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def real_pin_names(net, name_map):
+    """把 *CONN 中的 "编号:端口" 还原为 "实例名/端口" """
+    raw_to_real_name = {}
+    for raw_node, _ in net.conns:
+        if ':' in raw_node:
+            name_id, port = raw_node.split(':')
+            mapped = name_map.get(name_id)
+            if mapped:
+                raw_to_real_name[raw_node] = f"{mapped}/{port}"
+    return raw_to_real_name
+
+
+def split_pins(net):
+    """按方向拆分 *CONN 节点，返回 (input_nodes, output_nodes)"""
+    input_nodes = [node for node, direction in net.conns if direction == 'I']
+    output_nodes = [node for node, direction in net.conns if direction == 'O']
+    return input_nodes, output_nodes
+
+
+def net_caps(net, coupling_factor=1.0):
+    """
+    合并接地电容和耦合电容，返回 [(node, cap)]。
+    耦合电容按 coupling_factor 倍接地到属于本 net 的那一端（两端都属于本 net 时取第一个节点）
+    """
+    if not net.couplings:
+        return net.caps
+    total = dict(net.caps)
+    members = set(total)
+    members.update(node for node, _ in net.conns)
+    for node1, node2, _ in net.ress:
+        members.add(node1)
+        members.add(node2)
+    for node1, node2, cap in net.couplings:
+        node = node1 if node1 in members or node2 not in members else node2
+        total[node] = total.get(node, 0.0) + cap * coupling_factor
+    return list(total.items())
+
+
+def fill_tree(net, tree):
+    """把一个 DNet（或 NetArrays）的电容和电阻填入 RC 树（RCTree / RCTreeM 等同接口的对象）"""
+    tree.set_name(net.name)
+    if isinstance(net, NetArrays):
+        nodes = net.nodes
+        nonzero = np.flatnonzero(net.cap)
+        for idx, cap in zip(nonzero.tolist(), net.cap[nonzero].tolist()):
+            tree.set_node_cap(nodes[idx], cap)
+        for u, v, res in zip(net.edge_u.tolist(), net.edge_v.tolist(), net.edge_r.tolist()):
+            tree.add_edge(nodes[u], nodes[v], res)
+        return tree
+    for node, cap in net_caps(net):
+        tree.set_node_cap(node, cap)
+    for node1, node2, res in net.ress:
+        tree.add_edge(node1, node2, res)
+    return tree
+
+
+DNET_PATTERN = re.compile(r'^[ \t]*\*D_NET\b', re.M)
+END_PATTERN = re.compile(r'^[ \t]*\*END\b', re.M)
+SECTION_PATTERN = re.compile(r'^[ \t]*\*(CONN|CAP|RES|INDUC)\b[^\n]*\n?', re.M)
+
+
+def _split_dnet_block(text, name_map):
+    """把一个 *D_NET ... *END 之间的文本按段标记切开，*CAP/*RES 段保留为整块文本"""
+    header_end = text.find('\n')
+    net_id = text[:header_end if header_end >= 0 else len(text)].split()[1].lstrip('*')
+    sections = {}
+    tags = list(SECTION_PATTERN.finditer(text))
+    for tag, following in zip(tags, tags[1:] + [None]):
+        body = text[tag.end():following.start() if following else len(text)]
+        sections[tag.group(1)] = sections.get(tag.group(1), '') + body
+
+    conns = []
+    for line in sections.get('CONN', '').split('\n'):
+        line = line.strip()
+        if line.startswith('*I'):
+            parts = line.split()
+            if len(parts) >= 3:
+                conns.append((parts[1].lstrip('*'), parts[2]))
+    return DNetBlock(net_id, name_map.get(net_id, net_id), conns,
+                     sections.get('CAP', ''), sections.get('RES', ''))
+
+
+def iter_dnet_blocks(chunks, name_map):
+    """
+    从文本块迭代器（例如每次 read 几 MB）中切出完整的 *D_NET，逐个产出 DNetBlock。
+    net 边界和段标记都用正则在整块文本上查找，不逐行处理
+    """
+    buf = ''
+    for chunk in chunks:
+        buf += chunk
+        pos = 0
+        while True:
+            head = DNET_PATTERN.search(buf, pos)
+            if head is None:
+                # 只保留最后一行残片，它可能是下一个 *D_NET 的开头
+                pos = max(pos, buf.rfind('\n') + 1)
+                break
+            end = END_PATTERN.search(buf, head.end())
+            if end is None:
+                pos = head.start()
+                break
+            yield _split_dnet_block(buf[head.start():end.start()], name_map)
+            pos = end.end()
+        buf = buf[pos:]
+
+
+def _block_rows(text):
+    """
+    把一段 *CAP/*RES 文本切分成 (行列表, token 列表, 非空行数)，节点名前的 '*' 在切分前统一去掉，
+    只用 str.split 在 C 中完成，不对每个 token 执行 Python 代码
+    """
+    lines = text.replace('*', '').split('\n')
+    tokens = ' '.join(lines).split()
+    return lines, tokens, len(lines) - lines.count('')
+
+
+def _columns(block_rows, width, exact):
+    """
+    取出列数为 width（exact=False 时为 ≥ width，只取前 width 列）的行，返回 width 个列。
+    token 数恰好是非空行数的 width 倍时（绝大多数 net）直接对 token 列表做步长切片；
+    混有其它列数的行（例如 *CAP 段中的 4 列耦合电容）时才逐行统计列数，用 object 数组按行下标取
+    """
+    lines, tokens, rows = block_rows
+    if len(tokens) == width * rows:
+        return [tokens[i::width] for i in range(width)]
+    counts = np.array([len(line.split()) for line in lines], dtype=np.int64)
+    keep = counts == width if exact else counts >= width
+    if not keep.any():
+        return [[] for _ in range(width)]
+    starts = (np.cumsum(counts) - counts)[keep]
+    table = np.array(tokens, dtype=object)[starts[:, None] + np.arange(width)]
+    return [table[:, i].tolist() for i in range(width)]
+
+
+def _to_float(tokens):
+    # 整列一次交给 NumPy 的 C 实现转换，不逐个调用 float()
+    return np.array(tokens, dtype=np.float64) if len(tokens) else np.zeros(0)
+
+
+def parse_net_arrays(block, coupling_factor=1.0):
+    """
+    把一个 DNetBlock 的 *CAP/*RES 段整块转换成数组，节点名按首次出现的顺序编号
+    （*CONN 中的引脚最先）。4 列的耦合电容与 net_caps 相同，按 coupling_factor 倍接地到
+    属于本 net 的一端；少于 3 列（*RES 少于 4 列）的行忽略。
+    编译了 _elmore_cpp 时整段交给 C++ 解析；否则用 str.split 切片、每个数值列一次转换成 float64
+    """
+    if cpp_parse_available():
+        nodes, pins, cap, edge_u, edge_v, edge_r = parse_net_sections(
+            block.cap_text, block.res_text, [node for node, _ in block.conns], coupling_factor)
+        return NetArrays(block.net_id, block.name, block.conns, pins, nodes, cap, edge_u, edge_v, edge_r)
+
+    _, res_u, res_v, res_r = _columns(_block_rows(block.res_text), 4, exact=False)
+    cap_rows = _block_rows(block.cap_text)
+    _, ground_node, ground_cap = _columns(cap_rows, 3, exact=True)
+    _, cpl_a, cpl_b, cpl_cap = _columns(cap_rows, 4, exact=False)
+
+    # dict.fromkeys 保持首次出现的顺序，编号与逐个 setdefault 相同
+    nodes = dict.fromkeys([node for node, _ in block.conns])
+    nodes.update(dict.fromkeys(res_u))
+    nodes.update(dict.fromkeys(res_v))
+    nodes.update(dict.fromkeys(ground_node))
+    # 耦合电容接地到属于本 net 的那一端（按顺序判断，与 net_caps 一致）
+    cpl_node = []
+    for a, b in zip(cpl_a, cpl_b):
+        node = a if a in nodes or b not in nodes else b
+        nodes.setdefault(node)
+        cpl_node.append(node)
+    nodes = list(nodes)
+    index = dict(zip(nodes, range(len(nodes))))
+
+    def ids(names):
+        return np.fromiter(map(index.__getitem__, names), dtype=np.int64, count=len(names))
+
+    cap = np.zeros(len(nodes))
+    # 与 set_node_cap 一致：同一节点重复出现时以最后一次为准
+    last_idx = ids(ground_node)[::-1]
+    _, keep = np.unique(last_idx, return_index=True)
+    cap[last_idx[keep]] = _to_float(ground_cap)[::-1][keep]
+    if cpl_node:
+        np.add.at(cap, ids(cpl_node), _to_float(cpl_cap) * coupling_factor)
+
+    return NetArrays(block.net_id, block.name, block.conns, ids([node for node, _ in block.conns]),
+                     nodes, cap, ids(res_u), ids(res_v), _to_float(res_r))
\ No newline at end of file
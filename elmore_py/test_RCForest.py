@@ -0,0 +1,72 @@
+import math
+import numpy as np
+import pytest
+from RCForest import *
+from meshSolver import mesh_delays
+
+
+def _forest_delays(forest, delays):
+    """把 compute 的结果还原成 {net 序号: {driver: {load: delay}}}，NaN 还原为 None"""
+    result = {}
+    for net, driver, load, delay in delays.tolist():
+        per_net = result.setdefault(net, {})
+        per_net.setdefault(forest.node_names[driver], {})[forest.node_names[load]] = \
+            None if math.isnan(delay) else delay
+    return result
+
+
+def _expected(nets, reference_delays):
+    # 成环的 net 以 meshSolver 为准，其余以逐 driver 的 RCTree 为准
+    expected = {}
+    for i, net in enumerate(nets):
+        if net.net_id == '3':
+            expected[i] = mesh_delays(net, *split_pins(net))
+        else:
+            expected[i] = reference_delays(net)
+    return expected
+
+
+def _assert_nested_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for net, per_driver in expected.items():
+        assert actual[net].keys() == per_driver.keys()
+        for driver, delays in per_driver.items():
+            for load, delay in delays.items():
+                if delay is None:
+                    assert actual[net][driver][load] is None
+                else:
+                    assert actual[net][driver][load] == pytest.approx(delay, rel=1e-9)
+
+
+def test_forest_matches_rctree(small_design, reference_delays):
+    _, nets = small_design
+    forest = RCForest()
+    for net in nets:
+        forest.add_net(net)
+    delays = forest.compute()
+    assert delays.dtype == DELAY_DTYPE
+    assert forest.net_methods.tolist() == ['tree', 'tree', 'mesh', 'tree']
+    _assert_nested_equal(_forest_delays(forest, delays), _expected(nets, reference_delays))
+
+
+def test_second_component_driver_is_rooted(small_design, reference_delays):
+    # net_d 的第二个 driver 与第一个不连通，也要作为根，而不是得到 NaN
+    net_d = small_design[1][3]
+    forest = RCForest()
+    forest.add_net(net_d)
+    actual = _forest_delays(forest, forest.compute())[0]
+    assert actual['103:Q']['104:C'] == pytest.approx(reference_delays(net_d)['103:Q']['104:C'])
+    assert actual['101:Q']['104:C'] is None
+
+
+def test_batches_and_net_arrays(spef_path, small_design, reference_delays):
+    _, nets = small_design
+    with SpefReader(spef_path) as reader:
+        batches = list(iter_delay_batches(reader.iter_arrays(), batch_size=3))
+    assert [forest.first_net for forest, _ in batches] == [0, 3]
+    actual = {}
+    for forest, delays in batches:
+        actual.update(_forest_delays(forest, delays))
+    _assert_nested_equal(actual, _expected(nets, reference_delays))
+    assert np.concatenate([forest.net_methods for forest, _ in batches]).tolist() == \
+        ['tree', 'tree', 'mesh', 'tree']
@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+from RCTree import *
+from delayWriter import net_delay_rows
+from spefReader import fill_tree, split_pins
+
+TREE_NETS = ['1', '2', '4']   # net_c 成环，不与逐 driver 的树遍历比较
+
+
+def _tree_nets(small_design):
+    _, nets = small_design
+    return [net for net in nets if net.net_id in TREE_NETS]
+
+
+def _assert_delays_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for driver, delays in expected.items():
+        assert actual[driver].keys() == delays.keys()
+        for load, delay in delays.items():
+            if delay is None:
+                assert actual[driver][load] is None
+            else:
+                assert actual[driver][load] == pytest.approx(delay, rel=1e-12)
+
+
+def test_hand_computed_delays():
+    # test.py 中的例子：1-2 (1Ω)，1-3 (2Ω)，3-4 (3Ω)
+    tree = RCTree()
+    for node, cap in [('1', 0.5), ('2', 1.0), ('3', 2.0), ('4', 4.0)]:
+        tree.set_node_cap(node, cap)
+    tree.add_edge('1', '2', 1)
+    tree.add_edge('1', '3', 2)
+    tree.add_edge('3', '4', 3)
+    delays = tree.compute_delays_to_loads('1', ['2', '4', 'missing'])
+    assert delays['2'] == pytest.approx(1e-6)
+    assert delays['4'] == pytest.approx((2 * 6 + 3 * 4) * 1e-6)
+    assert delays['missing'] is None
+
+
+def test_array_tree_matches_rctree(small_design, reference_delays):
+    tree = RCTreeA()
+    for net in _tree_nets(small_design):
+        tree.clear()
+        fill_tree(net, tree)
+        input_nodes, output_nodes = split_pins(net)
+        actual = {driver: tree.compute_delays_to_loads(driver, output_nodes) for driver in input_nodes}
+        _assert_delays_equal(actual, reference_delays(net))
+
+
+def test_array_backend_rows(small_design):
+    # --backend array 与 py 写出相同的行（成环的 net 两者都改用 mesh 求解）
+    name_map, nets = small_design
+    for net in nets:
+        expected = net_delay_rows(net, name_map, 'py')
+        actual = net_delay_rows(net, name_map, 'array')
+        assert actual[:2] == expected[:2] and actual[3:] == expected[3:]
+        np.testing.assert_allclose(actual[2], expected[2], rtol=1e-12)
+
+
+def _random_tree(tree, n, seed):
+    rnd = np.random.default_rng(seed)
+    for node in range(n):
+        tree.set_node_cap(f'n{node}', float(rnd.uniform(0.01, 1.0)))
+    for node in range(1, n):
+        tree.add_edge(f'n{int(rnd.integers(0, node))}', f'n{node}', float(rnd.uniform(1.0, 50.0)))
+    return tree
+
+
+def test_sparse_tree_matches_rctree(small_design, reference_delays):
+    for net in _tree_nets(small_design):
+        tree = fill_tree(net, RCTreeM())
+        input_nodes, output_nodes = split_pins(net)
+        actual = {driver: tree.compute_delays_to_loads(driver, output_nodes) for driver in input_nodes}
+        _assert_delays_equal(actual, reference_delays(net))
+
+    loads = [f'n{node}' for node in range(0, 300, 7)]
+    expected = _random_tree(RCTree(), 300, 3).compute_delays_to_loads('n5', loads)
+    actual = _random_tree(RCTreeM(), 300, 3).compute_delays_to_loads('n5', loads)
+    _assert_delays_equal({'n5': actual}, {'n5': expected})
+
+
+def test_rerooting_matches_per_driver(small_design, reference_delays):
+    for net in _tree_nets(small_design):
+        input_nodes, output_nodes = split_pins(net)
+        actual = fill_tree(net, RCTree()).compute_delays_all_drivers(input_nodes, output_nodes)
+        _assert_delays_equal(actual, reference_delays(net))
+
+    drivers = ['n0', 'n17', 'n150', 'n299']
+    loads = [f'n{node}' for node in range(0, 300, 11)] + ['missing']
+    expected = {driver: _random_tree(RCTree(), 300, 4).compute_delays_to_loads(driver, loads, apply_ln2=True)
+                for driver in drivers}
+    actual = _random_tree(RCTree(), 300, 4).compute_delays_all_drivers(drivers, loads, apply_ln2=True)
+    _assert_delays_equal(actual, expected)
+
+
+def test_rerooting_keeps_components_apart(small_design):
+    net_d = small_design[1][3]
+    delays = fill_tree(net_d, RCTree()).compute_delays_all_drivers(*split_pins(net_d))
+    assert delays['101:Q']['102:C'] == pytest.approx((7.0 * 0.5 + 3.0 * 0.3) * 1e-6)
+    assert delays['103:Q']['104:C'] == pytest.approx((11.0 * 0.5 + 2.0 * 0.1) * 1e-6)
+    assert delays['101:Q']['104:C'] is None and delays['103:Q']['102:C'] is None
+
+
+def _eco_tree(caps, res):
+    # _random_tree 的节点与电阻，再套用 caps/res 中的修改
+    tree = _random_tree(RCTree(), 200, 5)
+    for node, cap in caps.items():
+        tree.set_node_cap(node, cap)
+    for (node1, node2), value in res.items():
+        tree.set_edge_res(node1, node2, value)
+    return tree
+
+
+@pytest.mark.parametrize('n_caps', [3, 60])
+def test_apply_changes_matches_rebuild(n_caps):
+    loads = [f'n{node}' for node in range(0, 200, 9)]
+    tree = _eco_tree({}, {})
+    edges = [key for key in tree.resistance if key[0] < key[1]][:5]
+    for driver in ('n0', 'n42'):
+        tree.compute_delays_to_loads(driver, loads)   # 建立并缓存遍历状态
+
+    caps = {f'n{node}': 0.5 + node / 100 for node in range(0, 3 * n_caps, 3)}
+    res = {edge: 3.0 + i for i, edge in enumerate(edges)}
+    tree.apply_changes(caps=caps, res=res)
+    rebuilt = _eco_tree(caps, res)
+    for driver in ('n0', 'n42', 'n199'):
+        _assert_delays_equal({driver: tree.compute_delays_to_loads(driver, loads)},
+                             {driver: rebuilt.compute_delays_to_loads(driver, loads)})
+
+
+def test_set_edge_res_rejects_unknown_edge():
+    tree = _random_tree(RCTree(), 10, 6)
+    with pytest.raises(KeyError):
+        tree.set_edge_res('n0', 'missing', 1.0)
@@ -0,0 +1,69 @@
+import argparse
+import os
+import random
+import pytest
+import benchmark
+from benchmark import *
+
+
+@pytest.mark.parametrize('kind', list(GENERATORS))
+def test_generators_make_trees(kind):
+    synth = GENERATORS[kind](50, random.Random(1))
+    assert len(synth.edges) == synth.n - 1 and len(synth.caps) == synth.n
+    # 并查集检查连通（n-1 条边且连通即为树）
+    root = list(range(synth.n))
+
+    def find(x):
+        while root[x] != x:
+            x = root[x]
+        return x
+    for u, v, _ in synth.edges:
+        root[find(u)] = find(v)
+    assert len({find(node) for node in range(synth.n)}) == 1
+    assert synth.drivers and synth.loads and not set(synth.drivers) & set(synth.loads)
+
+
+def test_written_spef_reads_back(tmp_path):
+    nets, name_map = make_dnets('multi_driver', 30, 3, seed=2)
+    path = str(tmp_path / 'bench.spef')
+    write_spef(path, nets, name_map)
+    with SpefReader(path) as reader:
+        assert reader.name_map == name_map
+        # 合成 net 没有耦合电容（DNet 默认为 ()，读回为 []）
+        assert [net[:5] for net in reader] == [net[:5] for net in nets]
+
+
+def test_in_memory_backends_agree():
+    backends = ['py', 'py_single', 'array', 'numpy', 'forest'] + (['cpp'] if cpp_available() else [])
+    results = run_case('random', 60, 5, backends, repeat=1, seed=3)
+    assert list(results) == backends
+    assert all(entry['agree'] for entry in results.values())
+    results = run_case('chain', 40, 2, ['py', 'py_file'], repeat=1)
+    assert results['py_file']['agree']
+
+
+def test_find_cpp_bin_prefers_newest_executable(tmp_path, monkeypatch):
+    paths = [str(tmp_path / name) for name in ('stale', 'fresh', 'not_executable')]
+    for age, path in zip((200, 100, 0), paths):
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.utime(path, (os.path.getmtime(path) - age,) * 2)
+    os.chmod(paths[0], 0o755)
+    os.chmod(paths[1], 0o755)
+    monkeypatch.setattr(benchmark, 'CPP_BIN_CANDIDATES', paths)
+    assert find_cpp_bin() == paths[1]
+    monkeypatch.setattr(benchmark, 'CPP_BIN_CANDIDATES', paths[2:])
+    assert find_cpp_bin() is None
+
+
+def test_baseline_regressions():
+    baseline = {'random:40:10': {'py': {'seconds': 1.0}}}
+    results = {'random:40:10': {'py': {'seconds': 1.3}, 'numpy': {'seconds': 9.0}}}
+    assert compare_with_baseline(results, baseline, 0.5) == []
+    assert compare_with_baseline(results, baseline, 0.2) == [('random:40:10', 'py', 1.0, 1.3)]
+
+
+def test_parse_case():
+    assert parse_case('chain:5000:10') == ('chain', 5000, 10)
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_case('spiral:10:1')
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from cppBackend import *
+from spefReader import fill_tree, real_pin_names, split_pins
+from delayWriter import open_delay_output, write_delays
+
+# 需要先编译 _elmore_cpp 扩展（见 cppBackend._require_cpp 的提示）
+pytestmark = pytest.mark.skipif(not cpp_available(), reason="未编译 _elmore_cpp 扩展")
+
+
+def test_cpp_tree_matches_rctree(small_design, reference_delays):
+    _, nets = small_design
+    for net in nets:
+        if net.net_id == '3':   # 成环的 net 由 meshSolver 求解，不比较
+            continue
+        tree = fill_tree(net, RCTreeCpp())
+        input_nodes, output_nodes = split_pins(net)
+        expected = reference_delays(net)
+        for driver in input_nodes:
+            actual = tree.compute_delays_to_loads(driver, output_nodes + ['missing'])
+            assert actual.pop('missing') is None
+            assert actual.keys() == expected[driver].keys()
+            for load, delay in expected[driver].items():
+                assert actual[load] == (None if delay is None else pytest.approx(delay, rel=1e-12))
+
+
+def test_net_delays_writes_into_out():
+    # 1-0 (2Ω)，0-2 (3Ω)：从 1 驱动，2 不可达时为 -1
+    edge_u = np.array([1, 0], dtype=np.int32)
+    edge_v = np.array([0, 2], dtype=np.int32)
+    edge_r = np.array([2.0, 3.0])
+    cap = np.array([1.0, 0.5, 4.0, 9.0])
+    out = np.zeros(3)
+    result = net_delays(edge_u, edge_v, edge_r, cap, 1, np.array([2, 0, 3], dtype=np.int32), out=out)
+    assert result is out
+    np.testing.assert_allclose(out[:2], [(2 * 5 + 3 * 4) * 1e-6, 2 * 5 * 1e-6])
+    assert out[2] == -1
+
+
+def test_reused_buffers_do_not_leak_between_nets(small_design, reference_delays):
+    # C++ 内核每个线程复用一份 ElmoreWorkspace：依次计算规模不同的 net 不能残留上一个 net 的状态
+    _, nets = small_design
+    out = np.empty(8)
+    for net in [nets[1], nets[0], nets[3], nets[1]]:
+        tree = fill_tree(net, RCTreeCpp())
+        input_nodes, output_nodes = split_pins(net)
+        loads = np.array([tree.node_index[load] for load in output_nodes], dtype=np.int32)
+        for driver in input_nodes:
+            result = net_delays(tree.edge_u, tree.edge_v, tree.edge_r, tree.cap,
+                                tree.node_index[driver], loads, out=out[:len(loads)])
+            expected = [reference_delays(net)[driver][load] for load in output_nodes]
+            np.testing.assert_allclose(result, [-1 if delay is None else delay for delay in expected],
+                                       rtol=1e-12)
+
+
+def _write_netlist(path, small_design):
+    name_map, nets = small_design
+    with open(path, 'w') as f:
+        for net in nets:
+            names = real_pin_names(net, name_map)
+            input_nodes, output_nodes = split_pins(net)
+            f.write(f"Net name: {net.name}\n")
+            f.writelines(f"Input: {names[node]} (INV)\n" for node in input_nodes)
+            f.writelines(f"Output: {names[node]} (INV)\n" for node in output_nodes)
+
+
+@pytest.mark.parametrize('threads', [None, 2])
+def test_pipeline_matches_python(tmp_path, spef_path, small_design, threads):
+    netlist = str(tmp_path / 'small.netlist')
+    _write_netlist(netlist, small_design)
+    process_file(spef_path, netlist, str(tmp_path / 'cpp'), threads)
+    name_map, nets = small_design
+    with open_delay_output(str(tmp_path / 'py.txt')) as output:
+        write_delays(nets, name_map, output)
+    cpp_rows = (tmp_path / 'cpp' / 'small.txt').read_text().splitlines()
+    py_rows = (tmp_path / 'py.txt').read_text().splitlines()
+    assert len(cpp_rows) == len(py_rows)
+    for cpp_row, py_row in zip(cpp_rows, py_rows):
+        if py_row.startswith('u1/B '):
+            continue   # net_c 成环：C++ 流程按树计算，Python 改用 meshSolver
+        # 不可达的 load：C++ 写 -1，Python 写 nan；耦合电容（net_a）两边都接地到本 net 一端
+        assert cpp_row == py_row.replace(' nan', ' -1.000000')
@@ -0,0 +1,86 @@
+import math
+import numpy as np
+import pytest
+from delayOutput import *
+from delayWriter import write_delays
+
+ROWS = (['u2/A', 'u3/A', 'u2/A'], ['u1/Z', 'u1/Z', 'u4/Y'], [3.2e-05, math.nan, 1.8123456e-05],
+        ['tree', 'tree', 'mesh'], ['tree', 'mesh'])
+
+
+def _names(table, codes):
+    return table.names[codes].tolist()
+
+
+def _written(tmp_path, fmt, header=True):
+    path = str(tmp_path / f'out{OUTPUT_SUFFIX[fmt]}')
+    with open_delay_output(path, fmt, header=header) as output:
+        output.write_rows(*ROWS)
+    assert output.method_counts == {'tree': 1, 'mesh': 1, 'memo': 0}
+    return path
+
+
+@pytest.mark.parametrize('fmt', OUTPUT_FORMATS)
+def test_round_trip(tmp_path, fmt):
+    path = _written(tmp_path, fmt)
+    assert format_of(path) == fmt
+    table = load_delays(path)
+    assert _names(table, table.load) == ROWS[0]
+    assert _names(table, table.driver) == ROWS[1]
+    # 文本格式保留 6 位小数，npz 保存原值；不可达的 load 写为 nan
+    expected = ROWS[2] if fmt == 'npy' else [round(delay, 6) for delay in ROWS[2]]
+    np.testing.assert_array_equal(table.delay, expected)
+    if fmt == 'txt':
+        assert table.method is None
+    else:
+        assert table.method.tolist() == ROWS[3]
+
+
+def test_text_layout(tmp_path):
+    with open(_written(tmp_path, 'txt')) as f:
+        assert f.read() == "u2/A u1/Z 0.000032\nu3/A u1/Z nan\nu2/A u4/Y 0.000018\n"
+
+
+@pytest.mark.parametrize('fmt', OUTPUT_FORMATS)
+def test_copy_from_appends_parts(tmp_path, fmt):
+    part = _written(tmp_path, fmt, header=False)
+    path = str(tmp_path / f'merged{OUTPUT_SUFFIX[fmt]}')
+    with open_delay_output(path, fmt) as output:
+        output.write_rows(['u9/A'], ['u8/Z'], [1e-06])
+        output.copy_from(part)
+        output.copy_from(part)
+    table = load_delays(path)
+    assert _names(table, table.load) == ['u9/A'] + ROWS[0] * 2
+    if fmt != 'txt':
+        assert table.method.tolist() == [UNKNOWN_METHOD] + ROWS[3] * 2
+
+
+@pytest.mark.parametrize('fmt', ['csv-gz', 'npy'])
+def test_corner_columns(tmp_path, fmt):
+    path = str(tmp_path / f'corners{OUTPUT_SUFFIX[fmt]}')
+    delays = np.array([[1e-06, 2e-06], [3e-06, math.nan]])
+    with open_delay_output(path, fmt, corners=['ss', 'ff']) as output:
+        output.write_corner_rows(['u2/A', 'u3/A'], ['u1/Z', 'u1/Z'], delays, ['tree', 'mesh'], ['tree', 'mesh'])
+    for corner, column in [(0, 0), ('ff', 1), (1, 1)]:
+        table = load_delays(path, corner=corner)
+        np.testing.assert_array_equal(table.delay, delays[:, column])
+        assert table.method.tolist() == ['tree', 'mesh']
+    with pytest.raises(ValueError):
+        load_delays(path, corner='tt')
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        open_delay_output(str(tmp_path / 'out.parquet'), 'parquet')
+
+
+@pytest.mark.parametrize('batch_size', [None, 2])
+def test_unreachable_loads_are_nan(tmp_path, small_design, batch_size):
+    # 逐 net 与批量模式对不可达的 load 都写 nan
+    name_map, nets = small_design
+    path = str(tmp_path / 'out.txt')
+    with open_delay_output(path) as output:
+        write_delays(nets, name_map, output, batch_size)
+    with open(path) as f:
+        rows = f.read().splitlines()
+    assert [row for row in rows if row.endswith(' nan')] == ['u4/C u1/Q nan', 'u2/C u3/Q nan']
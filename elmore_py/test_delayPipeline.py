@@ -0,0 +1,49 @@
+import pytest
+from delayPipeline import *
+from delayOutput import open_delay_output
+from netMemo import DelayMemo
+from spefReader import SpefReader
+
+
+def _run(spef_path, path, run, **kwargs):
+    with SpefReader(spef_path) as reader, open_delay_output(path) as output:
+        count = run(reader, reader.name_map, output, **kwargs)
+    with open(path) as f:
+        return count, f.read()
+
+
+@pytest.mark.parametrize('kwargs', [
+    {}, {'batch_size': 3}, {'backend': 'array'}, {'memo': DelayMemo(16)},
+])
+@pytest.mark.parametrize('queue_depth, group_size', [(8, 64), (1, 1)])
+def test_pipeline_equals_write_delays(tmp_path, spef_path, kwargs, queue_depth, group_size):
+    expected = _run(spef_path, str(tmp_path / 'serial.txt'), write_delays,
+                    **{key: value for key, value in kwargs.items() if key != 'memo'})
+    actual = _run(spef_path, str(tmp_path / 'pipeline.txt'), pipeline_delays,
+                  queue_depth=queue_depth, group_size=group_size, **kwargs)
+    assert actual == expected and actual[0] == 4
+
+
+def _failing(nets):
+    yield nets[0]
+    raise ValueError('bad net')
+
+
+def test_reader_error_is_raised(tmp_path, small_design):
+    name_map, nets = small_design
+    with open_delay_output(str(tmp_path / 'out.txt')) as output:
+        with pytest.raises(ValueError, match='bad net'):
+            pipeline_delays(_failing(nets), name_map, output, group_size=1)
+
+
+class _BrokenOutput:
+    def write_rows(self, *rows):
+        raise OSError('disk full')
+
+
+def test_writer_error_stops_stages(small_design):
+    name_map, nets = small_design
+    # 队列深度为 1 时上游会阻塞在满队列上，写出失败后必须能被唤醒结束
+    with pytest.raises(OSError, match='disk full'):
+        pipeline_delays(nets * 50, name_map, _BrokenOutput(), queue_depth=1, group_size=1)
+    assert not [t for t in threading.enumerate() if t.name in ('spef-reader', 'elmore-compute')]
@@ -0,0 +1,89 @@
+import os
+import shutil
+import numpy as np
+import pytest
+import designCache
+from designCache import *
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """记录 build_design_arrays 的调用次数（即缓存未命中的次数）"""
+    calls = []
+    build = designCache.build_design_arrays
+
+    def counted(spef_path):
+        calls.append(spef_path)
+        return build(spef_path)
+    monkeypatch.setattr(designCache, 'build_design_arrays', counted)
+    return calls
+
+
+def test_cached_arrays_match_parse(tmp_path, spef_path):
+    with SpefReader(spef_path) as reader:
+        expected = list(reader.iter_arrays())
+        name_map = reader.name_map
+    with open_design(spef_path, str(tmp_path / 'cache')) as design:
+        assert design.name_map == name_map
+        actual = list(design)
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert (got.net_id, got.name, got.conns, got.nodes) == (want.net_id, want.name, want.conns, want.nodes)
+        for field in ('pins', 'cap', 'edge_u', 'edge_v', 'edge_r'):
+            np.testing.assert_array_equal(getattr(got, field), getattr(want, field))
+        assert isinstance(got.cap, np.memmap)
+
+
+def test_hit_and_miss(tmp_path, spef_path, builds):
+    cache_dir = str(tmp_path / 'cache')
+    open_design(spef_path, cache_dir).close()
+    open_design(spef_path, cache_dir).close()
+    assert len(builds) == 1
+    # mtime 键：文件修改后未命中；hash 键：内容相同的副本也能命中
+    with open(spef_path, 'a') as f:
+        f.write('\n')
+    open_design(spef_path, cache_dir).close()
+    assert len(builds) == 2
+    copy = str(tmp_path / 'copy.spef')
+    shutil.copyfile(spef_path, copy)
+    open_design(spef_path, cache_dir, key_mode='hash').close()
+    open_design(copy, cache_dir, key_mode='hash').close()
+    assert len(builds) == 3
+
+
+def test_stale_entry_is_rebuilt(tmp_path, spef_path, builds):
+    cache_dir = str(tmp_path / 'cache')
+    entry_dir = os.path.join(cache_dir, spef_cache_key(spef_path))
+    os.makedirs(entry_dir)
+    with open(os.path.join(entry_dir, 'node_cap.npy'), 'wb') as f:
+        f.write(b'partial')
+    with open_design(spef_path, cache_dir) as design:
+        assert len(design) == 4
+    assert len(builds) == 1
+
+
+def test_entry_written_by_another_process(tmp_path, spef_path, monkeypatch):
+    # 解析期间另一个进程写好了同一条目：os.replace 失败后直接使用它
+    cache_dir = str(tmp_path / 'cache')
+    other_dir = str(tmp_path / 'other')
+    open_design(spef_path, other_dir).close()
+    key = spef_cache_key(spef_path)
+    build = designCache.build_design_arrays
+
+    def racing(path):
+        arrays = build(path)
+        shutil.copytree(os.path.join(other_dir, key), os.path.join(cache_dir, key))
+        return arrays
+    monkeypatch.setattr(designCache, 'build_design_arrays', racing)
+    with open_design(spef_path, cache_dir) as design:
+        assert len(design) == 4
+    assert os.listdir(cache_dir) == [key]
+
+
+def test_eviction_keeps_current_entry(tmp_path, spef_path):
+    cache_dir = str(tmp_path / 'cache')
+    copy = str(tmp_path / 'copy.spef')
+    shutil.copyfile(spef_path, copy)
+    open_design(spef_path, cache_dir).close()
+    open_design(copy, cache_dir, max_bytes=1).close()
+    assert os.listdir(cache_dir) == [spef_cache_key(copy)]
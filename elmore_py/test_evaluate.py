@@ -0,0 +1,58 @@
+import math
+import numpy as np
+import pytest
+from delayOutput import open_delay_output
+from evaluate import *
+from evaluate import _table_from_dict
+
+# golden 中 (a, x) 的值 0.2 ≥ tolerance，用相对误差；(b, x) 的值 0.01 < tolerance，用绝对误差
+CALC = {('a', 'x'): 0.22, ('b', 'x'): 0.013, ('c', 'y'): math.nan, ('d', 'y'): 0.5}
+GOLDEN = {('c', 'y'): 0.3, ('b', 'x'): 0.01, ('a', 'x'): 0.2, ('e', 'z'): 0.1}
+
+
+def test_join_matches_dict_lookup():
+    calc = _table_from_dict(CALC)
+    golden = _table_from_dict(GOLDEN)
+    joined = join_delays(calc, golden)
+    names = joined.names
+    pairs = {(str(names[l]), str(names[d])): (c, g)
+             for l, d, c, g in zip(joined.load, joined.driver, joined.calc.tolist(), joined.golden.tolist())}
+    assert pairs.keys() == CALC.keys() & GOLDEN.keys()
+    for key, (c, g) in pairs.items():
+        assert g == GOLDEN[key]
+        assert c == CALC[key] or (math.isnan(c) and math.isnan(CALC[key]))
+    assert (joined.only_calc, joined.only_golden) == (1, 1)
+
+
+def test_duplicate_keys_keep_last():
+    calc = DelayTable(np.array(['a', 'x']), np.array([0, 0], dtype=np.int32), np.array([1, 1], dtype=np.int32),
+                      np.array([1.0, 2.0]))
+    golden = _table_from_dict({('a', 'x'): 2.0})
+    joined = join_delays(calc, golden)
+    assert joined.calc.tolist() == [2.0] and joined.only_calc == 0
+
+
+def test_stats_skip_non_finite():
+    stats, _ = compare_delay_tables(_table_from_dict(CALC), _table_from_dict(GOLDEN))
+    assert stats['matched'] == 3 and stats['non_finite'] == 1
+    assert (stats['abs_count'], stats['rel_count']) == (1, 1)
+    assert stats['abs_mean'] == pytest.approx(0.003)
+    assert stats['rel_mean'] == pytest.approx(0.1)
+    assert stats['worst_rel'][0]['load'] == 'a'
+    assert all(math.isfinite(value) for value in stats['rel_percentiles'].values())
+
+
+def test_evaluate_reads_every_format(tmp_path):
+    golden_path = str(tmp_path / 'golden.txt')
+    with open_delay_output(golden_path) as output:
+        output.write_rows(*zip(*[(l, d, v) for (l, d), v in GOLDEN.items()]))
+    results = []
+    for suffix in ('.txt', '.npz', '.csv.gz'):
+        calc_path = str(tmp_path / f'calc{suffix}')
+        with open_delay_output(calc_path, format_of(calc_path)) as output:
+            output.write_rows(*zip(*[(l, d, v) for (l, d), v in CALC.items()]))
+        results.append(evaluate(calc_path, golden_path, plot=False))
+    for stats in results:
+        assert stats['abs_mean'] == pytest.approx(results[0]['abs_mean'])
+        assert stats['rel_mean'] == pytest.approx(results[0]['rel_mean'])
+        assert stats['non_finite'] == 1
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+# 编译后的内核与其 py_func（同一份源码按纯 Python 执行）逐项比较；没有 numba 时两者是同一个函数
+pytest.importorskip('numba')
+import jitKernels
+
+
+def _random_tree(n, seed):
+    rnd = np.random.default_rng(seed)
+    par = np.array([-1] + [int(rnd.integers(0, i)) for i in range(1, n)], dtype=np.int64)
+    res = rnd.uniform(0.1, 5.0, n)
+    cap = rnd.uniform(0.001, 1.0, n)
+    src = np.concatenate([par[1:], np.arange(1, n)])
+    dst = np.concatenate([np.arange(1, n), par[1:]])
+    r = np.concatenate([res[1:], res[1:]])
+    order = np.argsort(src, kind='stable')
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    return offsets, dst[order].astype(np.int64), r[order], cap
+
+
+@pytest.mark.parametrize('n, root', [(2, 0), (100, 0), (500, 37)])
+def test_kernels_match_py_func(n, root):
+    offsets, adj, adj_r, cap = _random_tree(n, n)
+    jitted = jitKernels.dfs_preorder(offsets, adj, adj_r, root)
+    python = jitKernels.dfs_preorder.py_func(offsets, adj, adj_r, root)
+    for a, b in zip(jitted, python):
+        np.testing.assert_array_equal(a, b)
+    order, parent, parent_r = jitted
+
+    caps = [cap.copy(), cap.copy()]
+    jitKernels.subtree_caps(order, parent, caps[0])
+    jitKernels.subtree_caps.py_func(order, parent, caps[1])
+    np.testing.assert_allclose(caps[0], caps[1], rtol=1e-12)
+
+    delays = [np.zeros(n), np.zeros(n)]
+    jitKernels.path_delays(order, parent, parent_r, caps[0], delays[0])
+    jitKernels.path_delays.py_func(order, parent, parent_r, caps[0], delays[1])
+    np.testing.assert_allclose(delays[0], delays[1], rtol=1e-12)
+
+
+def test_reroot_sums_matches_py_func():
+    n = 300
+    rnd = np.random.default_rng(1)
+    parent = np.array([-1] + [int(rnd.integers(0, i)) for i in range(1, n)], dtype=np.int64)
+    parent_r = rnd.uniform(0.1, 5.0, n)
+    comp = np.zeros(n, dtype=np.int64)
+    cap = rnd.uniform(0.001, 1.0, n)
+    results = []
+    for kernel in (jitKernels.reroot_sums, jitKernels.reroot_sums.py_func):
+        subtree_cap, down, up = cap.copy(), np.zeros(n), np.zeros(n)
+        kernel(parent, parent_r, comp, subtree_cap, down, up)
+        results.append((subtree_cap, down, up))
+    for a, b in zip(*results):
+        np.testing.assert_allclose(a, b, rtol=1e-12)
+
+
+def test_tree_sums_same_with_and_without_jit():
+    n = jitKernels.JIT_MIN_NODES * 4
+    rnd = np.random.default_rng(2)
+    parent = [-1] + [int(rnd.integers(0, i)) for i in range(1, n)]
+    parent_r = rnd.uniform(0.1, 5.0, n).tolist()
+    comp = [0] * n
+    cap = rnd.uniform(0.001, 1.0, n).tolist()
+    enabled = jitKernels.jit_enabled()
+    try:
+        jitKernels.set_enabled(True)
+        jitted = jitKernels.tree_sums(parent, parent_r, comp, cap)
+        jitKernels.set_enabled(False)
+        python = jitKernels.tree_sums(parent, parent_r, comp, cap)
+    finally:
+        jitKernels.set_enabled(enabled)
+    for a, b in zip(jitted, python):
+        np.testing.assert_allclose(a, b, rtol=1e-12)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import meshSolver
+from meshSolver import *
+from benchmark import make_dnets
+from spefReader import SpefReader
+
+
+def test_loop_detection(spef_path, small_design):
+    assert not edges_have_loop([(1, 2), (2, 3), (2, 4), (5, 6)])
+    assert edges_have_loop([(1, 2), (2, 3), (3, 1)])
+    assert edges_have_loop([(1, 2), (2, 1)])   # 并联电阻
+    assert edges_have_loop([(1, 1)])           # 自环
+    _, nets = small_design
+    with SpefReader(spef_path) as reader:
+        arrays = list(reader.iter_arrays())
+    assert [has_loop(net) for net in nets] == [has_loop(net) for net in arrays] == [False, False, True, False]
+
+
+def _random_mesh(n, extra, seed):
+    """随机生成树再加 extra 条边成环，最后再加一个孤立的两节点部分"""
+    rng = np.random.default_rng(seed)
+    u = [int(rng.integers(0, i)) for i in range(1, n)]
+    v = list(range(1, n))
+    for _ in range(extra):
+        a, b = rng.choice(n, 2, replace=False)
+        u.append(int(a))
+        v.append(int(b))
+    u.append(n)
+    v.append(n + 1)
+    r = rng.uniform(1.0, 50.0, len(u))
+    cap = rng.uniform(0.1, 1.0, n + 2)
+    return cap, np.array(u), np.array(v), r
+
+
+def _dense_delays(cap, edge_u, edge_v, edge_r, driver, nodes):
+    """直接组装整个电导矩阵，去掉 driver 所在行列后稠密求解"""
+    n = len(cap)
+    G = np.zeros((n, n))
+    for a, b, r in zip(edge_u, edge_v, edge_r):
+        G[a, a] += 1 / r
+        G[b, b] += 1 / r
+        G[a, b] -= 1 / r
+        G[b, a] -= 1 / r
+    others = [i for i in nodes if i != driver]
+    delays = np.zeros(n)
+    delays[others] = np.linalg.solve(G[np.ix_(others, others)], cap[others])
+    return delays[nodes]
+
+
+@pytest.mark.parametrize('use_scipy', [True, False])
+def test_solve_mesh_matches_dense_solve(monkeypatch, use_scipy):
+    if not use_scipy:
+        monkeypatch.setattr(meshSolver, 'splu', None)
+    n = 40
+    cap, edge_u, edge_v, edge_r = _random_mesh(n, 15, seed=5)
+    drivers = [0, 17, n]
+    result = solve_mesh(cap, edge_u, edge_v, edge_r, drivers)
+    assert result.shape == (3, n + 2)
+    main = list(range(n))
+    for row, driver in zip(result[:2], drivers):
+        np.testing.assert_allclose(row[:n], _dense_delays(cap, edge_u, edge_v, edge_r, driver, main), rtol=1e-10)
+        assert np.isnan(row[n:]).all()   # 与 driver 不连通
+    np.testing.assert_allclose(result[2], [np.nan] * n + [0.0, edge_r[-1] * cap[n + 1]])
+
+
+def test_zero_resistance_merges_nodes():
+    cap, edge_u, edge_v, edge_r = _random_mesh(20, 5, seed=2)
+    shorted = edge_r.copy()
+    shorted[[3, 8]] = 0.0
+    tiny = edge_r.copy()
+    tiny[[3, 8]] = 1e-9
+    np.testing.assert_allclose(solve_mesh(cap, edge_u, edge_v, shorted, [0]),
+                               solve_mesh(cap, edge_u, edge_v, tiny, [0]), rtol=1e-6, atol=1e-6)
+
+
+def test_mesh_equals_tree_elmore_on_trees(small_design, reference_delays):
+    nets = [net for net in small_design[1] if not has_loop(net)]
+    nets += make_dnets('multi_driver', 60, 3, seed=4)[0]
+    for net in nets:
+        expected = reference_delays(net)
+        actual = mesh_delays(net, *split_pins(net))
+        for driver, delays in expected.items():
+            for load, delay in delays.items():
+                assert actual[driver][load] == (None if delay is None else pytest.approx(delay, rel=1e-9))
@@ -0,0 +1,94 @@
+import math
+import pytest
+from multiCorner import *
+from delayOutput import load_delays, open_delay_output
+from delayWriter import write_delays
+
+
+def _corner_spef(spef_text, c_scale, r_scale):
+    """按比例缩放 R/C，并把每个 *CAP 段倒序（corner SPEF 的电容行顺序可以不同）"""
+    lines, caps, section = [], [], None
+    for line in spef_text.splitlines():
+        if line.startswith('*'):
+            lines.extend(reversed(caps))
+            caps = []
+            section = line.split()[0]
+        elif line and section in ('*CAP', '*RES'):
+            *fields, value = line.split()
+            line = ' '.join(fields + [repr(float(value) * (c_scale if section == '*CAP' else r_scale))])
+            if section == '*CAP':
+                caps.append(line)
+                continue
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def _table(path, corner=0):
+    table = load_delays(path, corner=corner)
+    names = table.names.tolist()
+    return {(names[l], names[d]): v for l, d, v in zip(table.load.tolist(), table.driver.tolist(),
+                                                        table.delay.tolist())}
+
+
+def _single(path, out):
+    with SpefReader(path) as reader, open_delay_output(out, 'npy') as output:
+        write_delays(reader, reader.name_map, output, batch_size=3)
+    return _table(out)
+
+
+def _assert_close(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        assert (math.isnan(value) and math.isnan(actual[key])) or actual[key] == pytest.approx(value, rel=1e-12)
+
+
+def test_parse_corners():
+    assert parse_corners('cworst:1.1:1.2, cbest:0.9,typ') == [
+        Corner('cworst', 1.1, 1.2), Corner('cbest', 0.9, 1.0), Corner('typ', 1.0, 1.0)]
+    for spec in (':1:1', 'a:1:2:3', 'a:x'):
+        with pytest.raises(ValueError):
+            parse_corners(spec)
+
+
+def test_corner_spefs_align_with_single_corner_runs(tmp_path, spef_path, spef_text):
+    corner_path = tmp_path / 'slow.spef'
+    corner_path.write_text(_corner_spef(spef_text, 2.0, 0.75))
+    out = str(tmp_path / 'corners.npz')
+    corners = [Corner('typ', 1.0, 1.0), Corner('slow', 1.0, 1.0)]
+    with SpefReader(spef_path) as base, SpefReader(str(corner_path)) as slow, \
+            open_delay_output(out, 'npy', corners=['typ', 'slow']) as output:
+        assert write_corner_delays([base, slow], corners, output, batch_size=3) == 4
+        assert output.method_counts == {'tree': 3, 'mesh': 1, 'memo': 0}
+    _assert_close(_table(out, 'typ'), _single(spef_path, str(tmp_path / 'typ.npz')))
+    slow = _table(out, 'slow')
+    _assert_close(slow, _single(str(corner_path), str(tmp_path / 'slow.npz')))
+    typ = _table(out, 'typ')
+    assert all(slow[key] == pytest.approx(value * 1.5) for key, value in typ.items() if not math.isnan(value))
+
+
+def test_scaled_corners_of_one_spef(tmp_path, spef_path):
+    out = str(tmp_path / 'scaled.npz')
+    corners = [Corner('typ', 1.0, 1.0), Corner('x6', 2.0, 3.0)]
+    with SpefReader(spef_path) as reader, open_delay_output(out, 'npy', corners=['typ', 'x6']) as output:
+        write_corner_delays([reader], corners, output)
+    typ = _table(out, 'typ')
+    _assert_close(typ, _single(spef_path, str(tmp_path / 'typ.npz')))
+    # Elmore 时延对 R、C 都是线性的
+    _assert_close(_table(out, 'x6'), {key: value * 6 for key, value in typ.items()})
+    with pytest.raises(ValueError, match='corner SPEF 数'):
+        write_corner_delays([reader, reader], corners[:1], output)
+
+
+@pytest.mark.parametrize('edit, message', [
+    (lambda text: text.replace('1 *101:Z *1:1 10.0', '1 *1:1 *101:Z 10.0'), '电阻与拓扑不一致'),
+    (lambda text: text.replace('4 *102:A 0.2', '4 *1:9 0.2'), '多出节点'),
+    (lambda text: text[:text.index('*D_NET *4')], 'D_NET 数不一致'),
+])
+def test_mismatched_corner_spef(tmp_path, spef_path, spef_text, edit, message):
+    corner_path = tmp_path / 'bad.spef'
+    corner_path.write_text(edit(spef_text))
+    corners = [Corner('a', 1.0, 1.0), Corner('b', 1.0, 1.0)]
+    with SpefReader(spef_path) as base, SpefReader(str(corner_path)) as bad, \
+            open_delay_output(str(tmp_path / 'out.npz'), 'npy', corners=['a', 'b']) as output:
+        with pytest.raises(ValueError, match=message):
+            write_corner_delays([base, bad], corners, output)
@@ -0,0 +1,44 @@
+import os
+from netIndex import *
+
+
+def test_index_entries(spef_path):
+    index = build_net_index(spef_path)
+    assert [(entry.net_id, entry.name, entry.caps, entry.pins) for entry in index['nets']] == [
+        ('1', 'net_a', 6, 3), ('2', 'net_b', 6, 4), ('3', 'net_c', 3, 2), ('4', 'net_d', 4, 4)]
+    with open(spef_path, 'rb') as f:
+        data = f.read()
+    for entry in index['nets']:
+        assert data[entry.start:entry.end].startswith(b'*D_NET *' + entry.net_id.encode())
+        assert data[entry.start:entry.end].rstrip().endswith(b'*END')
+
+
+def test_read_net_matches_streaming_reader(spef_path, small_design):
+    _, nets = small_design
+    index = build_net_index(spef_path)
+    for entry, net in zip(index['nets'], nets):
+        assert read_net(spef_path, entry, index['name_map']) == net
+    assert [entry.net_id for entry in select_nets(index, ['net_[bd]', '3'])] == ['2', '3', '4']
+
+
+def test_index_is_saved_and_rebuilt(spef_path):
+    index = load_net_index(spef_path)
+    assert os.path.exists(index_path_for(spef_path))
+    assert load_net_index(spef_path) == index
+    with open(spef_path, 'a') as f:
+        f.write('\n')
+    assert load_net_index(spef_path)['size'] == index['size'] + 1
+
+
+def test_selected_delays_match_full_run(tmp_path, spef_path, small_design):
+    name_map, nets = small_design
+    expected_file = str(tmp_path / 'all.txt')
+    with open_delay_output(expected_file) as output:
+        for net in nets[1:3]:
+            write_net_delays(net, name_map, output)
+    actual_file = str(tmp_path / 'selected.txt')
+    with open_delay_output(actual_file) as output:
+        selected = compute_selected_delays(spef_path, ['net_b', 'net_c'], output)
+    assert [entry.name for entry in selected] == ['net_b', 'net_c']
+    with open(expected_file) as expected, open(actual_file) as actual:
+        assert actual.read() == expected.read()
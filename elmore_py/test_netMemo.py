@@ -0,0 +1,77 @@
+import math
+import re
+import pytest
+from netMemo import *
+from delayWriter import net_delay_rows
+
+# net_a 改名后的副本 net_e：内部节点 *1:k -> *5:k，引脚换到别的实例上，R/C 与拓扑不变
+RENAMES = {'*1:': '*5:', '*101:': '*104:', '*102:': '*101:', '*103:': '*102:'}
+
+
+@pytest.fixture
+def renamed_spef(tmp_path, spef_text):
+    start = spef_text.index('*D_NET *1 ')
+    block = spef_text[start:spef_text.index('*END\n', start) + 5]
+    block = re.sub('|'.join(re.escape(old) for old in RENAMES), lambda m: RENAMES[m.group()], block)
+    text = spef_text.replace('*4 net_d\n', '*4 net_d\n*5 net_e\n') + '\n' + block.replace('*D_NET *1 ', '*D_NET *5 ')
+    path = tmp_path / 'renamed.spef'
+    path.write_text(text)
+    with SpefReader(str(path)) as reader:
+        nets = list(reader)
+    with SpefReader(str(path)) as reader:
+        arrays = list(reader.iter_arrays())
+        return reader.name_map, nets, arrays
+
+
+def test_renamed_net_has_same_key(renamed_spef):
+    _, nets, arrays = renamed_spef
+    net_a, net_e = nets[0], nets[4]
+    assert net_e.conns[0][0] != net_a.conns[0][0]
+    for precision in PRECISIONS:
+        assert canonical_key(net_a, precision) == canonical_key(net_e, precision)
+        assert canonical_key(arrays[0], precision) == canonical_key(arrays[4], precision)
+    keys = [canonical_key(net) for net in nets[:4]]
+    assert len(set(keys)) == 4
+
+
+def test_key_changes_with_values(small_design):
+    net = small_design[1][0]
+    key = canonical_key(net)
+    (a, b, r), *rest = net.ress
+    assert canonical_key(net._replace(ress=[(a, b, r * 1.01)] + rest)) != key
+    assert canonical_key(net._replace(conns=net.conns[::-1])) != key
+    # 小于单精度舍入误差的扰动：float32 下相同，float64 下不同
+    nudged = net._replace(ress=[(a, b, r * (1 + 1e-12))] + rest)
+    assert canonical_key(nudged) == key
+    assert canonical_key(nudged, 'float64') != canonical_key(net, 'float64')
+
+
+def _same_rows(actual, expected):
+    assert actual[:2] == expected[:2]
+    assert all(x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(actual[2], expected[2]))
+
+
+@pytest.mark.parametrize('which', ['nets', 'arrays'])
+def test_memo_hit_gives_same_rows(renamed_spef, which):
+    name_map, nets, arrays = renamed_spef
+    nets = nets if which == 'nets' else arrays
+    memo = DelayMemo()
+    rows = [net_delay_rows(net, name_map, memo=memo) for net in nets]
+    assert [r[4] for r in rows] == [['tree'], ['tree'], ['mesh'], ['tree'], ['memo']]
+    _same_rows(rows[4], net_delay_rows(nets[4], name_map))
+    # 命中时引脚名换成 net_e 自己的
+    assert set(rows[4][1]) == {'u4/Z'}
+    assert memo.stats() == {'hits': 1, 'misses': 4, 'evictions': 0, 'entries': 4, 'hit_rate': 0.2}
+
+
+def test_lru_eviction(small_design):
+    name_map, nets = small_design
+    memo = DelayMemo(max_entries=2)
+    for net in nets + nets[-1:]:
+        net_delay_rows(net, name_map, memo=memo)
+    stats = memo.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 4, 2, 2)
+    # net_a 已被淘汰，再次查询未命中
+    assert memo.get(memo.key(nets[0]), nets[0]) is None
+    memo.merge_stats({'hits': 3, 'misses': 1, 'evictions': 0})
+    assert (memo.hits, memo.misses) == (4, 6)
@@ -0,0 +1,49 @@
+import json
+from netProfiler import *
+from delayWriter import write_delays
+from delayOutput import open_delay_output
+from spefReader import SpefReader
+
+
+def test_net_size_same_for_both_parsers(spef_path, small_design):
+    _, nets = small_design
+    with SpefReader(spef_path) as reader:
+        arrays = list(reader.iter_arrays())
+    assert [net_size(net) for net in nets] == [net_size(net) for net in arrays] == \
+        [(5, 4), (6, 5), (4, 4), (6, 4)]
+
+
+def _profile(tmp_path, nets, name_map, batch_size):
+    profiler = RunProfiler(top_n=2)
+    with open_delay_output(str(tmp_path / f'out{batch_size}.txt')) as output:
+        write_delays(profiler.timed(nets), name_map, output, batch_size, profiler=profiler)
+    return profiler.report()
+
+
+def test_report_per_net_and_batch(tmp_path, small_design):
+    name_map, nets = small_design
+    per_net = _profile(tmp_path, nets, name_map, None)
+    batch = _profile(tmp_path, nets, name_map, 3)
+    for report in (per_net, batch):
+        assert report['nets'] == 4 and report['total_nodes'] == 21 and report['total_edges'] == 17
+        assert report['methods'] == {'tree': 3, 'mesh': 1}
+        assert {row['name'] for row in report['largest']} == {'net_b', 'net_d'}   # 都是 6 个节点
+        assert [(row['min_nodes'], row['nets']) for row in report['size_histogram']] == [(4, 4)]
+        assert report['phases']['compute'] > 0
+    assert len(per_net['slowest']) == 2 and all(row['seconds'] > 0 for row in per_net['slowest'])
+    # 批量模式按批计算，没有单个 net 的耗时
+    assert batch['slowest'] == []
+    assert batch['size_histogram'][0]['seconds'] is None
+
+
+def test_save_json(tmp_path, small_design):
+    profiler = RunProfiler()
+    for net in small_design[1]:
+        profiler.add_net(net, 1, 1, 0.5)
+    profiler.tag_methods(['mesh'])
+    path = str(tmp_path / 'profile.json')
+    profiler.save_json(path)
+    with open(path) as f:
+        report = json.load(f)
+    assert report['methods'] == {'tree': 3, 'mesh': 1}
+    assert report['size_histogram'][0]['seconds'] == 2.0
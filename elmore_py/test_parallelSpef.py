@@ -0,0 +1,47 @@
+import os
+import numpy as np
+import pytest
+from parallelSpef import *
+
+
+def _single_process(spef_path, output_file, batch_size=None, fmt='txt'):
+    with SpefReader(spef_path) as reader, open_delay_output(output_file, fmt) as output:
+        count = write_delays(reader, reader.name_map, output, batch_size)
+    return count, output.method_counts
+
+
+@pytest.mark.parametrize('batch_size, fmt', [(None, 'txt'), (2, 'txt'), (None, 'csv-gz'), (None, 'npy')])
+def test_chunked_output_equals_single_process(tmp_path, spef_path, batch_size, fmt):
+    suffix = OUTPUT_SUFFIX[fmt]
+    expected_file = str(tmp_path / f'single{suffix}')
+    actual_file = str(tmp_path / f'jobs{suffix}')
+    expected = _single_process(spef_path, expected_file, batch_size, fmt)
+    actual = compute_delays_parallel(spef_path, actual_file, jobs=2, batch_size=batch_size,
+                                     chunks_per_job=2, fmt=fmt)
+    assert actual == expected == (4, {'tree': 3, 'mesh': 1, 'memo': 0})
+    expected_table = load_delays(expected_file)
+    actual_table = load_delays(actual_file)
+    for name in ('load', 'driver', 'method'):
+        np.testing.assert_array_equal(getattr(actual_table, name), getattr(expected_table, name))
+    np.testing.assert_array_equal(actual_table.delay, expected_table.delay)
+    assert not [name for name in os.listdir(tmp_path) if '.part' in name]
+
+
+def test_chunks_start_at_indented_dnet(tmp_path, spef_text):
+    path = tmp_path / 'indented.spef'
+    path.write_bytes(spef_text.replace('\n*D_NET', '\n  *D_NET').encode())
+    chunks = split_dnet_chunks(str(path), 4)
+    assert len(chunks) > 1
+    data = path.read_bytes()
+    assert all(data[start:end].lstrip().startswith(b'*D_NET') for start, end in chunks)
+    assert chunks[-1][1] == len(data)
+
+
+def test_no_dnet_falls_back_to_single_process(tmp_path, spef_text):
+    # *D_NET 不在行首时无法切分，仍要写出与单进程相同的结果
+    path = tmp_path / 'inline.spef'
+    path.write_text(spef_text.replace('\n*D_NET', '\n1 *D_NET'))
+    assert split_dnet_chunks(str(path), 4) == []
+    count, _ = compute_delays_parallel(str(path), str(tmp_path / 'out.txt'), jobs=2)
+    assert count == _single_process(str(path), str(tmp_path / 'single.txt'))[0]
+    assert (tmp_path / 'out.txt').read_bytes() == (tmp_path / 'single.txt').read_bytes()
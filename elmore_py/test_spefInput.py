@@ -0,0 +1,69 @@
+import gzip
+import importlib.util
+import lzma
+import shutil
+import subprocess
+import pytest
+from spefInput import *
+from spefInput import _COMMANDS
+from spefReader import SpefReader
+
+
+def _compress(tmp_path, spef_text, kind):
+    data = spef_text.encode()
+    if kind == 'gzip':
+        data = gzip.compress(data)
+    elif kind == 'xz':
+        data = lzma.compress(data)
+    elif shutil.which('zstd'):
+        data = subprocess.run(['zstd', '-qc'], input=data, stdout=subprocess.PIPE, check=True).stdout
+    else:
+        zstandard = pytest.importorskip('zstandard')
+        data = zstandard.ZstdCompressor().compress(data)
+    # 扩展名故意不对应，格式只按文件头识别
+    path = tmp_path / f'small.{kind}.bin'
+    path.write_bytes(data)
+    return str(path)
+
+
+def _modes(kind):
+    modes = []
+    if kind != 'zstd' or importlib.util.find_spec('zstandard'):
+        modes.append('thread')
+    if any(shutil.which(command[0]) for command in _COMMANDS[kind]):
+        modes.append('process')
+    return modes
+
+
+@pytest.mark.parametrize('kind', ['gzip', 'xz', 'zstd'])
+def test_compressed_reads_like_plain(tmp_path, spef_text, spef_path, kind):
+    path = _compress(tmp_path, spef_text, kind)
+    assert compression_of(path) == kind and is_compressed(path) and not is_compressed(spef_path)
+    for mode in _modes(kind):
+        with open_spef(path, decompress=mode, block_size=7) as f:
+            assert f.read() == spef_text
+    with SpefReader(spef_path) as plain, SpefReader(path) as compressed:
+        assert compressed.name_map == plain.name_map
+        assert list(compressed) == list(plain)
+
+
+@pytest.mark.parametrize('mode', ['thread', 'process'])
+def test_early_close_and_corrupt_input(tmp_path, spef_text, mode):
+    if mode not in _modes('gzip'):
+        pytest.skip('没有 gzip 命令')
+    path = _compress(tmp_path, spef_text * 200, 'gzip')
+    f = open_spef(path, decompress=mode, block_size=64)
+    assert f.readline().startswith('*SPEF')
+    f.close()   # 后台线程/子进程仍有数据未读完时也能关闭
+
+    bad = tmp_path / 'bad.gz'
+    bad.write_bytes(b'\x1f\x8b' + b'\x00' * 32)
+    with pytest.raises(OSError):
+        with open_spef(str(bad), decompress=mode) as f:
+            f.read()
+
+
+def test_strip_compression_suffix():
+    assert strip_compression_suffix('Group0.spef.gz') == 'Group0.spef'
+    assert strip_compression_suffix('Group0.spef.zst') == 'Group0.spef'
+    assert strip_compression_suffix('Group0.spef') == 'Group0.spef'
@@ -0,0 +1,78 @@
+import numpy as np
+from spefReader import *
+
+NET_IDS = ['1', '2', '3', '4']
+
+
+def test_reader_parses_every_section(spef_path):
+    with SpefReader(spef_path) as reader:
+        nets = list(reader)
+    assert reader.name_map['1'] == 'net_a' and reader.name_map['104'] == 'u4'
+    assert [net.net_id for net in nets] == NET_IDS
+    net_a = nets[0]
+    assert net_a.name == 'net_a'
+    assert net_a.conns == [('101:Z', 'I'), ('102:A', 'O'), ('103:A', 'O')]
+    assert ('1:1', 0.4) in net_a.caps and len(net_a.caps) == 5
+    assert net_a.couplings == [('1:2', '2:1', 0.25)]
+    assert net_a.ress[0] == ('101:Z', '1:1', 10.0)
+    assert split_pins(nets[1]) == (['103:Z', '104:Z'], ['101:A', '102:B'])
+    assert real_pin_names(nets[1], reader.name_map)['102:B'] == 'u2/B'
+
+
+def test_couplings_grounded_on_own_end(spef_path):
+    with SpefReader(spef_path) as reader:
+        net_a = next(iter(reader))
+    caps = dict(net_caps(net_a, coupling_factor=2.0))
+    assert caps['1:2'] == 0.3 + 0.5
+    assert '2:1' not in caps
+
+
+def test_indented_dnet_lines(tmp_path, spef_text):
+    path = tmp_path / 'indented.spef'
+    path.write_text(spef_text.replace('\n*D_NET', '\n  *D_NET').replace('\n*END', '\n\t*END'))
+    with SpefReader(str(path)) as reader:
+        assert [net.net_id for net in reader] == NET_IDS
+
+
+def _parse_arrays(spef_path):
+    with SpefReader(spef_path) as reader:
+        return list(reader.iter_arrays(coupling_factor=2.0))
+
+
+def _arrays_as_caps(arrays):
+    return {node: cap for node, cap in zip(arrays.nodes, arrays.cap.tolist()) if cap}
+
+
+def test_block_parse_matches_line_parse(spef_path, monkeypatch):
+    with SpefReader(spef_path) as reader:
+        nets = list(reader)
+    parsed = [_parse_arrays(spef_path)]
+    if cpp_parse_available():
+        # 同时检查没有编译 C++ 扩展时的 NumPy 切片路径
+        import spefReader
+        monkeypatch.setattr(spefReader, 'cpp_parse_available', lambda: False)
+        parsed.append(_parse_arrays(spef_path))
+    for arrays_list in parsed:
+        for net, arrays in zip(nets, arrays_list):
+            assert (arrays.net_id, arrays.name, arrays.conns) == (net.net_id, net.name, net.conns)
+            assert [arrays.nodes[pin] for pin in arrays.pins.tolist()] == [node for node, _ in net.conns]
+            assert _arrays_as_caps(arrays) == dict(net_caps(net, coupling_factor=2.0))
+            nodes = arrays.nodes
+            assert [(nodes[u], nodes[v], r) for u, v, r in zip(arrays.edge_u.tolist(), arrays.edge_v.tolist(),
+                                                             arrays.edge_r.tolist())] == net.ress
+    if len(parsed) == 2:
+        for cpp_arrays, py_arrays in zip(*parsed):
+            assert cpp_arrays.nodes == py_arrays.nodes
+            np.testing.assert_array_equal(cpp_arrays.cap, py_arrays.cap)
+
+
+def test_block_parse_skips_short_rows(tmp_path, spef_text):
+    # 少于 3 列的 *CAP 行、少于 4 列的 *RES 行忽略，与逐行解析相同
+    path = tmp_path / 'short.spef'
+    path.write_text(spef_text.replace('5 *103:A 0.5\n', '5 *103:A 0.5\n7 *1:9\n')
+                    .replace('4 *1:1 *103:A 40.0\n', '4 *1:1 *103:A 40.0\n5 *1:1\n'))
+    with SpefReader(str(path)) as reader:
+        net_a = next(iter(reader))
+    arrays = _parse_arrays(str(path))[0]
+    assert _arrays_as_caps(arrays) == dict(net_caps(net_a, coupling_factor=2.0))
+    assert len(arrays.edge_u) == len(net_a.ress) == 4